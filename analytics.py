@@ -0,0 +1,362 @@
+import json
+import os
+import time
+from typing import Iterable, List, Optional
+
+from hand_evaluator import HandEvaluator
+from hand_history import (EVENT_DEAL, EVENT_FOLD, EVENT_CALL, EVENT_RAISE, EVENT_EXCHANGE, EVENT_AWARD,
+                          dealt_hands, history_paths, read_hand_records)
+
+try:
+    import numpy as np
+except ImportError:  # Magazyn kolumnowy wymaga NumPy - reszta gry działa bez niego
+    np = None
+
+
+MANIFEST = 'manifest.json'
+STORE_VERSION = 1
+MAX_SEATS = 10
+CATEGORY_COUNT = 10
+
+# Wynik rozdania w kolumnie hands.result
+RESULT_FOLD = 0
+RESULT_SHOWDOWN = 1
+RESULT_SPLIT = 2
+
+# Kolumny tabel (nazwa -> typ); każda część partycji zapisuje je jako osobne pliki .npy
+HAND_COLUMNS = {'hand': np.int64, 'players': np.uint8, 'pot': np.int64, 'result': np.uint8,
+                'big_blind': np.int64} if np is not None else {}
+SEAT_COLUMNS = {'hand_row': np.int64, 'seat': np.uint8, 'player': np.int32, 'category': np.int8,
+                'folded': np.bool_, 'won': np.int64, 'decisions': np.int32,
+                'raises': np.int32} if np is not None else {}
+
+
+class StoreError(Exception):
+    """Błąd magazynu analitycznego (uszkodzony manifest, nieznana partycja)"""
+    pass
+
+
+def _empty_aggregates() -> dict:
+    """Zerowe agregaty partycji; tablice graczy rosną razem ze słownikiem nazw."""
+    return {
+        'hands': 0,
+        'category_hands': np.zeros((MAX_SEATS, CATEGORY_COUNT), dtype=np.int64),
+        'category_wins': np.zeros((MAX_SEATS, CATEGORY_COUNT), dtype=np.int64),
+        'pot_hands': np.zeros(MAX_SEATS + 1, dtype=np.int64),
+        'pot_total': np.zeros(MAX_SEATS + 1, dtype=np.int64),
+        'player_hands': np.zeros(0, dtype=np.int64),
+        'player_folds': np.zeros(0, dtype=np.int64),
+        'player_wins': np.zeros(0, dtype=np.int64),
+    }
+
+
+def _add_counts(total, counts):
+    """Suma tablic liczników różnej długości (nowi gracze wydłużają tablicę)."""
+    if len(counts) > len(total):
+        total = np.concatenate([total, np.zeros(len(counts) - len(total), dtype=total.dtype)])
+    total[:len(counts)] += counts
+    return total
+
+
+class AnalyticsStore:
+    """Kolumnowy magazyn historii rozdań z agregatami aktualizowanymi przyrostowo.
+
+    Układ katalogu: `<store>/<partycja>/chunk-NNNNN/{hands,seats}.<kolumna>.npy`
+    oraz `manifest.json`. Partycją jest przebieg lub data - nazwa podawana przy
+    wczytywaniu. Tabela `hands` ma wiersz na rozdanie, `seats` - wiersz na
+    gracza, któremu rozdano karty (`hand_row` wskazuje wiersz rozdania
+    w partycji). Manifest pamięta słownik nazw graczy, pozycję wczytania każdego
+    pliku historii i agregaty każdej partycji. Nowe rozdania trafiają do nowej
+    części, a agregaty powiększa się o liczniki tylko tej części, więc zapytania
+    o agregaty nie przeglądają kolumn. Manifest jest podmieniany jako ostatni -
+    części spoza manifestu (przerwane wczytywanie) są pomijane i nadpisywane.
+    """
+
+    def __init__(self, path: str):
+        if np is None:
+            raise ImportError("NumPy is required for the analytics store")
+        self.path = path
+        self.players: List[str] = []
+        self.files = {}
+        self.partitions = {}
+        self._player_ids = {}
+        manifest_path = os.path.join(path, MANIFEST)
+        if os.path.exists(manifest_path):
+            self._load_manifest(manifest_path)
+
+    def _load_manifest(self, manifest_path: str) -> None:
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != STORE_VERSION:
+                raise StoreError(f"Unsupported store version {manifest.get('version')} in {manifest_path}")
+            self.players = manifest['players']
+            self.files = manifest['files']
+            self.partitions = {}
+            for name, partition in manifest['partitions'].items():
+                aggregates = _empty_aggregates()
+                for key, value in partition['aggregates'].items():
+                    aggregates[key] = value if key == 'hands' else np.array(value, dtype=np.int64)
+                self.partitions[name] = dict(partition, aggregates=aggregates)
+        except (KeyError, TypeError, ValueError) as e:
+            raise StoreError(f"Corrupted store manifest {manifest_path}: {e}")
+        self._player_ids = {name: i for i, name in enumerate(self.players)}
+
+    def _save_manifest(self) -> None:
+        partitions = {}
+        for name, partition in self.partitions.items():
+            aggregates = {key: value if key == 'hands' else value.tolist()
+                          for key, value in partition['aggregates'].items()}
+            partitions[name] = dict(partition, aggregates=aggregates)
+        manifest = {'version': STORE_VERSION, 'players': self.players, 'files': self.files,
+                    'partitions': partitions}
+        # Zapis do pliku tymczasowego i podmiana - manifest jest zawsze spójny
+        manifest_path = os.path.join(self.path, MANIFEST)
+        tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+
+    def _player_id(self, name: str) -> int:
+        player = self._player_ids.get(name)
+        if player is None:
+            player = self._player_ids[name] = len(self.players)
+            self.players.append(name)
+        return player
+
+    def ingest(self, paths: Iterable[str], partition: str) -> dict:
+        """Wczytanie nowych rozdań z plików historii do partycji; zwraca liczbę rozdań i wierszy.
+
+        Z każdego pliku czytane są tylko bajty za zapamiętaną pozycją, więc
+        ponowne wczytanie tego samego przebiegu (także wciąż zapisywanego)
+        dodaje wyłącznie nowe rozdania.
+        """
+        if not partition or os.sep in partition or partition.startswith('.'):
+            raise StoreError(f"Invalid partition name {partition!r}")
+        state = self.partitions.get(partition)
+        if state is None:
+            state = {'chunks': [], 'hands': 0, 'rows': 0, 'aggregates': _empty_aggregates()}
+        hand_cols = {name: [] for name in HAND_COLUMNS}
+        seat_cols = {name: [] for name in SEAT_COLUMNS}
+        cards = []
+        offsets = {}
+        hand_row = state['hands']
+        ids_cache = {}
+        for path in paths:
+            key = os.path.abspath(path)
+            known = self.files.get(key)
+            if known is not None and known['partition'] != partition:
+                raise StoreError(f"{path} was already ingested into partition {known['partition']}")
+            start = known['offset'] if known else 0
+            names = tuple(known['names']) if known and known['names'] else None
+            for hand, end in read_hand_records(path, start, names, partial=True):
+                names = hand['names']
+                ids = ids_cache.get(names)
+                if ids is None:
+                    ids = ids_cache[names] = [self._player_id(name) for name in names]
+                dealt = {}
+                folded = 0
+                count = len(names)
+                won = [0] * count
+                decisions = [0] * count
+                raises = [0] * count
+                for event in hand['events']:
+                    kind = event[0]
+                    if kind == EVENT_DEAL:
+                        dealt = dealt_hands(event[1], event[2])
+                    elif kind == EVENT_CALL:
+                        decisions[event[1]] += 1
+                    elif kind == EVENT_FOLD:
+                        decisions[event[1]] += 1
+                        folded |= 1 << event[1]
+                    elif kind == EVENT_RAISE:
+                        decisions[event[1]] += 1
+                        raises[event[1]] += 1
+                    elif kind == EVENT_EXCHANGE:
+                        held = dealt[event[1]]
+                        for index, card in zip(event[2], event[3]):
+                            held[index] = card
+                    elif kind == EVENT_AWARD:
+                        won[event[1]] += event[2]
+                winners = sum(1 for amount in won if amount)
+                if winners > 1:
+                    result = RESULT_SPLIT
+                elif len(dealt) - bin(folded).count('1') <= 1:
+                    result = RESULT_FOLD
+                else:
+                    result = RESULT_SHOWDOWN
+                hand_cols['hand'].append(hand['hand'])
+                hand_cols['players'].append(len(dealt))
+                hand_cols['pot'].append(sum(won))
+                hand_cols['result'].append(result)
+                hand_cols['big_blind'].append(hand['big_blind'])
+                for seat, held in dealt.items():
+                    seat_cols['hand_row'].append(hand_row)
+                    seat_cols['seat'].append(seat)
+                    seat_cols['player'].append(ids[seat])
+                    seat_cols['folded'].append(folded >> seat & 1)
+                    seat_cols['won'].append(won[seat])
+                    seat_cols['decisions'].append(decisions[seat])
+                    seat_cols['raises'].append(raises[seat])
+                    cards.extend(held)
+                hand_row += 1
+                offsets[key] = (end, names)
+        hands = hand_row - state['hands']
+        if not hands:
+            return {'hands': 0, 'rows': 0, 'partition': partition}
+
+        hand_arrays = {name: np.array(values, dtype=HAND_COLUMNS[name]) for name, values in hand_cols.items()}
+        seat_cols['category'] = HandEvaluator.rank_batch(np.array(cards, dtype=np.int8).reshape(-1, 5))[1]
+        seat_arrays = {name: np.asarray(seat_cols[name], dtype=dtype) for name, dtype in SEAT_COLUMNS.items()}
+
+        chunk = f"chunk-{len(state['chunks']) + 1:05d}"
+        directory = os.path.join(self.path, partition, chunk)
+        os.makedirs(directory, exist_ok=True)
+        for table, arrays in (('hands', hand_arrays), ('seats', seat_arrays)):
+            for name, values in arrays.items():
+                np.save(os.path.join(directory, f"{table}.{name}.npy"), values)
+
+        self._update_aggregates(state['aggregates'], hand_arrays, seat_arrays)
+        state['chunks'].append(chunk)
+        state['hands'] = hand_row
+        state['rows'] += len(seat_arrays['seat'])
+        self.partitions[partition] = state
+        for key, (end, names) in offsets.items():
+            self.files[key] = {'offset': end, 'names': list(names), 'partition': partition}
+        self._save_manifest()
+        return {'hands': hands, 'rows': len(seat_arrays['seat']), 'partition': partition}
+
+    def _update_aggregates(self, aggregates: dict, hands: dict, seats: dict) -> None:
+        """Dodanie liczników nowej części do agregatów partycji (bez ponownego przeglądania kolumn)."""
+        cell = seats['seat'].astype(np.intp) * CATEGORY_COUNT + seats['category']
+        size = MAX_SEATS * CATEGORY_COUNT
+        won = seats['won'] > 0
+        aggregates['hands'] += len(hands['hand'])
+        aggregates['category_hands'] += np.bincount(cell, minlength=size).reshape(MAX_SEATS, CATEGORY_COUNT)
+        aggregates['category_wins'] += np.bincount(cell[won], minlength=size).reshape(MAX_SEATS, CATEGORY_COUNT)
+        aggregates['pot_hands'] += np.bincount(hands['players'], minlength=MAX_SEATS + 1)
+        aggregates['pot_total'] += np.bincount(hands['players'], weights=hands['pot'],
+                                               minlength=MAX_SEATS + 1).astype(np.int64)
+        player = seats['player']
+        aggregates['player_hands'] = _add_counts(aggregates['player_hands'], np.bincount(player))
+        aggregates['player_folds'] = _add_counts(aggregates['player_folds'],
+                                                 np.bincount(player, weights=seats['folded']).astype(np.int64))
+        aggregates['player_wins'] = _add_counts(aggregates['player_wins'],
+                                                np.bincount(player, weights=won).astype(np.int64))
+
+    def _selected(self, partitions: Optional[List[str]]) -> List[str]:
+        if partitions is None:
+            return sorted(self.partitions)
+        missing = [name for name in partitions if name not in self.partitions]
+        if missing:
+            raise StoreError(f"Unknown partition(s): {', '.join(missing)}")
+        return list(partitions)
+
+    def aggregates(self, partitions: Optional[List[str]] = None) -> dict:
+        """Suma agregatów wybranych partycji (domyślnie wszystkich)."""
+        total = _empty_aggregates()
+        for name in self._selected(partitions):
+            for key, value in self.partitions[name]['aggregates'].items():
+                if key == 'hands':
+                    total[key] += value
+                elif key.startswith('player_'):
+                    total[key] = _add_counts(total[key], value)
+                else:
+                    total[key] += value
+        return total
+
+    def columns(self, table: str, names: List[str], partitions: Optional[List[str]] = None) -> dict:
+        """Kolumny tabeli 'hands' lub 'seats' z wybranych partycji (pliki mapowane do pamięci).
+
+        Do zapytań spoza agregatów; `hand_row` jest przesuwany tak, by wskazywał
+        wiersz w sklejonej tabeli `hands` tych samych partycji.
+        """
+        schema = {'hands': HAND_COLUMNS, 'seats': SEAT_COLUMNS}.get(table)
+        if schema is None:
+            raise StoreError(f"Unknown table {table!r} (use 'hands' or 'seats')")
+        unknown = [name for name in names if name not in schema]
+        if unknown:
+            raise StoreError(f"Unknown column(s) of {table}: {', '.join(unknown)}")
+        parts = {name: [] for name in names}
+        base = 0
+        for partition in self._selected(partitions):
+            state = self.partitions[partition]
+            for chunk in state['chunks']:
+                directory = os.path.join(self.path, partition, chunk)
+                for name in names:
+                    values = np.load(os.path.join(directory, f"{table}.{name}.npy"), mmap_mode='r')
+                    parts[name].append(values + base if name == 'hand_row' else values)
+            base += state['hands']
+        return {name: np.concatenate(values) if values else np.zeros(0, dtype=schema[name])
+                for name, values in parts.items()}
+
+    def win_rate_by_category(self, partitions: Optional[List[str]] = None) -> dict:
+        """Odsetek wygranych rozdań według miejsca i kategorii końcowej ręki: {(miejsce, kategoria): (rozdania, wygrane)}."""
+        aggregates = self.aggregates(partitions)
+        hands, wins = aggregates['category_hands'], aggregates['category_wins']
+        return {(int(seat), int(category)): (int(hands[seat, category]), int(wins[seat, category]))
+                for seat, category in zip(*np.nonzero(hands))}
+
+    def average_pot_by_players(self, partitions: Optional[List[str]] = None) -> dict:
+        """Średnia pula według liczby graczy, którym rozdano karty: {gracze: (rozdania, średnia)}."""
+        aggregates = self.aggregates(partitions)
+        hands, total = aggregates['pot_hands'], aggregates['pot_total']
+        return {int(players): (int(hands[players]), total[players] / hands[players])
+                for players in np.flatnonzero(hands)}
+
+    def fold_frequency(self, partitions: Optional[List[str]] = None) -> dict:
+        """Odsetek rozdań spasowanych przez każdego gracza: {nazwa: (rozdania, spasowane)}."""
+        aggregates = self.aggregates(partitions)
+        hands, folds = aggregates['player_hands'], aggregates['player_folds']
+        return {self.players[player]: (int(hands[player]), int(folds[player]))
+                for player in np.flatnonzero(hands)}
+
+
+QUERIES = ('categories', 'pots', 'folds')
+
+
+def format_query(store: AnalyticsStore, query: str, partitions: Optional[List[str]] = None) -> str:
+    """Wynik jednego z zapytań QUERIES jako tekst."""
+    if query == 'categories':
+        rates = store.win_rate_by_category(partitions)
+        lines = [f"{'seat':>4}  {'category':<16}{'hands':>12}{'win rate':>10}"]
+        for (seat, category), (hands, wins) in sorted(rates.items()):
+            lines.append(f"{seat:>4}  {HandEvaluator.hand_name(category):<16}{hands:>12}{wins / hands:>10.1%}")
+    elif query == 'pots':
+        lines = [f"{'players':>7}{'hands':>12}{'avg pot':>12}"]
+        for players, (hands, average) in sorted(store.average_pot_by_players(partitions).items()):
+            lines.append(f"{players:>7}{hands:>12}{average:>12.1f}")
+    elif query == 'folds':
+        lines = [f"{'player':<12}{'hands':>12}{'fold rate':>10}"]
+        for name, (hands, folds) in sorted(store.fold_frequency(partitions).items()):
+            lines.append(f"{name:<12}{hands:>12}{folds / hands:>10.1%}")
+    else:
+        raise StoreError(f"Unknown query {query!r} (choose from {', '.join(QUERIES)})")
+    return "\n".join(lines)
+
+
+def run_ingest(store_path: str, prefix: str, partition: Optional[str] = None) -> int:
+    """Wczytanie historii z linii poleceń; partycja domyślnie nazywa się jak przebieg."""
+    paths = history_paths(prefix)
+    if not paths:
+        print(f"No hand history files match {prefix}")
+        return 1
+    store = AnalyticsStore(store_path)
+    start = time.perf_counter()
+    report = store.ingest(paths, partition or os.path.basename(prefix.rstrip(os.sep)))
+    elapsed = time.perf_counter() - start
+    print(f"Ingested {report['hands']} new hands ({report['rows']} seat rows) from {len(paths)} files "
+          f"into partition {report['partition']} in {elapsed:.2f}s")
+    return 0
+
+
+def run_query(store_path: str, query: str, partitions: Optional[List[str]] = None) -> int:
+    """Zapytanie o agregaty z linii poleceń (z czasem wykonania)."""
+    start = time.perf_counter()
+    store = AnalyticsStore(store_path)
+    text = format_query(store, query, partitions)
+    elapsed = time.perf_counter() - start
+    hands = store.aggregates(partitions)['hands']
+    print(text)
+    print(f"{hands} hands in {len(store._selected(partitions))} partitions, query took {elapsed * 1000:.1f} ms")
+    return 0
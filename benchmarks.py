@@ -0,0 +1,390 @@
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from poker import Player, Deck, Card
+from game_engine import GameEngine
+from hand_evaluator import HandEvaluator, RANKS, SUITS
+from session_manager import SessionManager
+from policies import ReferenceBatchPolicy
+from deck_sources import ScriptedSource
+import discard_solver
+
+try:
+    import numpy as np
+except ImportError:  # Bez NumPy pomijane są przypadki wsadowe
+    np = None
+
+
+DEFAULT_SEED = 2025
+DEFAULT_THRESHOLD = 0.10
+SESSION_COUNTS = (10, 1000, 10000)
+# Liczba stałych rozdań, po których cyklicznie przechodzą przypadki silnika
+DEAL_POOL = 64
+
+# Rejestr: nazwa -> (fabryka przypadku, liczba wywołań w powtórzeniu, liczba powtórzeń)
+BENCHMARKS = {}
+# Katalogi tymczasowe sesji usuwane po zakończeniu pomiarów
+_TEMP_DIRS = []
+
+
+def benchmark(name: str, number: int, repeat: int = 5):
+    """Dekorator rejestrujący przypadek testu wydajności.
+
+    Fabryka dostaje generator losowy z ustalonym ziarnem i zwraca krotkę
+    (setup, op, items): `setup()` przygotowuje stan poza pomiarem (może być None),
+    `op(state)` jest mierzone, a `items` to liczba jednostek pracy w jednym wywołaniu.
+    """
+    def register(factory):
+        BENCHMARKS[name] = (factory, number, repeat)
+        return factory
+    return register
+
+
+def _random_hands(rng: random.Random, count: int) -> List[List[Card]]:
+    deck = [Card.from_index(i) for i in range(52)]
+    return [rng.sample(deck, 5) for _ in range(count)]
+
+
+def _one_pair_hands(rng: random.Random, count: int) -> List[List[Card]]:
+    """Ręce z jedną parą - najdłuższa ścieżka oceny (iloczyn liczb pierwszych i cztery kickery)."""
+    hands = []
+    for _ in range(count):
+        ranks = rng.sample(RANKS, 4)
+        suits = rng.sample(SUITS, 2)
+        hand = [Card(ranks[0], suits[0]), Card(ranks[0], suits[1])]
+        hand += [Card(rank, rng.choice(SUITS)) for rank in ranks[1:]]
+        hands.append(hand)
+    return hands
+
+
+def _deal_pool(rng: random.Random, count: int = DEAL_POOL) -> List[tuple]:
+    """Stała pula rozdań: (ułożenie talii, pozycja rozdającego, ziarno silnika)."""
+    pool = []
+    for _ in range(count):
+        order = list(range(52))
+        rng.shuffle(order)
+        pool.append((order, rng.randrange(52), rng.getrandbits(64)))
+    return pool
+
+
+def _dealt_engine(deal: tuple, num_players: int = 6) -> GameEngine:
+    """Silnik w stanie po pobraniu blindów i rozdaniu kart z podanego rozdania puli."""
+    order, dealer, engine_seed = deal
+    engine = GameEngine(Player.create_players(num_players), Deck(), rng=random.Random(engine_seed))
+    engine.dealer_position = dealer % num_players
+    engine.deck.reset(order=order)
+    engine._collect_blinds()
+    engine._deal_cards()
+    return engine
+
+
+def _cycle_deals(rng: random.Random):
+    """Setup przechodzący w kółko po stałej puli rozdań."""
+    pool = _deal_pool(rng)
+    state = {'position': 0}
+
+    def setup():
+        deal = pool[state['position'] % len(pool)]
+        state['position'] += 1
+        return _dealt_engine(deal)
+    return pool, setup
+
+
+def _reset_discard_solver():
+    """Określony stan solvera wymiany: wczytana tablica, puste cache rozwiązań."""
+    discard_solver.load_discard_table()
+    discard_solver._best_kept.cache_clear()
+    discard_solver._solve.cache_clear()
+
+
+@benchmark('hand_rank.random', number=20)
+def _bench_hand_rank_random(rng):
+    hands = _random_hands(rng, 1000)
+
+    def op(_):
+        for hand in hands:
+            HandEvaluator.hand_rank(hand)
+    return None, op, len(hands)
+
+
+@benchmark('hand_rank.worst_case', number=20)
+def _bench_hand_rank_worst(rng):
+    hands = _one_pair_hands(rng, 1000)
+
+    def op(_):
+        for hand in hands:
+            HandEvaluator.hand_rank(hand)
+    return None, op, len(hands)
+
+
+@benchmark('deck.construct', number=2000)
+def _bench_deck_construct(rng):
+    return None, lambda _: Deck(), 1
+
+
+@benchmark('deck.shuffle', number=2000)
+def _bench_deck_shuffle(rng):
+    deck = Deck()
+    return None, lambda _: deck.shuffle(rng), 1
+
+
+@benchmark('deck.deal', number=2000)
+def _bench_deck_deal(rng):
+    deck = Deck()
+    players = Player.create_players(6)
+
+    def setup():
+        deck.reset(rng)
+        for player in players:
+            player.clear_hand()
+
+    return setup, lambda _: deck.deal(players, 5), 1
+
+
+@benchmark('engine.betting_round', number=500)
+def _bench_betting_round(rng):
+    _, setup = _cycle_deals(rng)
+    return setup, (lambda engine: engine._betting_round()), 1
+
+
+@benchmark('engine.exchange_phase', number=500)
+def _bench_exchange_phase(rng):
+    pool, setup = _cycle_deals(rng)
+    # Pomiar na rozgrzanym solverze: każda ręka puli rozwiązana raz przed pomiarem
+    _reset_discard_solver()
+    for deal in pool:
+        _dealt_engine(deal)._exchange_phase()
+    return setup, (lambda engine: engine._exchange_phase()), 1
+
+
+@benchmark('engine.showdown', number=500)
+def _bench_showdown(rng):
+    _, setup = _cycle_deals(rng)
+    return setup, (lambda engine: engine._showdown()), 1
+
+
+@benchmark('policy.decide_batch', number=20)
+def _bench_decide_batch(rng):
+    policy = ReferenceBatchPolicy()
+    count = 100000
+    keys = [rng.getrandbits(24) for _ in range(count)]
+    call_amounts = [rng.choice((0, 25, 50, 100)) for _ in range(count)]
+    stacks = [rng.randrange(0, 2000) for _ in range(count)]
+    pots = [rng.randrange(0, 1000) for _ in range(count)]
+    uniforms = [rng.random() for _ in range(count)]
+    arrays = [np.array(column) for column in (keys, call_amounts, stacks, pots, uniforms)]
+    return None, lambda _: policy.decide_batch(*arrays), count
+
+
+def _play_round_case(num_players: int):
+    def factory(rng):
+        orders = [order for order, _, _ in _deal_pool(rng)]
+        engine_seed = rng.getrandbits(64)
+        state = {'engine': None, 'games': 0}
+
+        def new_engine():
+            # Każda gra zaczyna od tego samego ziarna i tej samej puli ułożeń talii
+            engine = GameEngine(Player.create_players(num_players), Deck(),
+                                rng=random.Random(engine_seed + state['games']),
+                                deck_source=ScriptedSource(orders, repeat=True))
+            state['games'] += 1
+            return engine
+
+        def op(_):
+            engine = state['engine']
+            if engine is None or engine.game_over or engine.check_game_over():
+                engine = state['engine'] = new_engine()
+            winners = engine.play_round()
+            if winners and winners[0][0] != "final_winner" and winners[0][5]:
+                engine.handle_draw_resolution("split")
+
+        _reset_discard_solver()
+        for _ in range(len(orders)):
+            op(None)
+        state['engine'], state['games'] = None, 0
+        return None, op, 1
+    return factory
+
+
+benchmark('engine.play_round.2p', number=1000)(_play_round_case(2))
+benchmark('engine.play_round.6p', number=500)(_play_round_case(6))
+
+
+def _session_data(rng: random.Random) -> dict:
+    players = [{'name': name, 'stack': rng.randrange(0, 3000, 25), 'is_active': True}
+               for name in ["You"] + [f"Bot {i}" for i in range(1, 6)]]
+    return {'players': players, 'pot': 0, 'current_bet': 0, 'dealer_position': rng.randrange(6),
+            'small_blind': 25, 'big_blind': 50, 'stage': 'round_end'}
+
+
+def _populate_sessions(manager: SessionManager, rng: random.Random, count: int) -> List[str]:
+    """Zapisanie `count` sesji z unikalnymi identyfikatorami (save_session nadaje je z dokładnością do sekundy)."""
+    game_ids = []
+    for i in range(count):
+        session = _session_data(rng)
+        game_id = f"poker_bench_{i:06d}"
+        session['game_id'] = game_id
+        session['save_date'] = f"2025-01-01 00:00:{i % 60:02d}"
+        session['summary'] = f"Players: {len(session['players'])}"
+        with open(os.path.join(manager.data_dir, f'session_{game_id}.json'), 'w', encoding='utf-8') as f:
+            json.dump(session, f, indent=2, ensure_ascii=False)
+        game_ids.append(game_id)
+    return game_ids
+
+
+def _session_case(operation: str, count: int):
+    def factory(rng):
+        data_dir = tempfile.mkdtemp(prefix='poker_bench_')
+        _TEMP_DIRS.append(data_dir)
+        manager = SessionManager(data_dir)
+        game_ids = _populate_sessions(manager, rng, count)
+        if operation == 'save':
+            return None, lambda _: manager.save_session(_session_data(rng)), 1
+        if operation == 'load':
+            return None, lambda _: manager.load_session(rng.choice(game_ids)), 1
+        return None, lambda _: manager.list_sessions(), 1
+    return factory
+
+
+def _count_label(count: int) -> str:
+    return f"{count // 1000}k" if count >= 1000 else str(count)
+
+
+for _count in SESSION_COUNTS:
+    _label = _count_label(_count)
+    benchmark(f'session.save.{_label}', number=200)(_session_case('save', _count))
+    benchmark(f'session.load.{_label}', number=200)(_session_case('load', _count))
+    benchmark(f'session.list.{_label}', number=max(1, 2000 // _count), repeat=3)(_session_case('list', _count))
+
+
+def measure(setup: Optional[Callable], op: Callable, number: int, repeat: int) -> List[float]:
+    """Czas jednego wywołania `op` w sekundach dla każdego powtórzenia (setup nie jest mierzony)."""
+    samples = []
+    for _ in range(repeat):
+        if setup is None:
+            start = time.perf_counter()
+            for _ in range(number):
+                op(None)
+            total = time.perf_counter() - start
+        else:
+            total = 0.0
+            for _ in range(number):
+                state = setup()
+                start = time.perf_counter()
+                op(state)
+                total += time.perf_counter() - start
+        samples.append(total / number)
+    return samples
+
+
+def run_benchmarks(names: Optional[List[str]] = None, seed: int = DEFAULT_SEED,
+                   quick: bool = False) -> Dict[str, dict]:
+    """Uruchomienie wybranych przypadków (filtry po fragmencie nazwy) i zwrócenie wyników."""
+    results = {}
+    try:
+        for name, (factory, number, repeat) in BENCHMARKS.items():
+            if names and not any(part in name for part in names):
+                continue
+            if quick:
+                number, repeat = max(1, number // 10), min(repeat, 3)
+            if name.startswith('policy.') and np is None:
+                continue
+            rng = random.Random(f"{seed}:{name}")
+            setup, op, items = factory(rng)
+            # Rozgrzewka interpretera i alokatora; cache solvera rozgrzewają fabryki przypadków
+            measure(setup, op, max(1, number // 10), 1)
+            samples = measure(setup, op, number, repeat)
+            median = statistics.median(samples)
+            results[name] = {
+                'median_us': median / items * 1e6,
+                'min_us': min(samples) / items * 1e6,
+                'stdev_us': (statistics.stdev(samples) if len(samples) > 1 else 0.0) / items * 1e6,
+                'ops_per_sec': items / median if median else 0.0,
+                'items': items,
+                'number': number,
+                'repeat': repeat,
+            }
+    finally:
+        while _TEMP_DIRS:
+            shutil.rmtree(_TEMP_DIRS.pop(), ignore_errors=True)
+    return results
+
+
+def make_report(results: Dict[str, dict], seed: int, quick: bool) -> dict:
+    """Wyniki w formacie JSON razem z opisem środowiska."""
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'seed': seed,
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict],
+            threshold: float = DEFAULT_THRESHOLD) -> List[tuple]:
+    """Porównanie median z wynikami bazowymi: (nazwa, bazowy, obecny, stosunek, status)."""
+    rows = []
+    for name, result in results.items():
+        if name not in baseline:
+            rows.append((name, None, result['median_us'], None, 'new'))
+            continue
+        base = baseline[name]['median_us']
+        ratio = result['median_us'] / base if base else float('inf')
+        if ratio > 1 + threshold:
+            status = 'REGRESSION'
+        elif ratio < 1 - threshold:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((name, base, result['median_us'], ratio, status))
+    return rows
+
+
+def format_results(results: Dict[str, dict], rows: Optional[List[tuple]] = None) -> str:
+    """Tabela wyników, opcjonalnie z porównaniem do wyników bazowych."""
+    if rows is None:
+        lines = [f"{'benchmark':<26}{'median us':>14}{'min us':>14}{'ops/sec':>14}"]
+        for name, result in results.items():
+            lines.append(f"{name:<26}{result['median_us']:>14.2f}{result['min_us']:>14.2f}"
+                         f"{result['ops_per_sec']:>14.0f}")
+        return "\n".join(lines)
+    lines = [f"{'benchmark':<26}{'baseline us':>14}{'current us':>14}{'ratio':>8}  status"]
+    for name, base, current, ratio, status in rows:
+        base_text = f"{base:>14.2f}" if base is not None else f"{'-':>14}"
+        ratio_text = f"{ratio:>8.2f}" if ratio is not None else f"{'-':>8}"
+        lines.append(f"{name:<26}{base_text}{current:>14.2f}{ratio_text}  {status}")
+    return "\n".join(lines)
+
+
+def run(names: Optional[List[str]] = None, output: Optional[str] = None,
+        baseline_path: Optional[str] = None, threshold: float = DEFAULT_THRESHOLD,
+        seed: int = DEFAULT_SEED, quick: bool = False) -> int:
+    """Uruchomienie testów wydajności z linii poleceń; kod 1 oznacza regresję względem bazy."""
+    baseline = None
+    if baseline_path:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    results = run_benchmarks(names, seed, quick)
+    if not results:
+        raise ValueError(f"No benchmarks match: {', '.join(names)}")
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(make_report(results, seed, quick), f, indent=2)
+    rows = compare(results, baseline, threshold) if baseline is not None else None
+    print(format_results(results, rows))
+    if rows and any(row[4] == 'REGRESSION' for row in rows):
+        return 1
+    return 0
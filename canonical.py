@@ -0,0 +1,128 @@
+from math import comb
+
+from hand_table import COLEX, colex_index
+
+try:
+    import numpy as np
+except ImportError:  # NumPy jest potrzebny tylko do kanonizacji wsadowej
+    np = None
+
+
+def _indices(cards):
+    """Zamiana kart (obiektów Card lub liczb 0-51) na indeksy."""
+    return [card if isinstance(card, int) else int(getattr(card, 'index', card)) for card in cards]
+
+
+def _suit_order(masks):
+    """Kolejność kolorów: malejąco po maskach rang (przy remisie stabilnie)."""
+    return sorted(range(4), key=lambda suit: masks[suit], reverse=True)
+
+
+def canonical_map(cards):
+    """Zwracanie kanonicznych indeksów kart (w tej samej kolejności co wejście).
+
+    Kolory są przenumerowane tak, aby kolor z największą maską rang stał się
+    pierwszym kolorem - wszystkie ręce różniące się permutacją kolorów dają ten sam wynik.
+    """
+    indices = _indices(cards)
+    masks = [0, 0, 0, 0]
+    for index in indices:
+        masks[index // 13] |= 1 << (index % 13)
+    order = _suit_order(masks)
+    suit_map = [0] * 4
+    for canonical_suit, suit in enumerate(order):
+        suit_map[suit] = canonical_suit
+    return [suit_map[index // 13] * 13 + index % 13 for index in indices]
+
+
+def canonical_hand(cards):
+    """Zwracanie posortowanej krotki indeksów kanonicznego reprezentanta ręki."""
+    return tuple(sorted(canonical_map(cards)))
+
+
+def encode(cards) -> int:
+    """Kodowanie ręki 5-kartowej jako indeksu koleksykograficznego jej reprezentanta (< 2 598 960)."""
+    return colex_index(canonical_map(cards))
+
+
+def decode(code: int):
+    """Odtwarzanie posortowanych indeksów kart reprezentanta z kodu."""
+    cards = []
+    card = 51
+    for k in range(5, 0, -1):
+        while comb(card, k) > code:
+            card -= 1
+        cards.append(card)
+        code -= comb(card, k)
+        card -= 1
+    return tuple(reversed(cards))
+
+
+def encode_with_dead(hand, dead) -> int:
+    """Kodowanie ręki razem z kartami martwymi (np. wymienionymi).
+
+    Dla każdego koloru tworzona jest para (maska ręki, maska martwych kart);
+    posortowane pary są pakowane po 26 bitów w jedną liczbę.
+    """
+    hand_masks = [0, 0, 0, 0]
+    dead_masks = [0, 0, 0, 0]
+    for index in _indices(hand):
+        hand_masks[index // 13] |= 1 << (index % 13)
+    for index in _indices(dead):
+        dead_masks[index // 13] |= 1 << (index % 13)
+    code = 0
+    for pair in sorted(zip(hand_masks, dead_masks), reverse=True):
+        code = (code << 26) | (pair[0] << 13) | pair[1]
+    return code
+
+
+def decode_with_dead(code: int):
+    """Odtwarzanie (indeksów ręki, indeksów martwych kart) reprezentanta z kodu."""
+    hand = []
+    dead = []
+    for suit in range(4):
+        pair = (code >> (26 * (3 - suit))) & ((1 << 26) - 1)
+        for rank in range(13):
+            if pair >> 13 & (1 << rank):
+                hand.append(suit * 13 + rank)
+            if pair & (1 << rank):
+                dead.append(suit * 13 + rank)
+    return tuple(hand), tuple(dead)
+
+
+def encode_batch(cards):
+    """Kodowanie tablicy (N, 5) indeksów kart - zwraca tablicę (N,) kodów jak `encode`."""
+    if np is None:
+        raise ImportError("NumPy is required for batch canonicalization")
+    cards = np.asarray(cards, dtype=np.intp)
+    if cards.ndim != 2 or cards.shape[1] != 5:
+        raise ValueError("Expected an (N, 5) array of card indices")
+    count = len(cards)
+    # Maski rang dla każdego koloru, posortowane malejąco w obrębie wiersza
+    masks = np.zeros((count, 4), dtype=np.int32)
+    rows = np.arange(count)
+    for column in cards.T:
+        masks[rows, column // 13] |= 1 << (column % 13)
+    masks = -np.sort(-masks, axis=1)
+    # Rozwinięcie masek w 52 bity - niezerowe pozycje to posortowane indeksy kart reprezentanta
+    bits = (masks[:, :, None] >> np.arange(13)) & 1
+    canonical = np.nonzero(bits.reshape(count, 52))[1].reshape(count, 5)
+    codes = np.zeros(count, dtype=np.int64)
+    for i in range(5):
+        codes += np.array(COLEX[i], dtype=np.int64)[canonical[:, i]]
+    return codes
+
+
+def decode_batch(codes):
+    """Odtwarzanie tablicy (N, 5) posortowanych indeksów kart z tablicy kodów."""
+    if np is None:
+        raise ImportError("NumPy is required for batch canonicalization")
+    codes = np.array(codes, dtype=np.int64)
+    cards = np.zeros((len(codes), 5), dtype=np.int8)
+    for k in range(5, 0, -1):
+        # Największa karta c spełniająca C(c, k) <= kod
+        table = np.array([comb(card, k) for card in range(52)], dtype=np.int64)
+        card = np.searchsorted(table, codes, side='right') - 1
+        cards[:, k - 1] = card
+        codes -= table[card]
+    return cards
@@ -0,0 +1,395 @@
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+from hand_evaluator import HandEvaluator
+from policies import ACTION_FOLD, ACTION_CALL, ACTION_RAISE
+from hand_table import DATA_DIR
+from rng import derive_seed, draw_master_seed
+
+try:
+    import numpy as np
+except ImportError:  # Trening wymaga NumPy; wczytanie pliku strategii działa bez niego
+    np = None
+
+
+DEFAULT_STRATEGY_PATH = os.path.join(DATA_DIR, 'cfr_strategy.bin')
+STRATEGY_VERSION = 1
+ACTION_COUNT = 3
+
+# Nagłówek pliku strategii: magia, wersja, liczba koszyków, limit podbić, CRC32 danych
+_HEADER = struct.Struct('<8sIIII')
+_MAGIC = b'FCDSTRAT'
+_SCALE = 0xFFFF
+
+
+class StrategyFormatError(Exception):
+    """Błąd nieprawidłowego lub uszkodzonego pliku strategii"""
+    pass
+
+
+def node_count(cap: int) -> int:
+    """Liczba węzłów decyzyjnych gry abstrakcyjnej przy limicie `cap` podbić na rundę."""
+    return (cap + 1) * (cap + 2)
+
+
+def node_index(cap: int, betting_round: int, prior_raises: int, raises: int) -> int:
+    """Numer węzła: runda zakładów, podbicia z rundy przed wymianą (tylko runda 1) i podbicia w rundzie."""
+    if betting_round == 0:
+        return raises
+    return (cap + 1) * (1 + prior_raises) + raises
+
+
+@lru_cache(maxsize=None)
+def build_tree(cap: int):
+    """Drzewo zakładów abstrakcyjnej gry dwóch graczy (kwoty w big blindach).
+
+    Gracz 0 to small blind - zaczyna obie rundy, tak jak w silniku przy dwóch
+    graczach. Podbicie ma stałą wielkość big blinda, jak podbicia botów silnika.
+    Sprawdzenie wyrównuje stawki i kończy rundę (silnik kończy licytację, gdy
+    stawki są równe), a check otwierający rundę po wymianie prowadzi od razu do
+    porównania rąk. Węzeł decyzyjny: ('decision', numer, runda, gracz, dzieci,
+    maska dozwolonych akcji); liście: ('fold', gracz, wkład) i ('showdown', wkład).
+    """
+    def decision(betting_round, prior_raises, raises, contributions):
+        player = raises % 2
+        facing = betting_round == 0 or raises > 0
+        matched = contributions[1 - player]
+        children = []
+        if facing:
+            children.append((ACTION_FOLD, ('fold', player, contributions[player])))
+        if betting_round == 0:
+            children.append((ACTION_CALL, decision(1, raises, 0, (matched, matched))))
+        else:
+            children.append((ACTION_CALL, ('showdown', matched)))
+        if raises < cap:
+            raised = list(contributions)
+            raised[player] = matched + 1
+            children.append((ACTION_RAISE, decision(betting_round, prior_raises, raises + 1, tuple(raised))))
+        legal = np.zeros(ACTION_COUNT)
+        for action, _ in children:
+            legal[action] = 1
+        return ('decision', node_index(cap, betting_round, prior_raises, raises), betting_round, player,
+                children, legal)
+
+    return decision(0, 0, 0, (0.5, 1.0))
+
+
+def legal_actions(cap: int):
+    """Maska (węzły, akcje) dozwolonych akcji."""
+    legal = np.zeros((node_count(cap), ACTION_COUNT))
+    stack = [build_tree(cap)]
+    while stack:
+        node = stack.pop()
+        if node[0] == 'decision':
+            legal[node[1]] = node[5]
+            stack.extend(child for _, child in node[4])
+    return legal
+
+
+def _discard_mask(hands, categories):
+    """Karty do wymiany według prostej reguły (przybliżenie solvera wymiany botów, najwyżej 3 karty).
+
+    Strit i lepsze układy zostają bez wymiany, z pary, dwóch par i trójki
+    wymieniane są karty spoza układu, a bez układu - trzy najniższe karty.
+    """
+    ranks = hands % 13
+    multiplicity = (ranks[:, :, None] == ranks[:, None, :]).sum(axis=2)
+    discard = (multiplicity == 1) & (categories[:, None] < 4)
+    high_card = categories == 0
+    if high_card.any():
+        lowest = np.argsort(ranks[high_card], axis=1)[:, :3]
+        rows = np.zeros((int(high_card.sum()), 5), dtype=bool)
+        np.put_along_axis(rows, lowest, True, axis=1)
+        discard[high_card] = rows
+    return discard
+
+
+def sample_keys(rng, count: int):
+    """Losowe rozdania dwóch graczy z wymianą: klucze rąk przed i po wymianie (4 tablice)."""
+    decks = rng.random((count, 52)).argsort(axis=1).astype(np.int8)
+    hands = [decks[:, 0:10:2], decks[:, 1:10:2]]
+    pool = decks[:, 10:]
+    offset = np.zeros(count, dtype=np.intp)
+    rows = np.arange(count)[:, None]
+    pre, post = [], []
+    for hand in hands:
+        keys, categories = HandEvaluator.rank_batch(hand)
+        discard = _discard_mask(hand, categories)
+        # Kolejne wymieniane karty dostają kolejne karty z talii
+        position = offset[:, None] + np.cumsum(discard, axis=1) - 1
+        drawn = pool[rows, np.clip(position, 0, pool.shape[1] - 1)]
+        pre.append(keys)
+        post.append(HandEvaluator.rank_batch(np.where(discard, drawn, hand))[0])
+        offset += discard.sum(axis=1)
+    return pre[0], pre[1], post[0], post[1]
+
+
+def bucket_edges(rng, buckets: int, count: int = 200000):
+    """Granice koszyków siły ręki: kwantyle kluczy przed wymianą i po wymianie."""
+    pre0, pre1, post0, post1 = sample_keys(rng, count)
+    quantiles = np.arange(1, buckets) / buckets
+    edges_pre = np.quantile(np.concatenate([pre0, pre1]), quantiles).astype(np.uint32)
+    edges_post = np.quantile(np.concatenate([post0, post1]), quantiles).astype(np.uint32)
+    return edges_pre, edges_post
+
+
+def sample_chance(rng, count: int, edges_pre, edges_post):
+    """Próbkowany rozkład szansy: łączne prawdopodobieństwa stanów prywatnych i wynik porównania rąk.
+
+    Stan prywatny gracza to para (koszyk przed wymianą, koszyk po wymianie).
+    Zwraca macierze (S, S): P - prawdopodobieństwo pary stanów, W - to samo
+    prawdopodobieństwo ze znakiem wyniku dla gracza 0 (wygrana +1, remis 0).
+    """
+    buckets = len(edges_pre) + 1
+    states = buckets * buckets
+    pre0, pre1, post0, post1 = sample_keys(rng, count)
+    s0 = np.searchsorted(edges_pre, pre0, side='right') * buckets + np.searchsorted(edges_post, post0, side='right')
+    s1 = np.searchsorted(edges_pre, pre1, side='right') * buckets + np.searchsorted(edges_post, post1, side='right')
+    cells = s0 * states + s1
+    probability = np.bincount(cells, minlength=states * states) / count
+    outcome = np.bincount(cells, weights=np.sign(post0.astype(np.int64) - post1), minlength=states * states) / count
+    return probability.reshape(states, states), outcome.reshape(states, states)
+
+
+def current_strategy(regrets, legal):
+    """Dopasowanie do żalu (regret matching): strategia z dodatnich żalów, jednostajna przy ich braku."""
+    legal = legal[:, None, :]
+    positive = np.maximum(regrets, 0) * legal
+    total = positive.sum(axis=-1, keepdims=True)
+    uniform = legal / legal.sum(axis=-1, keepdims=True)
+    return np.where(total > 0, positive / np.where(total > 0, total, 1), uniform)
+
+
+def average_strategy(strategy_sum, legal):
+    """Średnia strategia z sum ważonych zasięgiem (jednostajna w nieodwiedzonych stanach)."""
+    legal = legal[:, None, :]
+    total = strategy_sum.sum(axis=-1, keepdims=True)
+    uniform = legal / legal.sum(axis=-1, keepdims=True)
+    return np.where(total > 0, strategy_sum / np.where(total > 0, total, 1), uniform)
+
+
+def _walk(node, reach0, reach1, chance, strategy, regret_delta, strategy_delta, weight, buckets):
+    """Wektorowe przejście drzewa: wartości kontrfaktyczne obu graczy dla wszystkich stanów prywatnych naraz."""
+    kind = node[0]
+    probability, outcome = chance
+    if kind == 'fold':
+        _, folder, amount = node
+        value = amount if folder == 1 else -amount
+        return value * (probability @ reach1), -value * (probability.T @ reach0)
+    if kind == 'showdown':
+        amount = node[1]
+        return amount * (outcome @ reach1), -amount * (outcome.T @ reach0)
+
+    _, index, betting_round, player, children, legal = node
+    # Przed wymianą gracz zna tylko koszyk przed wymianą, po wymianie - tylko koszyk po wymianie
+    if betting_round == 0:
+        sigma = np.repeat(strategy[index], buckets, axis=0)
+    else:
+        sigma = np.tile(strategy[index], (buckets, 1))
+    values = np.zeros_like(sigma)
+    other = 0
+    for action, child in children:
+        if player == 0:
+            mine, theirs = _walk(child, reach0 * sigma[:, action], reach1, chance, strategy,
+                                 regret_delta, strategy_delta, weight, buckets)
+        else:
+            theirs, mine = _walk(child, reach0, reach1 * sigma[:, action], chance, strategy,
+                                 regret_delta, strategy_delta, weight, buckets)
+        values[:, action] = mine
+        other = other + theirs
+    value = (values * sigma).sum(axis=1)
+    regrets = (values - value[:, None]) * legal
+    reach = reach0 if player == 0 else reach1
+    weighted = reach[:, None] * sigma
+    axis = 1 if betting_round == 0 else 0
+    regret_delta[index] += regrets.reshape(buckets, buckets, ACTION_COUNT).sum(axis=axis)
+    strategy_delta[index] += weight * weighted.reshape(buckets, buckets, ACTION_COUNT).sum(axis=axis)
+    return (value, other) if player == 0 else (other, value)
+
+
+def train_iterations(regrets, first_iteration: int, iterations: int, batch_size: int, seed: int,
+                     edges_pre, edges_post, cap: int):
+    """Iteracje CFR+ z próbkowaniem szansy (MCCFR) w jednym procesie.
+
+    Każda iteracja losuje `batch_size` rozdań, przechodzi drzewo raz dla obu
+    graczy (aktualizacja jednoczesna), obcina skumulowany żal do zera (CFR+),
+    a średnią strategię waży numerem iteracji. Zwraca nowe żale i przyrost sum strategii.
+    """
+    rng = np.random.default_rng(seed)
+    buckets = len(edges_pre) + 1
+    states = buckets * buckets
+    tree = build_tree(cap)
+    legal = legal_actions(cap)
+    regrets = regrets.copy()
+    strategy_sum = np.zeros_like(regrets)
+    ones = np.ones(states)
+    for t in range(first_iteration, first_iteration + iterations):
+        chance = sample_chance(rng, batch_size, edges_pre, edges_post)
+        regret_delta = np.zeros_like(regrets)
+        _walk(tree, ones, ones, chance, current_strategy(regrets, legal), regret_delta, strategy_sum,
+              t + 1, buckets)
+        regrets = np.maximum(regrets + regret_delta, 0)
+    return regrets, strategy_sum
+
+
+def save_checkpoint(path: str, regrets, strategy_sum, edges_pre, edges_post, iterations: int, cap: int):
+    """Zapis stanu treningu (żale, sumy strategii, koszyki, licznik iteracji)."""
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    # Zapis do pliku tymczasowego i podmiana - przerwany zapis nie niszczy poprzedniego punktu kontrolnego
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, regrets=regrets, strategy_sum=strategy_sum, edges_pre=edges_pre,
+             edges_post=edges_post, state=np.array([STRATEGY_VERSION, iterations, cap]))
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str) -> dict:
+    """Odczyt punktu kontrolnego zapisanego przez save_checkpoint."""
+    with np.load(path) as data:
+        version, iterations, cap = (int(value) for value in data['state'])
+        if version != STRATEGY_VERSION:
+            raise StrategyFormatError(f"Unsupported checkpoint version {version} in {path}")
+        return {'regrets': data['regrets'], 'strategy_sum': data['strategy_sum'],
+                'edges_pre': data['edges_pre'], 'edges_post': data['edges_post'],
+                'iterations': iterations, 'cap': cap}
+
+
+def write_strategy(path: str, strategy, edges_pre, edges_post, cap: int):
+    """Zapis zwartego pliku strategii: granice koszyków i progi skumulowanych prawdopodobieństw (uint16)."""
+    buckets = len(edges_pre) + 1
+    thresholds = np.rint(np.cumsum(strategy, axis=-1) * _SCALE).astype('<u2')
+    thresholds[..., -1] = _SCALE
+    payload = (np.asarray(edges_pre, dtype='<u4').tobytes() + np.asarray(edges_post, dtype='<u4').tobytes()
+               + thresholds.tobytes())
+    header = _HEADER.pack(_MAGIC, STRATEGY_VERSION, buckets, cap, zlib.crc32(payload))
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def load_strategy(path: str = DEFAULT_STRATEGY_PATH) -> dict:
+    """Wczytanie pliku strategii do płaskich tablic Pythona (odczyt akcji bez NumPy)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise StrategyFormatError(f"Not a strategy file: {path}")
+    magic, version, buckets, cap, checksum = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != STRATEGY_VERSION:
+        raise StrategyFormatError(f"Not a strategy file (or unsupported version): {path}")
+    payload = data[_HEADER.size:]
+    if zlib.crc32(payload) != checksum:
+        raise StrategyFormatError(f"Corrupted strategy file: {path}")
+    edges = array('I')
+    edges.frombytes(payload[:8 * (buckets - 1)])
+    thresholds = array('H')
+    thresholds.frombytes(payload[8 * (buckets - 1):])
+    if sys.byteorder == 'big':
+        edges.byteswap()
+        thresholds.byteswap()
+    if len(thresholds) != node_count(cap) * buckets * ACTION_COUNT:
+        raise StrategyFormatError(f"Corrupted strategy file: {path}")
+    return {'buckets': buckets, 'cap': cap, 'edges_pre': list(edges[:buckets - 1]),
+            'edges_post': list(edges[buckets - 1:]), 'thresholds': thresholds}
+
+
+def lookup_action(strategy: dict, betting_round: int, prior_raises: int, raises: int, key: int,
+                  uniform: float) -> int:
+    """Akcja (ACTION_*) ze strategii dla stanu gry i klucza siły ręki; `uniform` to liczba z [0, 1)."""
+    cap = strategy['cap']
+    edges = strategy['edges_pre'] if betting_round == 0 else strategy['edges_post']
+    node = node_index(cap, betting_round, min(prior_raises, cap), min(raises, cap))
+    start = (node * strategy['buckets'] + bisect_right(edges, key)) * ACTION_COUNT
+    thresholds = strategy['thresholds']
+    draw = uniform * _SCALE
+    if draw < thresholds[start]:
+        return ACTION_FOLD
+    if draw < thresholds[start + 1]:
+        return ACTION_CALL
+    return ACTION_RAISE
+
+
+def train(output: str = DEFAULT_STRATEGY_PATH, iterations: int = 2000, workers: Optional[int] = 1,
+          batch_size: int = 20000, seed: Optional[int] = None, buckets: int = 10, cap: int = 3,
+          epoch_iterations: int = 100, checkpoint: Optional[str] = None, resume: bool = False,
+          log=print) -> dict:
+    """Trening strategii na wielu procesach z punktami kontrolnymi.
+
+    W każdej epoce każdy proces wykonuje `epoch_iterations` iteracji od
+    wspólnych żali z własnym ziarnem; żale procesów są uśredniane, a sumy
+    strategii dodawane. Po epoce zapisywany jest punkt kontrolny (z `resume`
+    trening jest z niego wznawiany) i plik strategii.
+    """
+    if np is None:
+        raise ImportError("NumPy is required for CFR training")
+    if buckets < 2 or cap < 1:
+        raise ValueError("Need at least 2 buckets and a raise cap of at least 1")
+    workers = workers or os.cpu_count() or 1
+    if seed is None:
+        # Wszystkie ziarna epok wyprowadzane z jednego losowego ziarna głównego
+        seed = draw_master_seed()
+        log(f"Seed: {seed} (pass --seed {seed} to repeat this run)")
+    checkpoint = checkpoint or f"{os.path.splitext(output)[0]}.ckpt.npz"
+    legal = legal_actions(cap)
+    if resume and os.path.exists(checkpoint):
+        state = load_checkpoint(checkpoint)
+        if state['cap'] != cap or len(state['edges_pre']) + 1 != buckets:
+            raise ValueError(f"Checkpoint {checkpoint} was trained with {len(state['edges_pre']) + 1} buckets "
+                             f"and raise cap {state['cap']}")
+        regrets, strategy_sum = state['regrets'], state['strategy_sum']
+        edges_pre, edges_post, done = state['edges_pre'], state['edges_post'], state['iterations']
+        log(f"Resuming from {checkpoint} at iteration {done}")
+    else:
+        edges_pre, edges_post = bucket_edges(np.random.default_rng(derive_seed(seed, 0)), buckets)
+        regrets = np.zeros((node_count(cap), buckets, ACTION_COUNT))
+        strategy_sum = np.zeros_like(regrets)
+        done = 0
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    start = time.perf_counter()
+    try:
+        while done < iterations:
+            size = min(epoch_iterations, -(-(iterations - done) // workers))
+            jobs = [(regrets, done, size, batch_size, derive_seed(seed, 1 + done * workers + i),
+                     edges_pre, edges_post, cap) for i in range(workers)]
+            if executor:
+                results = list(executor.map(train_iterations, *zip(*jobs)))
+            else:
+                results = [train_iterations(*job) for job in jobs]
+            regrets = sum(result[0] for result in results) / len(results)
+            strategy_sum = strategy_sum + sum(result[1] for result in results)
+            done += size * workers
+            save_checkpoint(checkpoint, regrets, strategy_sum, edges_pre, edges_post, done, cap)
+            write_strategy(output, average_strategy(strategy_sum, legal), edges_pre, edges_post, cap)
+            elapsed = time.perf_counter() - start
+            log(f"Iteration {done}/{iterations}: average positive regret "
+                f"{np.maximum(regrets, 0).sum() / done:.5f}, {elapsed:.1f}s")
+    finally:
+        if executor:
+            executor.shutdown()
+    return {'iterations': done, 'strategy': average_strategy(strategy_sum, legal),
+            'edges_pre': edges_pre, 'edges_post': edges_post}
+
+
+def run(output: str, iterations: int, workers: Optional[int], batch_size: int, seed: Optional[int],
+        buckets: int, cap: int, epoch_iterations: int, checkpoint: Optional[str], resume: bool) -> int:
+    """Trening z linii poleceń i wypisanie strategii otwarcia small blinda."""
+    result = train(output, iterations, workers, batch_size, seed, buckets, cap, epoch_iterations,
+                   checkpoint, resume)
+    print(f"Wrote strategy to {output} ({os.path.getsize(output)} bytes)")
+    print("Small blind before the draw (fold/call/raise) by hand-strength bucket:")
+    for bucket, row in enumerate(result['strategy'][node_index(cap, 0, 0, 0)]):
+        print(f"  {bucket:>2}: " + " ".join(f"{p:.2f}" for p in row))
+    return 0
@@ -0,0 +1,88 @@
+from typing import Iterable, Optional
+
+from rng import NumpyRandom
+
+try:
+    import numpy as np
+except ImportError:  # Pliki permutacji wymagają NumPy
+    np = None
+
+
+class DeckSourceExhausted(Exception):
+    """Błąd wyczerpania źródła talii"""
+    pass
+
+
+class DeckSource:
+    """Źródło kolejnych ułożeń talii dla `GameEngine.play_round`.
+
+    Ułożenie to 52 indeksy kart (lub karty) od spodu do wierzchu talii -
+    ostatni element jest rozdawany jako pierwszy.
+    """
+
+    def next_order(self):
+        raise NotImplementedError
+
+
+class IterableSource(DeckSource):
+    """Ułożenia pobierane z dowolnego iterowalnego obiektu lub generatora."""
+
+    def __init__(self, orders: Iterable):
+        self._orders = iter(orders)
+
+    def next_order(self):
+        try:
+            return next(self._orders)
+        except StopIteration:
+            raise DeckSourceExhausted("No more decks in source")
+
+
+class ScriptedSource(DeckSource):
+    """Stała lista ułożeń (np. do odtwarzania rozdań), opcjonalnie powtarzana w kółko."""
+
+    def __init__(self, orders, repeat: bool = False):
+        self.orders = list(orders)
+        self.repeat = repeat
+        self.position = 0
+
+    def next_order(self):
+        if self.position >= len(self.orders):
+            if not self.repeat or not self.orders:
+                raise DeckSourceExhausted("No more decks in script")
+            self.position = 0
+        order = self.orders[self.position]
+        self.position += 1
+        return order
+
+
+class PermutationFileSource(DeckSource):
+    """Ułożenia z pliku .npy z tablicą (M, 52) permutacji, mapowanego do pamięci."""
+
+    def __init__(self, path: str, start: int = 0, repeat: bool = True):
+        if np is None:
+            raise ImportError("NumPy is required for permutation files")
+        self.permutations = np.load(path, mmap_mode='r')
+        if self.permutations.ndim != 2 or self.permutations.shape[1] != 52:
+            raise ValueError(f"Expected an (M, 52) permutation array in {path}")
+        self.repeat = repeat
+        self.position = start % len(self.permutations) if repeat else start
+
+    def next_order(self):
+        if self.position >= len(self.permutations):
+            if not self.repeat:
+                raise DeckSourceExhausted("No more decks in file")
+            self.position = 0
+        order = self.permutations[self.position].tolist()
+        self.position += 1
+        return order
+
+
+def write_permutation_file(path: str, count: int, seed: Optional[int] = None) -> str:
+    """Wygenerowanie hurtem `count` przetasowanych talii i zapis do pliku .npy."""
+    if np is None:
+        raise ImportError("NumPy is required for permutation files")
+    if not path.endswith('.npy'):
+        path += '.npy'
+    permutations = NumpyRandom(seed).permutations(52, count).astype(np.uint8)
+    np.save(path, permutations)
+    return path
@@ -0,0 +1,267 @@
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+from typing import List, Tuple
+
+from poker import Card
+from canonical import canonical_map, encode_batch, decode_batch
+from hand_evaluator import HandEvaluator, CARD_CODES, CATEGORY_SHIFT, TABLES_CHECKSUM, evaluate_codes
+from hand_table import COLEX, DATA_DIR, StaleTableError, colex_index
+
+try:
+    import numpy as np
+except ImportError:  # Bez NumPy wyliczenie odbywa się w czystym Pythonie
+    np = None
+
+
+ALL_DISCARDS = [discard for count in range(6) for discard in combinations(range(5), count)]
+
+# Plik z najlepszą wymianą (najwyżej TABLE_MAX_DISCARD kart) dla każdej klasy kanonicznej
+DEFAULT_DISCARD_TABLE_PATH = os.path.join(DATA_DIR, 'best_discards.bin')
+DISCARD_TABLE_VERSION = 1
+TABLE_MAX_DISCARD = 3
+CANONICAL_CLASSES = 134459
+
+# Nagłówek: magia, wersja, liczba klas, suma kontrolna tablic oceny, CRC32 danych
+_HEADER = struct.Struct('<8sIIII')
+_MAGIC = b'FCDDISCD'
+
+_discard_table = None
+_table_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _combination_indices(n, k):
+    """Tablica (C(n, k), k) wszystkich kombinacji indeksów 0..n-1."""
+    return np.fromiter((i for combo in combinations(range(n), k) for i in combo),
+                       dtype=np.int8, count=comb(n, k) * k).reshape(-1, k)
+
+
+def _enumerate_python(kept, pool):
+    """Rozkład kategorii i suma kluczy po wszystkich dobraniach - czysty Python."""
+    counts = [0] * 10
+    key_sum = 0
+    kept_codes = [CARD_CODES[i] for i in kept]
+    pool_codes = [CARD_CODES[i] for i in pool]
+    for drawn in combinations(pool_codes, 5 - len(kept)):
+        key = evaluate_codes(*kept_codes, *drawn)
+        counts[key >> CATEGORY_SHIFT] += 1
+        key_sum += key
+    return counts, key_sum
+
+
+def _enumerate_numpy(kept, pool):
+    """Rozkład kategorii i suma kluczy po wszystkich dobraniach - wsadowo w NumPy."""
+    draws = 5 - len(kept)
+    if draws == 0:
+        key = HandEvaluator.evaluate_indices(kept)
+        counts = [0] * 10
+        counts[key >> CATEGORY_SHIFT] = 1
+        return counts, key
+    drawn = np.asarray(pool, dtype=np.int8)[_combination_indices(len(pool), draws)]
+    cards = np.empty((len(drawn), 5), dtype=np.int8)
+    cards[:, :len(kept)] = kept
+    cards[:, len(kept):] = drawn
+    keys, categories = HandEvaluator.rank_batch(cards)
+    return np.bincount(categories, minlength=10).tolist(), int(keys.sum(dtype=np.int64))
+
+
+@lru_cache(maxsize=4096)
+def _solve(cards: Tuple[int, ...], max_discard: int):
+    """Dokładne wyniki dla każdego zbioru zatrzymanych kart (klucz: kanoniczna ręka)."""
+    pool = [i for i in range(52) if i not in cards]
+    enumerate_draws = _enumerate_numpy if np is not None else _enumerate_python
+    results = {}
+    for discard in ALL_DISCARDS:
+        if len(discard) > max_discard:
+            continue
+        kept = tuple(card for i, card in enumerate(cards) if i not in discard)
+        counts, key_sum = enumerate_draws(list(kept), pool)
+        results[kept] = (tuple(counts), key_sum)
+    return results
+
+
+def solve_discards(hand: List[Card], max_discard: int = 5) -> List[dict]:
+    """Dokładny rozkład układów i oczekiwana siła ręki dla każdego zbioru kart do wymiany.
+
+    Wymienione karty nie wracają do talii; dobierane są wszystkie kombinacje
+    z pozostałych 47 kart. Wyniki są zapamiętywane dla reprezentanta ręki
+    z dokładnością do permutacji kolorów.
+    """
+    if len(hand) != 5:
+        raise ValueError("Hand must contain exactly 5 cards")
+    indices = canonical_map(hand)
+    results = _solve(tuple(sorted(indices)), max_discard)
+    solutions = []
+    for discard in ALL_DISCARDS:
+        if len(discard) > max_discard:
+            continue
+        kept = tuple(sorted(card for i, card in enumerate(indices) if i not in discard))
+        counts, key_sum = results[kept]
+        total = sum(counts)
+        solutions.append({
+            'discard': list(discard),
+            'distribution': [count / total for count in counts],
+            'expected_strength': key_sum / total,
+        })
+    return solutions
+
+
+@lru_cache(maxsize=262144)
+def _best_kept(cards: Tuple[int, ...], max_discard: int) -> Tuple[int, ...]:
+    """Najlepszy zbiór zatrzymanych kart dla kanonicznej ręki (mały wpis - mieści wszystkie klasy rąk)."""
+    results = _solve(cards, max_discard)
+    return max(results, key=lambda kept: results[kept][1] / sum(results[kept][0]))
+
+
+def best_discard(hand: List[Card], max_discard: int = 5) -> List[int]:
+    """Zwracanie indeksów kart, których wymiana daje najwyższą oczekiwaną siłę ręki.
+
+    Dla `max_discard` równego TABLE_MAX_DISCARD (wymiana botów) wynik jest
+    odczytywany z pliku wyliczonego raz dla wszystkich klas kanonicznych.
+    Gdy tablicę wczytuje (lub generuje) właśnie inny wątek, wynik daje solver,
+    zamiast czekać na koniec wczytywania.
+    """
+    if len(hand) != 5:
+        raise ValueError("Hand must contain exactly 5 cards")
+    indices = canonical_map(hand)
+    cards = tuple(sorted(indices))
+    if max_discard == TABLE_MAX_DISCARD and np is not None:
+        table = _discard_table
+        if table is None and not _table_lock.locked():
+            table = load_discard_table()
+        if table is not None:
+            mask = table.lookup(cards)
+            discarded = [card for i, card in enumerate(cards) if mask >> i & 1]
+            return [i for i, card in enumerate(indices) if card in discarded]
+    kept = _best_kept(cards, max_discard)
+    return [i for i, card in enumerate(indices) if card not in kept]
+
+
+def _compute_discards():
+    """Najlepsza wymiana dla każdej klasy kanonicznej - zwraca (kody klas, maski wymienianych pozycji).
+
+    Suma kluczy wszystkich rąk zawierających dany podzbiór kart jest liczona
+    raz dla wszystkich podzbiorów (do 5 kart). Suma po dobraniach do
+    zatrzymanych kart K z pominięciem wymienionych D wynika z włączeń
+    i wyłączeń: suma po J ⊆ D wartości (-1)^|J| * S(K ∪ J). Wynik jest taki
+    sam jak z pełnego wyliczenia w `_solve` (te same sumy całkowite, ten sam
+    wybór przy remisie: pierwszy zbiór w kolejności ALL_DISCARDS).
+    """
+    hands = np.fromiter((card for hand in combinations(range(52), 5) for card in hand),
+                        dtype=np.int8, count=comb(52, 5) * 5).reshape(-1, 5)
+    keys = HandEvaluator.rank_batch(hands)[0].astype(np.float64)
+    colex = [np.array(row, dtype=np.intp) for row in COLEX]
+    subset_sums = {0: np.array([keys.sum()])}
+    for size in range(1, 6):
+        totals = np.zeros(comb(52, size))
+        for positions in combinations(range(5), size):
+            index = sum(colex[i][hands[:, position]] for i, position in enumerate(positions))
+            totals += np.bincount(index, weights=keys, minlength=len(totals))
+        subset_sums[size] = totals
+    codes = np.unique(encode_batch(hands))
+    del hands, keys
+
+    cards = decode_batch(codes).astype(np.intp)
+    # Suma kluczy rąk zawierających podzbiór kart klasy o masce pozycji `mask`
+    by_mask = []
+    for mask in range(32):
+        positions = [i for i in range(5) if mask >> i & 1]
+        index = sum(colex[i][cards[:, position]] for i, position in enumerate(positions))
+        by_mask.append(subset_sums[len(positions)][index if positions else np.zeros(len(codes), dtype=np.intp)])
+    expected = []
+    masks = []
+    for discard in ALL_DISCARDS:
+        if len(discard) > TABLE_MAX_DISCARD:
+            continue
+        discard_mask = sum(1 << i for i in discard)
+        kept_mask = 31 ^ discard_mask
+        total = np.zeros(len(codes))
+        for extra in range(discard_mask + 1):
+            if extra & discard_mask == extra:
+                sign = -1 if bin(extra).count('1') % 2 else 1
+                total += sign * by_mask[kept_mask | extra]
+        expected.append(total / comb(47, len(discard)))
+        masks.append(discard_mask)
+    best = np.argmax(np.array(expected), axis=0)
+    return codes.astype('<u4'), np.array(masks, dtype=np.uint8)[best]
+
+
+def generate_discard_table(path=DEFAULT_DISCARD_TABLE_PATH):
+    """Jednorazowe wygenerowanie pliku z najlepszą wymianą dla 134 459 klas kanonicznych."""
+    if np is None:
+        raise ImportError("NumPy is required to generate the discard table")
+    codes, masks = _compute_discards()
+    payload = codes.tobytes() + masks.tobytes()
+    header = _HEADER.pack(_MAGIC, DISCARD_TABLE_VERSION, len(codes), TABLES_CHECKSUM, zlib.crc32(payload))
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    # Zapis do pliku tymczasowego i podmiana - inne procesy nigdy nie widzą połowy pliku
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return path
+
+
+class DiscardTable:
+    """Najlepsze wymiany klas kanonicznych wczytane z pliku: posortowane kody klas i maski pozycji."""
+
+    def __init__(self, path=DEFAULT_DISCARD_TABLE_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) != _HEADER.size + 5 * CANONICAL_CLASSES:
+            raise StaleTableError(f"Unexpected discard table size: {path}")
+        magic, version, count, tables_checksum, crc = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != DISCARD_TABLE_VERSION or count != CANONICAL_CLASSES:
+            raise StaleTableError(f"Unsupported discard table version: {path}")
+        if tables_checksum != TABLES_CHECKSUM:
+            raise StaleTableError(f"Discard table built for a different evaluator: {path}")
+        payload = memoryview(data)[_HEADER.size:]
+        if zlib.crc32(payload) != crc:
+            raise StaleTableError(f"Discard table checksum mismatch: {path}")
+        self.codes = array('I')
+        self.codes.frombytes(payload[:4 * count])
+        if sys.byteorder == 'big':
+            self.codes.byteswap()
+        self.masks = bytes(payload[4 * count:])
+
+    def lookup(self, cards: Tuple[int, ...]) -> int:
+        """Maska pozycji do wymiany (bit i - i-ta karta) dla posortowanej kanonicznej ręki."""
+        code = colex_index(cards)
+        position = bisect_left(self.codes, code)
+        if position == len(self.codes) or self.codes[position] != code:
+            raise ValueError("Hand is not a canonical representative")
+        return self.masks[position]
+
+
+def discard_table_ready() -> bool:
+    """Czy tablica wymian jest już wczytana (sprawdzenie bez czekania na blokadę)."""
+    return _discard_table is not None
+
+
+def load_discard_table(path=DEFAULT_DISCARD_TABLE_PATH) -> DiscardTable:
+    """Wczytanie tablicy wymian; brakujący lub nieaktualny plik jest generowany ponownie."""
+    global _discard_table
+    # Jedno wczytanie naraz - np. GUI wczytuje tablicę w tle, gdy silnik może już jej potrzebować
+    with _table_lock:
+        if path == DEFAULT_DISCARD_TABLE_PATH and _discard_table is not None:
+            return _discard_table
+        try:
+            table = DiscardTable(path)
+        except (FileNotFoundError, StaleTableError):
+            generate_discard_table(path)
+            table = DiscardTable(path)
+        if path == DEFAULT_DISCARD_TABLE_PATH:
+            _discard_table = table
+        return table
@@ -0,0 +1,156 @@
+import atexit
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import List, Optional
+
+from poker import Card, Deck
+from hand_evaluator import HandEvaluator
+from canonical import encode_with_dead, decode_with_dead
+
+
+_executor = None
+_executor_workers = 0
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """Wspólna pula procesów modułu - tworzona przy pierwszym użyciu i zamykana przy wyjściu.
+
+    Start procesów kosztuje więcej niż typowa symulacja, więc pula jest
+    utrzymywana między wywołaniami; większa liczba `workers` tworzy ją od nowa.
+    """
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers < workers:
+        if _executor is not None:
+            _executor.shutdown()
+        else:
+            atexit.register(_shutdown_executor)
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+    return _executor
+
+
+def _shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def _simulate_batch(kept, pool, draws, num_opponents, samples, seed):
+    """Symulowanie partii rozdań w jednym procesie - zwraca sumy potrzebne do estymacji."""
+    rng = random.Random(seed)
+    evaluate = HandEvaluator.evaluate_indices
+    needed = draws + 5 * num_opponents
+    wins = ties = 0
+    share_sum = share_sq_sum = 0.0
+    for _ in range(samples):
+        cards = rng.sample(pool, needed)
+        hero = evaluate(kept + cards[:draws])
+        best_opponent = 0
+        tied = 0
+        for start in range(draws, needed, 5):
+            key = evaluate(cards[start:start + 5])
+            if key > best_opponent:
+                best_opponent = key
+                tied = 1 if key == hero else 0
+            elif key == best_opponent and key == hero:
+                tied += 1
+        if hero > best_opponent:
+            wins += 1
+            share = 1.0
+        elif hero == best_opponent:
+            ties += 1
+            share = 1.0 / (tied + 1)
+        else:
+            continue
+        share_sum += share
+        share_sq_sum += share * share
+    return samples, wins, ties, share_sum, share_sq_sum
+
+
+def estimate_equity(hand: List[Card], discard: List[int] = (), num_opponents: int = 1,
+                    samples: int = 100000, target_stderr: Optional[float] = None,
+                    workers: Optional[int] = None, batch_size: int = 5000,
+                    seed: Optional[int] = None) -> dict:
+    """Szacowanie szansy wygranej ręki po wymianie wskazanych kart przeciwko N przeciwnikom.
+
+    Przeciwnicy dostają losowe ręce z pozostałej talii. Symulacja kończy się po
+    `samples` rozdaniach lub wcześniej, gdy błąd standardowy spadnie do `target_stderr`.
+    """
+    if len(hand) != 5:
+        raise ValueError("Hand must contain exactly 5 cards")
+    if not all(0 <= idx <= 4 for idx in discard):
+        raise IndexError("Card index must be between 0 and 4")
+    if len(set(discard)) != len(discard):
+        raise ValueError("Duplicate discard index")
+    if len(discard) + 5 * (num_opponents + 1) > 52:
+        raise ValueError("Not enough cards for that many opponents")
+    if samples <= 0 or batch_size <= 0:
+        raise ValueError("Samples and batch size must be positive")
+    if workers is not None and workers <= 0:
+        raise ValueError("Workers must be positive")
+
+    kept = [card.index for i, card in enumerate(hand) if i not in discard]
+    discarded = [hand[i].index for i in discard]
+    # Ręce różniące się tylko permutacją kolorów mają ten sam klucz i ten sam wynik
+    key = encode_with_dead(kept, discarded)
+    workers = workers or os.cpu_count() or 1
+    estimate = _estimate if seed is not None else _estimate.__wrapped__
+    return dict(estimate(key, num_opponents, samples, target_stderr, workers, batch_size, seed))
+
+
+@lru_cache(maxsize=4096)
+def _estimate(key, num_opponents, samples, target_stderr, workers, batch_size, seed):
+    """Symulacja dla kanonicznego reprezentanta (zapamiętywana, gdy podano ziarno)."""
+    kept, dead = decode_with_dead(key)
+    kept = list(kept)
+    draws = len(dead)
+    # Wymienione karty nie wracają do talii
+    dead = set(kept) | set(dead)
+    pool = [card.index for card in Deck().cards if card.index not in dead]
+    seeds = random.Random(seed)
+
+    totals = [0, 0, 0, 0.0, 0.0]
+    executor = _get_executor(workers) if workers > 1 else None
+    while totals[0] < samples:
+        # Jedna tura to po partii na proces; po każdej turze sprawdzana jest zbieżność
+        batches = []
+        remaining = samples - totals[0]
+        for _ in range(workers):
+            size = min(batch_size, remaining)
+            if size <= 0:
+                break
+            remaining -= size
+            batches.append((kept, pool, draws, num_opponents, size, seeds.getrandbits(64)))
+        if executor:
+            results = [executor.submit(_simulate_batch, *args) for args in batches]
+            results = [future.result() for future in results]
+        else:
+            results = [_simulate_batch(*args) for args in batches]
+        for result in results:
+            for i, value in enumerate(result):
+                totals[i] += value
+        if target_stderr is not None and _stderr(totals) <= target_stderr:
+            break
+
+    count, wins, ties, share_sum, _ = totals
+    return {
+        'equity': share_sum / count,
+        'win': wins / count,
+        'tie': ties / count,
+        'stderr': _stderr(totals),
+        'samples': count,
+    }
+
+
+def _stderr(totals) -> float:
+    """Błąd standardowy średniego udziału w puli."""
+    count, _, _, share_sum, share_sq_sum = totals
+    if count < 2:
+        return float('inf')
+    mean = share_sum / count
+    variance = max(0.0, share_sq_sum / count - mean * mean)
+    return math.sqrt(variance / (count - 1))
@@ -1,6 +1,10 @@
-from typing import List
+from typing import List, Optional
 from poker import Player, Deck, Card
 from hand_evaluator import HandEvaluator
+from discard_solver import best_discard
+from policies import Policy, RandomPolicy
+from deck_sources import DeckSource
+from profiler import PhaseProfiler
 import random
 
 
@@ -14,25 +18,145 @@ class InsufficientFundsError(Exception):
     pass
 
 
+def next_seat(mask: int, pos: int) -> int:
+    """Pierwsze miejsce po `pos` (cyklicznie, łącznie z `pos` na końcu) z ustawionym bitem maski; -1 dla pustej maski."""
+    higher = mask >> (pos + 1)
+    if higher:
+        return pos + (higher & -higher).bit_length()
+    if mask:
+        return (mask & -mask).bit_length() - 1
+    return -1
+
+
+class Decision:
+    """Decyzja, na którą czeka silnik: zakład ('bet') lub wymiana kart ('exchange') gracza.
+
+    Odpowiedzią na 'bet' jest akcja jak z prompt_bet (check/call/fold/'raise <kwota>'),
+    a na 'exchange' lista indeksów kart do wymiany. Przy `batch_bots` zakłady botów
+    są zwracane jako 'bot_bet' (odpowiedź jak dla 'bet').
+    """
+    __slots__ = ('kind', 'player', 'current_bet')
+
+    def __init__(self, kind: str, player: Player, current_bet: int = 0):
+        self.kind = kind
+        self.player = player
+        self.current_bet = current_bet
+
+    @property
+    def call_amount(self) -> int:
+        return max(0, self.current_bet - self.player.current_bet)
+
+    def __repr__(self):
+        return f"Decision({self.kind!r}, {self.player.name!r}, current_bet={self.current_bet})"
+
+
+class Stepper:
+    """Prowadzenie generatora kroków silnika bez blokowania.
+
+    `decision` to decyzja oczekująca na odpowiedź (None po zakończeniu), a `result`
+    to wartość zwrócona przez generator. Jeden wątek może w ten sposób prowadzić
+    dowolnie wiele stołów, wznawiając każdy przez `resume()`.
+    """
+
+    def __init__(self, steps):
+        self.steps = steps
+        self.decision = None
+        self.result = None
+        self.done = False
+        self._advance(None)
+
+    def _advance(self, answer):
+        try:
+            self.decision = self.steps.send(answer)
+        except StopIteration as stop:
+            self.decision = None
+            self.result = stop.value
+            self.done = True
+        return self.decision
+
+    def resume(self, answer) -> Optional[Decision]:
+        """Przekazanie odpowiedzi na bieżącą decyzję; zwraca następną decyzję lub None."""
+        if self.done:
+            raise InvalidActionError("Round is already finished")
+        return self._advance(answer)
+
+    def close(self) -> None:
+        """Porzucenie nieukończonych kroków (np. przy nowej grze)."""
+        self.steps.close()
+        self.decision = None
+        self.done = True
+
+
 class GameEngine:
     def __init__(self, players: List[Player], deck: Deck = None,
-                 small_blind: int = 25, big_blind: int = 50):
+                 small_blind: int = 25, big_blind: int = 50,
+                 human_policy: Policy = None, rng=None, seed: int = None,
+                 deck_source: DeckSource = None, profiler: PhaseProfiler = None,
+                 batch_bots: bool = False, recorder=None, bot_policy: Policy = None):
         self.players = players
+        # Zakłady botów zwracane z generatora rundy zamiast liczone na miejscu (decyzje wsadowe)
+        self.batch_bots = batch_bots
+        self.deck_source = deck_source
+        # Pomiar czasu faz rundy - bez profilera play_round nie mierzy niczego
+        self.profiler = profiler
+        # Zapis historii rozdań (HandHistoryWriter) - bez niego silnik nic nie zapisuje
+        self.recorder = recorder
+        self.human_policy = human_policy or RandomPolicy()
+        # Strategia wszystkich botów (np. StrategyPolicy) - bez niej boty grają wbudowaną logiką
+        self.bot_policy = bot_policy
+        # Własny strumień losowy stołu - to samo ziarno daje tę samą grę
+        self.rng = rng if rng is not None else random.Random(seed)
         self.deck = deck or Deck()
         self.small_blind = small_blind
         self.big_blind = big_blind
         self.pot = 0
         self.current_bet = 0
+        # Runda zakładów w rozdaniu: 0 przed wymianą kart, 1 po wymianie (dla strategii)
+        self.betting_round = 0
         self.dealer_position = 0
         self.game_over = False
 
     def play_round(self) -> None:
         """Przeprowadzanie jednej rundy gry."""
-        players_with_chips = [p for p in self.players if p.stack > 0]
-        if len(players_with_chips) < 2:
+        return self.run_steps(self.round_steps())
+
+    def round_steps(self):
+        """Runda jako generator: zwraca kolejne obiekty Decision i jest wznawiana przez send(odpowiedź).
+
+        Wynik rundy (jak z play_round) jest wartością zwracaną generatora.
+        """
+        profiler = self.profiler
+        if profiler is None:
+            return (yield from self._round_steps())
+        profiler.start_round()
+        try:
+            return (yield from self._round_steps())
+        finally:
+            profiler.end_round()
+
+    def run_steps(self, steps):
+        """Prowadzenie generatora kroków do końca; decyzje podejmują _get_human_action/_get_human_exchange."""
+        try:
+            decision = next(steps)
+            while True:
+                if decision.kind == 'bet':
+                    answer = self._get_human_action(decision.player, decision.current_bet)
+                elif decision.kind == 'bot_bet':
+                    answer = self._get_bot_action(decision.player, decision.current_bet)
+                else:
+                    answer = self._get_human_exchange()
+                decision = steps.send(answer)
+        except StopIteration as stop:
+            return stop.value
+
+    def _round_steps(self):
+        """Kolejne fazy rundy; przy włączonym profilerze po każdej fazie zapisywany jest jej czas."""
+        profiler = self.profiler
+        chips_mask = self._chips_mask()
+        if chips_mask & (chips_mask - 1) == 0:
             self.game_over = True
-            if len(players_with_chips) == 1:
-                winner = players_with_chips[0]
+            if chips_mask:
+                winner = self.players[chips_mask.bit_length() - 1]
                 total_chips = sum(p.stack for p in self.players) + self.pot
                 for player in self.players:
                     if player != winner:
@@ -43,131 +167,207 @@ class GameEngine:
             return None
         self.pot = 0
         self.current_bet = 0
-        self.deck = Deck()
+        if self.deck_source is not None:
+            self.deck.reset(order=self.deck_source.next_order())
+        else:
+            self.deck.reset(self.rng)
         for player in self.players:
             player.current_bet = 0
             player.clear_hand()
             player.is_active = player.stack > 0
-        for _ in range(3):
-            self.deck.shuffle()
+        self.betting_round = 0
+        if self.recorder is not None:
+            self.recorder.begin_hand(self)
+        if profiler is not None:
+            profiler.lap('shuffle')
         self._collect_blinds()
+        if profiler is not None:
+            profiler.lap('blinds')
         self._deal_cards()
-        self._betting_round()
+        if profiler is not None:
+            profiler.lap('deal')
+        yield from self._betting_steps()
+        if profiler is not None:
+            profiler.lap('betting')
         active_players = [p for p in self.players if p.is_active]
         if len(active_players) <= 1:
             final_pot = self.pot
             winners = [(active_players[0], "Win by fold", None, final_pot, self._get_all_player_hands(), False)]
-            active_players[0].stack += self.pot
+            self._award(active_players[0], self.pot)
             self.pot = 0
+            if profiler is not None:
+                profiler.lap('showdown')
             return winners
-        self._exchange_phase()
+        yield from self._exchange_steps()
+        if profiler is not None:
+            profiler.lap('exchange')
+        self.betting_round = 1
         self.current_bet = 0
         for player in self.players:
             player.current_bet = 0
-        self._betting_round()
+        yield from self._betting_steps()
+        if profiler is not None:
+            profiler.lap('betting')
         winners = self._showdown()
+        if profiler is not None:
+            profiler.lap('showdown')
         self._move_dealer_button()
+        if profiler is not None:
+            profiler.lap('button')
         return winners
 
     def _deal_cards(self):
-        """Rozdanie kart tylko graczom z żetonami."""
-        active_players = [p for p in self.players if p.stack > 0]
+        """Rozdanie kart graczom biorącym udział w rundzie (także tym, których blind wyczerpał)."""
+        active_players = [p for p in self.players if p.is_active]
+        if self.recorder is not None:
+            # Karty z wierzchu talii w kolejności rozdawania
+            self.recorder.deal(self.players, self.deck.cards[::-1][:5 * len(active_players)])
         self.deck.deal(active_players, 5)
 
+    def _chips_mask(self) -> int:
+        """Maska bitowa miejsc graczy, którzy mają żetony."""
+        mask = 0
+        for seat, player in enumerate(self.players):
+            if player.stack > 0:
+                mask |= 1 << seat
+        return mask
+
     def _move_dealer_button(self):
         """Przesuwanie przycisku rozdającego do następnego gracza z żetonami."""
-        original_position = self.dealer_position
-        while True:
-            self.dealer_position = (self.dealer_position + 1) % len(self.players)
-            if self.players[self.dealer_position].stack > 0:
-                break
-            if self.dealer_position == original_position:
-                break
+        seat = next_seat(self._chips_mask(), self.dealer_position)
+        if seat >= 0:
+            self.dealer_position = seat
 
     def _collect_blinds(self):
         """Pobieranie blindów od graczy."""
-        active_players = [p for p in self.players if p.stack > 0]
-        if len(active_players) < 2:
+        chips_mask = self._chips_mask()
+        if chips_mask & (chips_mask - 1) == 0:
             return
-        sb_pos = self.dealer_position
-        while True:
-            sb_pos = (sb_pos + 1) % len(self.players)
-            if self.players[sb_pos].stack > 0:
-                break
+        sb_pos = next_seat(chips_mask, self.dealer_position)
         sb_player = self.players[sb_pos]
         sb_amount = min(self.small_blind, sb_player.stack)
         sb_player.bet(sb_amount)
         self.pot += sb_amount
-        bb_pos = sb_pos
-        while True:
-            bb_pos = (bb_pos + 1) % len(self.players)
-            if self.players[bb_pos].stack > 0:
-                break
+        if self.recorder is not None:
+            self.recorder.blind(sb_pos, sb_amount)
+        if sb_player.stack == 0:
+            chips_mask &= ~(1 << sb_pos)
+        bb_pos = next_seat(chips_mask, sb_pos)
         bb_player = self.players[bb_pos]
         bb_amount = min(self.big_blind, bb_player.stack)
         bb_player.bet(bb_amount)
         self.pot += bb_amount
         self.current_bet = bb_amount
+        if self.recorder is not None:
+            self.recorder.blind(bb_pos, bb_amount)
 
     def _betting_round(self):
         """Przeprowadzanie rundy zakładów."""
-        active_players = [p for p in self.players if p.is_active and p.stack > 0]
-        if len(active_players) <= 1:
+        return self.run_steps(self._betting_steps())
+
+    def _betting_steps(self):
+        """Runda zakładów jako generator; decyzje gracza "You" są zwracane jako Decision.
+
+        Miejsca z żetonami są trzymane w masce bitowej, a liczby graczy w licytacji,
+        graczy z żetonami, graczy, którzy muszą jeszcze działać, oraz graczy według
+        postawionej kwoty są aktualizowane przy każdej akcji. Wybór następnego gracza
+        i warunki końca rundy kosztują więc O(1) zamiast przeglądania stołu.
+        """
+        players = self.players
+        recorder = self.recorder
+        chips_mask = 0
+        live = 0          # gracze w licytacji, którzy nie spasowali i mają żetony
+        active_count = 0  # aktywni gracze przy stole (także ci bez żetonów)
+        bets = {}         # kwota postawiona -> liczba graczy "live" z taką kwotą
+        for seat, p in enumerate(players):
+            if p.stack > 0:
+                chips_mask |= 1 << seat
+            if p.is_active:
+                active_count += 1
+                if p.stack > 0:
+                    live += 1
+                    bets[p.current_bet] = bets.get(p.current_bet, 0) + 1
+        if live <= 1:
             return
-        current_pos = self.dealer_position
-        while True:
-            current_pos = (current_pos + 1) % len(self.players)
-            if self.players[current_pos].stack > 0:
-                break
-        players_to_act = {p: True for p in active_players}
-        last_raiser = None
-        max_rounds = len(self.players) * 4
+        in_round = live   # gracze w licytacji, którzy nie spasowali (także po all-in)
+        to_act = live
+        # Gracz musi działać, jeśli jego ostatnia akcja była przed ostatnim podbiciem
+        acted = [-1] * len(players)
+        raise_count = 0
+        dealer_bit = 1 << self.dealer_position
+        current_pos = next_seat(chips_mask, self.dealer_position)
+        max_rounds = len(players) * 4
         round_count = 0
         while round_count < max_rounds:
-            player = self.players[current_pos]
-            if player.is_active and player.stack > 0 and players_to_act[player]:
-                action = self.prompt_bet(player, self.current_bet)
+            player = players[current_pos]
+            if player.is_active and player.stack > 0 and acted[current_pos] < raise_count:
+                if player.name == "You":
+                    action = yield Decision('bet', player, self.current_bet)
+                elif self.batch_bots:
+                    action = yield Decision('bot_bet', player, self.current_bet)
+                else:
+                    action = self._get_bot_action(player, self.current_bet)
                 if action == "fold":
                     player.is_active = False
-                    players_to_act.pop(player)
-                    if len(players_to_act) <= 1:
+                    active_count -= 1
+                    in_round -= 1
+                    live -= 1
+                    to_act -= 1
+                    bets[player.current_bet] -= 1
+                    if recorder is not None:
+                        recorder.fold(current_pos)
+                    if in_round <= 1:
                         break
                 elif action == "call" or action == "check":
                     call_amount = max(0, self.current_bet - player.current_bet)
+                    bet_amount = 0
                     if call_amount > 0:
                         bet_amount = min(call_amount, player.stack)
+                        bets[player.current_bet] -= 1
                         player.bet(bet_amount)
                         self.pot += bet_amount
-                    players_to_act[player] = False
+                        if player.stack > 0:
+                            bets[player.current_bet] = bets.get(player.current_bet, 0) + 1
+                        else:
+                            live -= 1
+                            chips_mask &= ~(1 << current_pos)
+                    if recorder is not None:
+                        recorder.call(current_pos, bet_amount)
+                    acted[current_pos] = raise_count
+                    to_act -= 1
                 elif action.startswith("raise"):
                     try:
                         raise_amount = int(action.split()[1])
+                        if raise_amount <= 0:
+                            raise ValueError("Raise amount must be positive")
                         total_bet = self.current_bet + raise_amount
                         bet_needed = total_bet - player.current_bet
                         if bet_needed > player.stack:
                             raise InsufficientFundsError("Not enough chips")
+                        bets[player.current_bet] -= 1
                         player.bet(bet_needed)
                         self.pot += bet_needed
                         self.current_bet = total_bet
-                        last_raiser = player
-                        for p in players_to_act:
-                            if p != player and p.is_active and p.stack > 0:
-                                players_to_act[p] = True
-                        players_to_act[player] = False
+                        if player.stack > 0:
+                            bets[player.current_bet] = bets.get(player.current_bet, 0) + 1
+                        else:
+                            live -= 1
+                            chips_mask &= ~(1 << current_pos)
+                        if recorder is not None:
+                            recorder.raise_by(current_pos, raise_amount)
+                        # Wszyscy pozostali gracze z żetonami muszą znowu działać
+                        raise_count += 1
+                        acted[current_pos] = raise_count
+                        to_act = live - 1 if player.stack > 0 else live
                     except (ValueError, InsufficientFundsError):
                         continue
-            while True:
-                current_pos = (current_pos + 1) % len(self.players)
-                if self.players[current_pos].stack > 0 or current_pos == self.dealer_position:
-                    break
+            current_pos = next_seat(chips_mask | dealer_bit, current_pos)
             round_count += 1
-            if all(not needed_to_act for needed_to_act in players_to_act.values()):
+            if to_act == 0:
                 break
-            active_players = [p for p in self.players if p.is_active]
-            if len(active_players) <= 1:
+            if active_count <= 1:
                 break
-            if all(not p.is_active or p.current_bet == self.current_bet or p.stack == 0 
-                  for p in self.players if p in players_to_act):
+            if bets.get(self.current_bet, 0) == live:
                 break
 
     def prompt_bet(self, player: Player, current_bet: int) -> str:
@@ -178,33 +378,30 @@ class GameEngine:
             return self._get_bot_action(player, current_bet)
 
     def _get_human_action(self, player: Player, current_bet: int) -> str:
-        """Zwracanie akcji gracza (GUI lub prosta logika)."""
-        call_amount = max(0, current_bet - player.current_bet)
-        if call_amount == 0:
-            return "check"
-        elif call_amount >= player.stack:
-            return "call"
-        else:
-            if random.random() < 0.7:
-                return "call"
-            else:
-                return "fold"
+        """Zwracanie akcji gracza (GUI lub strategia przypisana do miejsca gracza)."""
+        return self.human_policy.act(self, player, current_bet)
 
     def _get_bot_action(self, player: Player, current_bet: int) -> str:
+        """Zwracanie akcji bota (strategia botów lub wbudowana logika)."""
+        if self.bot_policy is not None:
+            return self.bot_policy.act(self, player, current_bet)
+        return self._default_bot_action(player, current_bet)
+
+    def _default_bot_action(self, player: Player, current_bet: int) -> str:
         """Stosowanie prostej logiki bota."""
         call_amount = max(0, current_bet - player.current_bet)
         if call_amount == 0:
-            if random.random() < 0.8:
+            if self.rng.random() < 0.8:
                 return "check"
             else:
                 return f"raise {self.big_blind}"
         elif call_amount >= player.stack:
-            if random.random() < 0.3:
+            if self.rng.random() < 0.3:
                 return "call"
             else:
                 return "fold"
         else:
-            action_choice = random.random()
+            action_choice = self.rng.random()
             if action_choice < 0.5:
                 return "call"
             elif action_choice < 0.8:
@@ -214,30 +411,39 @@ class GameEngine:
 
     def _exchange_phase(self):
         """Przeprowadzanie fazy wymiany kart."""
-        for player in self.players:
+        return self.run_steps(self._exchange_steps())
+
+    def _exchange_steps(self):
+        """Faza wymiany jako generator; wybór kart gracza "You" jest zwracany jako Decision."""
+        recorder = self.recorder
+        for seat, player in enumerate(self.players):
             if player.is_active:
                 if player.name == "You":
-                    indices = self._get_human_exchange()
+                    indices = yield Decision('exchange', player)
                 else:
-                    indices = self._get_bot_exchange()
+                    indices = self._get_bot_exchange(player)
                 if indices:
                     new_hand = self.exchange_cards(player.hand, indices)
                     player.hand = new_hand
-        self.deck.cards = [card for card in self.deck.cards if card is not None]
+                if recorder is not None:
+                    recorder.exchange(seat, indices or [], player.hand)
 
     def _get_human_exchange(self) -> List[int]:
-        """Zwracanie indeksów kart do wymiany (GUI lub losowo)."""
-        num_cards = random.randint(0, 3)
-        if num_cards == 0:
-            return []
-        return random.sample(range(5), num_cards)
+        """Zwracanie indeksów kart do wymiany (GUI lub strategia przypisana do miejsca gracza)."""
+        player = next(p for p in self.players if p.name == "You")
+        return self.human_policy.exchange(self, player)
+
+    def _get_bot_exchange(self, player: Player) -> List[int]:
+        """Zwracanie indeksów kart do wymiany bota (strategia botów lub wbudowana logika)."""
+        if self.bot_policy is not None:
+            return self.bot_policy.exchange(self, player)
+        return self._default_bot_exchange(player)
 
-    def _get_bot_exchange(self) -> List[int]:
-        """Stosowanie prostej logiki wymiany kart bota."""
-        num_cards = random.randint(0, 3)
-        if num_cards == 0:
+    def _default_bot_exchange(self, player: Player) -> List[int]:
+        """Wymiana kart bota dająca najwyższą oczekiwaną siłę ręki (najwyżej 3 karty)."""
+        if player.hand_size != 5:
             return []
-        return random.sample(range(5), num_cards)
+        return best_discard(player.hand, max_discard=3)
 
     def exchange_cards(self, hand: List[Card], indices: List[int]) -> List[Card]:
         """Wymienianie wskazanych kart."""
@@ -269,55 +475,58 @@ class GameEngine:
         final_pot = self.pot
         if len(active_players) <= 1:
             winner = active_players[0]
-            winner.stack += self.pot
+            self._award(winner, self.pot)
             self.pot = 0
             return [(winner, None, None, final_pot, self._get_all_player_hands(), False)]
-        player_hands = []
-        for player in active_players:
-            rank, high_cards = HandEvaluator.hand_rank(player.hand)
-            hand_name = HandEvaluator.hand_name(rank)
-            player_hands.append((player, rank, high_cards, hand_name))
-        player_hands.sort(key=lambda x: (x[1], x[2]), reverse=True)
-        best_rank = player_hands[0][1]
-        best_high_cards = player_hands[0][2]
-        winners = [(ph[0], ph[3], ph[2]) for ph in player_hands
-                  if ph[1] == best_rank and ph[2] == best_high_cards]
+        player_keys = [(player, player.strength) for player in active_players]
+        best_key = max(key for _, key in player_keys)
+        winners = [(player, HandEvaluator.hand_name(HandEvaluator.category(key)),
+                    HandEvaluator.high_cards(key))
+                   for player, key in player_keys if key == best_key]
         is_draw = len(winners) > 1
         if is_draw:
             return [(w[0], w[1], w[2], final_pot, self._get_all_player_hands(), True) for w in winners]
         winner = winners[0][0]
-        winner.stack += self.pot
+        self._award(winner, self.pot)
         self.pot = 0
         return [(winners[0][0], winners[0][1], winners[0][2], final_pot, self._get_all_player_hands(), False)]
 
+    def _award(self, player: Player, amount: int) -> None:
+        """Wypłata z puli (zapisywana w historii rozdania)."""
+        player.stack += amount
+        if self.recorder is not None:
+            self.recorder.award(player, amount)
+
     def handle_draw_resolution(self, choice: str):
         """Obsługiwanie rozstrzygania remisu."""
+        return self.run_steps(self.draw_resolution_steps(choice))
+
+    def draw_resolution_steps(self, choice: str):
+        """Rozstrzyganie remisu jako generator (dodatkowa licytacja zwraca decyzje gracza)."""
         active_players = [p for p in self.players if p.is_active]
         if choice == "split":
             pot_share = self.pot // len(active_players)
             remainder = self.pot % len(active_players)
+            expected_total = self.verify_total_chips()
             for player in active_players:
-                player.stack += pot_share
+                self._award(player, pot_share)
             if remainder > 0:
-                random.choice(active_players).stack += remainder
-            total_after = sum(p.stack for p in self.players)
-            expected_total = sum(p.stack for p in self.players) + self.pot
-            if total_after != expected_total:
-                discrepancy = expected_total - total_after
-                if discrepancy > 0:
-                    random.choice(active_players).stack += discrepancy
+                self._award(self.rng.choice(active_players), remainder)
             self.pot = 0
+            discrepancy = expected_total - self.verify_total_chips()
+            if discrepancy > 0:
+                self._award(self.rng.choice(active_players), discrepancy)
             return "split"
         elif choice == "continue":
             self.current_bet = 0
             for player in self.players:
                 player.current_bet = 0
-            self._betting_round()
+            yield from self._betting_steps()
             if len([p for p in self.players if p.is_active]) > 1:
-                return self.handle_draw_resolution("split")
+                return (yield from self.draw_resolution_steps("split"))
             else:
                 winner = next(p for p in self.players if p.is_active)
-                winner.stack += self.pot
+                self._award(winner, self.pot)
                 self.pot = 0
                 return "winner"
         return None
@@ -329,22 +538,26 @@ class GameEngine:
 
     def _get_all_player_hands(self):
         """Zwracanie listy krotek z rękami graczy i ich statusem."""
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.lap('showdown')
         all_hands = []
         for player in self.players:
             status = "Active" if player.is_active else "Folded"
             if player.stack == 0:
                 status = "Out"
-            if player.hand:
+            if player.hand_size:
                 hand_name = None
                 if player.is_active:
-                    rank, high_cards = HandEvaluator.hand_rank(player.hand)
-                    hand_name = HandEvaluator.hand_name(rank)
+                    hand_name = HandEvaluator.hand_name(HandEvaluator.category(player.strength))
                 all_hands.append({
                     'player_name': player.name,
                     'hand': player.hand,
                     'status': status,
                     'hand_name': hand_name
                 })
+        if profiler is not None:
+            profiler.lap('player_hands')
         return all_hands
 
     def showdown(self) -> Player:
@@ -353,14 +566,12 @@ class GameEngine:
         if len(active_players) == 1:
             return active_players[0]
         best_player = None
-        best_rank = -1
-        best_high_cards = []
+        best_key = -1
         for player in active_players:
-            rank, high_cards = HandEvaluator.hand_rank(player.hand)
-            if rank > best_rank or (rank == best_rank and high_cards > best_high_cards):
+            key = player.strength
+            if key > best_key:
                 best_player = player
-                best_rank = rank
-                best_high_cards = high_cards
+                best_key = key
         return best_player
 
     def check_game_over(self) -> bool:
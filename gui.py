@@ -1,12 +1,12 @@
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
-from typing import List, Optional
-import threading
-import time
+from typing import Optional
 
 from poker import Player, Deck
-from game_engine import GameEngine
+from game_engine import GameEngine, Stepper
 from session_manager import SessionManager
+from discard_solver import best_discard, discard_table_ready, load_discard_table, solve_discards
 
 
 class PokerGUI:
@@ -23,6 +23,12 @@ class PokerGUI:
         self.exchange_indices = []
         self.is_game_running = False
         self.update_scheduled = False
+        # Engine steps are driven from the Tk event loop: current round and scheduled next round
+        self.stepper: Optional[Stepper] = None
+        self.on_steps_done = None
+        self.next_round_job = None
+        # Load (or build on first run) the discard table off the Tk thread
+        threading.Thread(target=load_discard_table, daemon=True).start()
 
         self.setup_gui()
 
@@ -172,7 +178,7 @@ class PokerGUI:
     def start_new_game(self, num_players: int):
         """Initialize a new game"""
         # Stop any existing game
-        self.is_game_running = False
+        self.stop_game()
         
         # Clear existing game state
         self.clear_game_state()
@@ -186,52 +192,109 @@ class PokerGUI:
         self.log_message("New game started!", 'round')
         self.log_message(f"Players: {num_players}", 'round')
 
-        # Start game loop in separate thread
+        # Rounds are driven step by step from the Tk event loop
         self.is_game_running = True
-        threading.Thread(target=self.game_loop, daemon=True).start()
+        self.schedule_next_round(0)
 
-    def game_loop(self):
-        """Main game loop"""
-        self.is_game_running = True
-        
-        while not self.game_engine.game_over and self.is_game_running:
-            try:
-                self.log_message("\n--- New Round ---", 'round')
-                self.log_message(f"Dealer: {self.game_engine.players[self.game_engine.dealer_position].name}", 'round')
-                self.log_message("🎲 Shuffling deck...", 'shuffle')
-                self.update_display()
-
-                # Override the human action methods
-                original_get_human_action = self.game_engine._get_human_action
-                original_get_human_exchange = self.game_engine._get_human_exchange
-
-                self.game_engine._get_human_action = self.get_human_action_gui
-                self.game_engine._get_human_exchange = self.get_human_exchange_gui
-
-                winners = self.game_engine.play_round()
-                if winners:
-                    self._announce_winners(winners)
-                    # If this was the final winner, break the loop
-                    if winners[0][0] == "final_winner":
-                        break
-                self.update_display()
-                
-                # Check if game should end
-                if self.game_engine.check_game_over():
-                    break
-
-                # Small delay between rounds
-                self.root.after(1000)
-
-            except Exception as e:
-                self.log_message(f"Error during round: {e}", 'error')
-                import traceback
-                self.log_message(traceback.format_exc(), 'error')
-            finally:
-                # Restore original methods
-                self.game_engine._get_human_action = original_get_human_action
-                self.game_engine._get_human_exchange = original_get_human_exchange
+    def stop_game(self):
+        """Abandon the round in progress and any scheduled round"""
+        self.is_game_running = False
+        if self.next_round_job is not None:
+            self.root.after_cancel(self.next_round_job)
+            self.next_round_job = None
+        if self.stepper is not None:
+            self.stepper.close()
+            self.stepper = None
+        # A decision left open by the abandoned round can no longer be answered
+        self.waiting_for_action = False
+        self.disable_action_buttons()
 
+    def schedule_next_round(self, delay: int = 1000):
+        """Start the next round after a short delay"""
+        if self.is_game_running:
+            self.next_round_job = self.root.after(delay, self.start_round)
+
+    def start_round(self):
+        """Start a round; the engine runs until it needs a decision from the player"""
+        self.next_round_job = None
+        if not self.is_game_running or self.game_engine.game_over:
+            return
+        self.log_message("\n--- New Round ---", 'round')
+        self.log_message(f"Dealer: {self.game_engine.players[self.game_engine.dealer_position].name}", 'round')
+        self.log_message("🎲 Shuffling deck...", 'shuffle')
+        self.update_display()
+        self.run_steps(self.game_engine.round_steps(), self.finish_round)
+
+    def run_steps(self, steps, on_done):
+        """Drive engine steps; on_done receives the result once no more decisions are needed"""
+        self.on_steps_done = on_done
+        try:
+            self.stepper = Stepper(steps)
+        except Exception as e:
+            self._step_failed(e)
+            return
+        self._handle_step()
+
+    def _handle_step(self):
+        """Ask the player for the pending decision or hand over the finished result"""
+        stepper = self.stepper
+        if stepper.done:
+            self.stepper = None
+            self.on_steps_done(stepper.result)
+            return
+        decision = stepper.decision
+        self.waiting_for_action = True
+        if decision.kind == 'bet':
+            self.human_action = None
+            self.enable_betting_buttons(decision.current_bet)
+        else:
+            self.exchange_indices = []
+            self.enable_exchange_button()
+        self.update_display()
+
+    def submit_decision(self, answer):
+        """Resume the engine with the player's answer"""
+        self.waiting_for_action = False
+        self.disable_action_buttons()
+        if self.stepper.decision.kind == 'exchange':
+            self.clear_card_selection()
+        try:
+            self.stepper.resume(answer)
+        except Exception as e:
+            self._step_failed(e)
+            return
+        self._handle_step()
+
+    def _step_failed(self, error: Exception):
+        """Log an engine error and move on to the next round"""
+        self.stepper = None
+        self.log_message(f"Error during round: {error}", 'error')
+        import traceback
+        self.log_message(traceback.format_exc(), 'error')
+        self.schedule_next_round()
+
+    def finish_round(self, winners):
+        """Announce the round result and schedule the next round"""
+        if winners:
+            self._announce_winners(winners)
+            # If this was the final winner, the game is over
+            if winners[0][0] == "final_winner":
+                self.end_game()
+                return
+            # A draw waits for the player's choice in the dialog
+            if winners[0][5]:
+                return
+        self.update_display()
+
+        # Check if game should end
+        if self.game_engine.check_game_over():
+            self.end_game()
+            return
+        self.schedule_next_round()
+
+    def end_game(self):
+        """Log the final result"""
+        self.is_game_running = False
         if self.game_engine.game_over:
             self.log_message("\n=== Game Over! ===", 'round')
             winner = max(self.game_engine.players, key=lambda p: p.stack)
@@ -339,12 +402,14 @@ class PokerGUI:
                 self.log_message(f"🤝 Remis rozstrzygnięty: Pula ({pot_amount} zł) podzielona po równo", 'round')
                 for winner, _, _, _, _, _ in winners:
                     self.log_message(f"{winner.name} otrzymuje {share} zł", 'default')
-            self.update_display()
+            self.finish_round(None)
 
         def on_continue():
             dialog.destroy()
             self.log_message("🎲 Gracze zdecydowali się kontynuować licytację", 'round')
-            result = self.game_engine.handle_draw_resolution("continue")
+            self.run_steps(self.game_engine.draw_resolution_steps("continue"), on_continue_done)
+
+        def on_continue_done(result):
             if result == "split":
                 final_share = self.game_engine.pot // len(winners)
                 self.log_message(f"Końcowy podział: Każdy gracz otrzymuje {final_share} zł", 'round')
@@ -352,7 +417,7 @@ class PokerGUI:
                 winner = next(p for p in self.game_engine.players if p.is_active)
                 self.log_message(f"Po dodatkowej licytacji: {winner.name} wygrywa {self.game_engine.pot} zł!", 
                                'win' if winner.name == "You" else 'loss')
-            self.update_display()
+            self.finish_round(None)
 
         # Create buttons for options
         ttk.Button(dialog, text="Podziel pulę po równo", command=on_split).pack(pady=10)
@@ -366,38 +431,6 @@ class PokerGUI:
         y = (dialog.winfo_screenheight() // 2) - (height // 2)
         dialog.geometry(f'{width}x{height}+{x}+{y}')
 
-    def get_human_action_gui(self, player: Player, current_bet: int) -> str:
-        """Get human player action via GUI"""
-        if player != self.human_player:
-            return self.game_engine._get_bot_action(player, current_bet)
-
-        self.root.after(0, self.enable_betting_buttons, current_bet)
-
-        # Wait for human action
-        self.waiting_for_action = True
-        self.human_action = None
-
-        while self.waiting_for_action:
-            time.sleep(0.1)
-
-        self.root.after(0, self.disable_action_buttons)
-        return self.human_action
-
-    def get_human_exchange_gui(self) -> List[int]:
-        """Get human player card exchange via GUI"""
-        self.root.after(0, self.enable_exchange_button)
-
-        # Wait for human exchange
-        self.waiting_for_action = True
-        self.exchange_indices = []
-
-        while self.waiting_for_action:
-            time.sleep(0.1)
-
-        self.root.after(0, self.disable_action_buttons)
-        self.root.after(0, self.clear_card_selection)
-        return self.exchange_indices
-
     def enable_betting_buttons(self, current_bet: int):
         """Enable betting buttons for human player"""
         call_amount = max(0, current_bet - self.human_player.current_bet)
@@ -418,6 +451,19 @@ class PokerGUI:
         self.disable_action_buttons()
         self.exchange_btn.config(state=tk.NORMAL)
         self.log_message("Select cards to exchange (click cards to select/deselect)", 'exchange')
+        hand = self.human_player.hand
+        # Same 3-card limit as the bots: a table lookup once the background load is done,
+        # the exact solver (tens of milliseconds) while the table is still being built
+        if discard_table_ready():
+            suggested = best_discard(hand, max_discard=3)
+        else:
+            solutions = solve_discards(hand, max_discard=3)
+            suggested = max(solutions, key=lambda solution: solution['expected_strength'])['discard']
+        if suggested:
+            cards = ", ".join(str(hand[i]) for i in suggested)
+            self.log_message(f"Suggested exchange: {cards}", 'exchange')
+        else:
+            self.log_message("Suggested exchange: stand pat", 'exchange')
 
     def disable_action_buttons(self):
         """Disable all action buttons"""
@@ -437,8 +483,7 @@ class PokerGUI:
             else:
                 self.human_action = "call"
                 self.log_message(f"You call ${call_amount}", 'call')
-            self.waiting_for_action = False
-            self.update_display()
+            self.submit_decision(self.human_action)
 
     def raise_action(self):
         """Handle raise action"""
@@ -456,9 +501,8 @@ class PokerGUI:
 
                 self.human_action = f"raise {raise_amount}"
                 self.log_message(f"You raise by ${raise_amount}", 'raise')
-                self.waiting_for_action = False
                 self.raise_entry.delete(0, tk.END)
-                self.update_display()
+                self.submit_decision(self.human_action)
 
             except ValueError:
                 messagebox.showerror("Error", "Invalid raise amount")
@@ -468,8 +512,7 @@ class PokerGUI:
         if self.waiting_for_action:
             self.human_action = "fold"
             self.log_message("You fold", 'fold')
-            self.waiting_for_action = False
-            self.update_display()
+            self.submit_decision(self.human_action)
 
     def exchange_action(self):
         """Handle card exchange action"""
@@ -480,8 +523,7 @@ class PokerGUI:
                 self.log_message(f"🔄 You exchange {num_cards} card{'s' if num_cards > 1 else ''}", 'exchange')
             else:
                 self.log_message("✋ You stand pat (no cards exchanged)", 'exchange')
-            self.waiting_for_action = False
-            self.update_display()
+            self.submit_decision(self.exchange_indices)
 
     def toggle_card_selection(self, index: int):
         """Toggle card selection for exchange"""
@@ -770,6 +812,8 @@ class PokerGUI:
 
     def restore_game_state(self, session_data: dict):
         """Restore game state from session data"""
+        self.stop_game()
+
         # Create players from session data
         players = []
         for player_data in session_data['players']:
@@ -793,8 +837,9 @@ class PokerGUI:
         self.human_player = players[0]
         self.update_display()
 
-        # Start game loop
-        threading.Thread(target=self.game_loop, daemon=True).start()
+        # Start the first round from the Tk event loop
+        self.is_game_running = True
+        self.schedule_next_round(0)
 
     def clear_game_state(self):
         """Clear all game-related state"""
@@ -888,4 +933,4 @@ class PokerGUI:
         try:
             self.root.mainloop()
         finally:
-            self.is_game_running = False  # Ensure game loop stops if GUI is closed
+            self.is_game_running = False  # Ensure no further rounds are scheduled if GUI is closed
@@ -1,79 +1,278 @@
+import zlib
 from collections import Counter
+from math import comb
+from itertools import combinations, combinations_with_replacement
+
+try:
+    import numpy as np
+except ImportError:  # NumPy jest potrzebny tylko do oceny wsadowej
+    np = None
+
+
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+SUITS = ['s', 'h', 'd', 'c']
+
+# Konwertowanie rang na wartości numeryczne do porównania
+RANK_VALUES = {rank: value for value, rank in enumerate(RANKS, start=2)}
+
+# Liczba pierwsza dla każdej rangi (2..A) - iloczyn identyfikuje zbiór rang ręki
+PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+# Liczba wartości zapisanych w kluczu dla każdej kategorii układu
+KICKER_COUNTS = (5, 4, 3, 3, 5, 5, 2, 2, 5, 5)
+
+CATEGORY_SHIFT = 20
+
+
+def card_code(rank: str, suit: str) -> int:
+    """Kodowanie karty jako liczby: bit rangi, bit koloru, indeks rangi i liczba pierwsza.
+
+    Układ bitów: xxxbbbbb bbbbbbbb cdhsrrrr xxpppppp
+    """
+    rank_idx = RANK_VALUES[rank] - 2
+    suit_bit = 1 << SUITS.index(suit)
+    return (1 << (16 + rank_idx)) | (suit_bit << 12) | (rank_idx << 8) | PRIMES[rank_idx]
+
+
+def _pack(category, values):
+    """Pakowanie kategorii i wartości kart w jeden porównywalny klucz."""
+    key = category << CATEGORY_SHIFT
+    shift = CATEGORY_SHIFT - 4
+    for value in values:
+        key |= value << shift
+        shift -= 4
+    return key
+
+
+def _classify(values, is_flush):
+    """Referencyjna ocena ręki na podstawie wartości rang (używana do budowy tablic)."""
+    values = sorted(values, reverse=True)
+    rank_counts = Counter(values)
+    counts = sorted(rank_counts.values(), reverse=True)
+
+    is_straight = (values == list(range(values[0], values[0] - 5, -1)) or
+                   values == [14, 5, 4, 3, 2])  # Specjalny przypadek dla A-2-3-4-5
+
+    if is_straight and values == [14, 5, 4, 3, 2]:
+        values = [5, 4, 3, 2, 1]  # Strit do asa
+
+    # Poker królewski
+    if is_flush and is_straight and values[0] == 14:
+        return (9, values)
+
+    # Poker
+    if is_flush and is_straight:
+        return (8, values)
+
+    # Kareta
+    if counts == [4, 1]:
+        four_kind = [k for k, v in rank_counts.items() if v == 4][0]
+        kicker = [k for k, v in rank_counts.items() if v == 1][0]
+        return (7, [four_kind, kicker])
+
+    # Full
+    if counts == [3, 2]:
+        three_kind = [k for k, v in rank_counts.items() if v == 3][0]
+        pair = [k for k, v in rank_counts.items() if v == 2][0]
+        return (6, [three_kind, pair])
+
+    # Kolor
+    if is_flush:
+        return (5, values)
+
+    # Strit
+    if is_straight:
+        return (4, values)
+
+    # Trójka
+    if counts == [3, 1, 1]:
+        three_kind = [k for k, v in rank_counts.items() if v == 3][0]
+        kickers = sorted([k for k, v in rank_counts.items() if v == 1], reverse=True)
+        return (3, [three_kind] + kickers)
+
+    # Dwie pary
+    if counts == [2, 2, 1]:
+        pairs = sorted([k for k, v in rank_counts.items() if v == 2], reverse=True)
+        kicker = [k for k, v in rank_counts.items() if v == 1][0]
+        return (2, pairs + [kicker])
+
+    # Para
+    if counts == [2, 1, 1, 1]:
+        pair = [k for k, v in rank_counts.items() if v == 2][0]
+        kickers = sorted([k for k, v in rank_counts.items() if v == 1], reverse=True)
+        return (1, [pair] + kickers)
+
+    # Wysoka karta
+    return (0, values)
+
+
+def _build_tables():
+    """Budowanie tablic: kolory i unikalne rangi (po masce rang) oraz pary (po iloczynie liczb pierwszych)."""
+    flushes = [0] * 8192
+    unique5 = [0] * 8192
+    products = {}
+    for idxs in combinations(range(13), 5):
+        mask = sum(1 << i for i in idxs)
+        values = [i + 2 for i in idxs]
+        flushes[mask] = _pack(*_classify(values, True))
+        unique5[mask] = _pack(*_classify(values, False))
+    for idxs in combinations_with_replacement(range(13), 5):
+        if len(set(idxs)) == 5 or len(set(idxs)) == 1:
+            continue
+        product = 1
+        for i in idxs:
+            product *= PRIMES[i]
+        products[product] = _pack(*_classify([i + 2 for i in idxs], False))
+    return flushes, unique5, products
+
+
+_FLUSHES, _UNIQUE5, _PRODUCTS = _build_tables()
+
+# Suma kontrolna tablic - zmienia się przy każdej zmianie kodowania kluczy
+TABLES_CHECKSUM = zlib.crc32(repr((_FLUSHES, _UNIQUE5, sorted(_PRODUCTS.items()))).encode())
+
+# Kody kart według indeksu 0-51 (kolejność: kolor, potem ranga - jak w talii)
+CARD_CODES = tuple(card_code(rank, suit) for suit in SUITS for rank in RANKS)
+
+
+def evaluate_codes(c1, c2, c3, c4, c5):
+    """Ocena pięciu kodów kart za pomocą trzech tablic."""
+    mask = (c1 | c2 | c3 | c4 | c5) >> 16
+    if c1 & c2 & c3 & c4 & c5 & 0xF000:
+        return _FLUSHES[mask]
+    key = _UNIQUE5[mask]
+    if key:
+        return key
+    return _PRODUCTS[(c1 & 0xFF) * (c2 & 0xFF) * (c3 & 0xFF) * (c4 & 0xFF) * (c5 & 0xFF)]
+
+
+_NP_TABLES = None
+
+# Sieć sortująca dla pięciu elementów (9 porównań)
+_SORT_NETWORK = ((0, 1), (3, 4), (2, 4), (2, 3), (0, 3), (0, 2), (1, 4), (1, 3), (1, 2))
+
+
+def _numpy_tables():
+    """Leniwe tworzenie tablic NumPy: rangi i bity kolorów kart, kolory po masce rang
+    oraz wszystkie multizbiory rang.
+
+    Multizbiór posortowanych rang r0 <= ... <= r4 ma indeks sum(C(r_i + i, i + 1)),
+    co daje doskonałe haszowanie 6188 możliwych zestawów rang.
+    """
+    global _NP_TABLES
+    if _NP_TABLES is None:
+        card_ranks = np.arange(52, dtype=np.int32) % 13
+        card_suit_bits = (1 << (np.arange(52) // 13)).astype(np.uint8)
+        offsets = [np.array([comb(r + i, i + 1) for r in range(13)], dtype=np.int32) for i in range(5)]
+        multisets = np.zeros(comb(17, 5), dtype=np.int32)
+        for idxs in combinations_with_replacement(range(13), 5):
+            if len(set(idxs)) == 1:
+                continue
+            index = sum(comb(r + i, i + 1) for i, r in enumerate(idxs))
+            multisets[index] = _pack(*_classify([i + 2 for i in idxs], False))
+        _NP_TABLES = (card_ranks, card_suit_bits, offsets, multisets, np.array(_FLUSHES, dtype=np.int32))
+    return _NP_TABLES
 
 
 class HandEvaluator:
+    _table = None
+
+    @staticmethod
+    def evaluate(hand) -> int:
+        """Zwracanie klucza siły ręki - większa liczba oznacza silniejszy układ (0 dla niepełnej ręki)."""
+        if len(hand) != 5:
+            return 0
+        c1, c2, c3, c4, c5 = hand
+        return evaluate_codes(c1.code, c2.code, c3.code, c4.code, c5.code)
+
+    @staticmethod
+    def evaluate_indices(indices) -> int:
+        """Zwracanie klucza siły ręki podanej jako indeksy kart 0-51."""
+        if len(indices) != 5:
+            return 0
+        i1, i2, i3, i4, i5 = indices
+        return evaluate_codes(CARD_CODES[i1], CARD_CODES[i2], CARD_CODES[i3],
+                               CARD_CODES[i4], CARD_CODES[i5])
+
+    @staticmethod
+    def rank_batch(cards):
+        """Ocena tablicy (N, 5) indeksów kart - zwraca tablice (N,) kluczy i kategorii."""
+        if np is None:
+            raise ImportError("NumPy is required for batch evaluation")
+        cards = np.asarray(cards)
+        if cards.ndim != 2 or cards.shape[1] != 5:
+            raise ValueError("Expected an (N, 5) array of card indices")
+        card_ranks, card_suit_bits, offsets, multiset_table, flush_table = _numpy_tables()
+        columns = np.ascontiguousarray(cards.T).astype(np.intp)
+
+        # Sortowanie rang w obrębie ręki siecią sortującą na kolumnach
+        ranks = [card_ranks[column] for column in columns]
+        for i, j in _SORT_NETWORK:
+            low = np.minimum(ranks[i], ranks[j])
+            ranks[j] = np.maximum(ranks[i], ranks[j])
+            ranks[i] = low
+
+        # Indeks multizbioru rang wyznacza układ bez koloru, maska rang - układ w kolorze
+        keys = multiset_table[offsets[0][ranks[0]] + offsets[1][ranks[1]] + offsets[2][ranks[2]] +
+                              offsets[3][ranks[3]] + offsets[4][ranks[4]]]
+        suit_bits = card_suit_bits[columns[0]]
+        for column in columns[1:]:
+            suit_bits &= card_suit_bits[column]
+        flushes = np.flatnonzero(suit_bits)
+        if flushes.size:
+            mask = np.left_shift(1, ranks[0][flushes])
+            for rank in ranks[1:]:
+                mask |= np.left_shift(1, rank[flushes])
+            keys[flushes] = flush_table[mask]
+        return keys, keys >> CATEGORY_SHIFT
+
+    @staticmethod
+    def hands_to_array(hands):
+        """Zamiana listy rąk (list kart) na tablicę (N, 5) indeksów kart."""
+        if np is None:
+            raise ImportError("NumPy is required for batch evaluation")
+        return np.array([[card.index for card in hand] for hand in hands], dtype=np.int8).reshape(-1, 5)
+
+    @classmethod
+    def load_table(cls, path=None):
+        """Wczytanie (lub wygenerowanie) pliku z kluczami wszystkich rąk 5-kartowych."""
+        from hand_table import load_table, DEFAULT_TABLE_PATH
+        cls._table = load_table(path or DEFAULT_TABLE_PATH)
+        return cls._table
+
+    @classmethod
+    def lookup(cls, hand) -> int:
+        """Zwracanie klucza siły ręki przez odczyt z tablicy wszystkich rąk."""
+        if len(hand) != 5:
+            return 0
+        table = cls._table or cls.load_table()
+        return table.lookup([card.index for card in hand])
+
+    @classmethod
+    def lookup_batch(cls, cards):
+        """Odczyt kluczy i kategorii dla tablicy (N, 5) indeksów kart z tablicy wszystkich rąk."""
+        table = cls._table or cls.load_table()
+        keys = table.lookup_batch(cards)
+        return keys, keys >> CATEGORY_SHIFT
+
+    @staticmethod
+    def category(key: int) -> int:
+        """Zwracanie kategorii układu zapisanej w kluczu."""
+        return key >> CATEGORY_SHIFT
+
+    @staticmethod
+    def high_cards(key: int) -> list:
+        """Odtwarzanie listy wysokich kart zapisanej w kluczu."""
+        if not key:
+            return []
+        count = KICKER_COUNTS[key >> CATEGORY_SHIFT]
+        return [(key >> (CATEGORY_SHIFT - 4 * (i + 1))) & 0xF for i in range(count)]
+
     @staticmethod
     def hand_rank(hand):
         """Zwracanie (rangi, wysokich kart) dla podanej ręki pokerowej."""
-        if len(hand) != 5:
-            return (0, [])
-
-        ranks = [card.rank for card in hand]
-        suits = [card.suit for card in hand]
-
-        # Konwertowanie rang na wartości numeryczne do porównania
-        rank_values = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8,
-                       '9': 9, '10': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
-
-        values = sorted([rank_values[rank] for rank in ranks], reverse=True)
-        rank_counts = Counter(values)
-        counts = sorted(rank_counts.values(), reverse=True)
-
-        is_flush = len(set(suits)) == 1
-        is_straight = (values == list(range(values[0], values[0] - 5, -1)) or
-                       values == [14, 5, 4, 3, 2])  # Specjalny przypadek dla A-2-3-4-5
-
-        if is_straight and values == [14, 5, 4, 3, 2]:
-            values = [5, 4, 3, 2, 1]  # Strit do asa
-
-        # Poker królewski
-        if is_flush and is_straight and values[0] == 14:
-            return (9, values)
-
-        # Poker
-        if is_flush and is_straight:
-            return (8, values)
-
-        # Kareta
-        if counts == [4, 1]:
-            four_kind = [k for k, v in rank_counts.items() if v == 4][0]
-            kicker = [k for k, v in rank_counts.items() if v == 1][0]
-            return (7, [four_kind, kicker])
-
-        # Full
-        if counts == [3, 2]:
-            three_kind = [k for k, v in rank_counts.items() if v == 3][0]
-            pair = [k for k, v in rank_counts.items() if v == 2][0]
-            return (6, [three_kind, pair])
-
-        # Kolor
-        if is_flush:
-            return (5, values)
-
-        # Strit
-        if is_straight:
-            return (4, values)
-
-        # Trójka
-        if counts == [3, 1, 1]:
-            three_kind = [k for k, v in rank_counts.items() if v == 3][0]
-            kickers = sorted([k for k, v in rank_counts.items() if v == 1], reverse=True)
-            return (3, [three_kind] + kickers)
-
-        # Dwie pary
-        if counts == [2, 2, 1]:
-            pairs = sorted([k for k, v in rank_counts.items() if v == 2], reverse=True)
-            kicker = [k for k, v in rank_counts.items() if v == 1][0]
-            return (2, pairs + [kicker])
-
-        # Para
-        if counts == [2, 1, 1, 1]:
-            pair = [k for k, v in rank_counts.items() if v == 2][0]
-            kickers = sorted([k for k, v in rank_counts.items() if v == 1], reverse=True)
-            return (1, [pair] + kickers)
-
-        # Wysoka karta
-        return (0, values)
+        key = HandEvaluator.evaluate(hand)
+        return (key >> CATEGORY_SHIFT, HandEvaluator.high_cards(key))
 
     @staticmethod
     def hand_name(rank):
@@ -82,4 +281,3 @@ class HandEvaluator:
                  "Straight", "Flush", "Full House", "Four of a Kind",
                  "Straight Flush", "Royal Flush"]
         return names[rank] if 0 <= rank < len(names) else "Unknown"
-
@@ -0,0 +1,388 @@
+import glob
+import os
+from typing import Iterator, List, Optional
+
+from poker import FULL_DECK
+
+
+# Nagłówek każdego pliku historii (format w wersji 1)
+MAGIC = b'PKHH\x01'
+FILE_SUFFIX = '.hh'
+
+# Wielkość bloku czytanego z pliku historii
+READ_BLOCK = 1024 * 1024
+
+# Rodzaje rekordów: nazwy graczy (przed pierwszym rozdaniem i po każdej zmianie) i rozdanie
+RECORD_PLAYERS = 1
+RECORD_HAND = 2
+
+# Zdarzenia rozdania: kod, miejsce i dane zdarzenia
+EVENT_BLIND = 1     # kwota
+EVENT_DEAL = 2      # zamiast miejsca maska aktywnych miejsc (varint), liczba kart, karty w kolejności rozdania
+EVENT_FOLD = 3
+EVENT_CALL = 4      # dopłacona kwota (0 = check)
+EVENT_RAISE = 5     # kwota podbicia, jak w akcji 'raise <kwota>'
+EVENT_EXCHANGE = 6  # liczba kart, indeksy, nowe karty
+EVENT_AWARD = 7     # kwota z puli
+
+EVENT_NAMES = {EVENT_BLIND: 'blind', EVENT_DEAL: 'deal', EVENT_FOLD: 'fold', EVENT_CALL: 'call',
+               EVENT_RAISE: 'raise', EVENT_EXCHANGE: 'exchange', EVENT_AWARD: 'award'}
+
+
+class HistoryFormatError(Exception):
+    """Błąd uszkodzonego lub nieznanego pliku historii rozdań"""
+    pass
+
+
+def _varint(out: bytearray, value: int) -> None:
+    """Dopisanie nieujemnej liczby w kodowaniu LEB128 (7 bitów na bajt)."""
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def part_path(prefix: str, part: int) -> str:
+    return f"{prefix}.{part:04d}{FILE_SUFFIX}"
+
+
+def history_paths(prefix: str) -> List[str]:
+    """Pliki historii zaczynające się od `prefix` (także części zapisane przez poszczególne części symulacji), po kolei."""
+    return sorted(glob.glob(f"{glob.escape(prefix)}*{FILE_SUFFIX}"))
+
+
+class HandHistoryWriter:
+    """Zapis historii rozdań do binarnych plików dopisywanych strumieniowo.
+
+    Silnik (`GameEngine(recorder=...)`) zgłasza blindy, rozdane karty, akcje,
+    wymiany i wypłaty z puli; zdarzenia bieżącego rozdania trafiają do małego
+    bufora, który jest zapisywany jako jeden rekord przy następnym rozdaniu
+    (wypłata remisu z handle_draw_resolution należy jeszcze do rozdania).
+    Rekord to długość (varint) i treść: karty jako bajty (indeks karty 0-51),
+    kwoty jako varinty. Plik jest buforowany (`buffer_size`), a po przekroczeniu
+    `max_bytes` zapis przechodzi do kolejnej części `<prefix>.NNNN.hh`; każda
+    część zaczyna się od nazw graczy, więc można ją czytać osobno.
+    """
+
+    def __init__(self, prefix: str, max_bytes: int = 64 * 1024 * 1024, buffer_size: int = 1024 * 1024):
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.buffer_size = buffer_size
+        self.part = 0
+        # Dopisywanie za istniejącymi częściami
+        while os.path.exists(part_path(prefix, self.part + 1)):
+            self.part += 1
+        self.file = None
+        self.size = 0
+        self.hands = 0
+        self._names = None
+        self._players = None
+        self._hand = None
+        self._seats = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _open(self) -> None:
+        directory = os.path.dirname(self.prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(part_path(self.prefix, self.part), 'ab', buffering=self.buffer_size)
+        self.size = self.file.tell()
+        if self.size == 0:
+            self.file.write(MAGIC)
+            self.size = len(MAGIC)
+        self._names = None
+
+    def _write_record(self, body) -> None:
+        record = bytearray()
+        _varint(record, len(body))
+        record += body
+        self.file.write(record)
+        self.size += len(record)
+
+    def _finish_hand(self) -> None:
+        if self._hand is not None:
+            self._write_record(self._hand)
+            self._hand = None
+
+    def flush(self) -> None:
+        """Zapis bieżącego rozdania i opróżnienie bufora pliku."""
+        if self.file is not None:
+            self._finish_hand()
+            self.file.flush()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self._finish_hand()
+            self.file.close()
+            self.file = None
+
+    def begin_hand(self, engine) -> None:
+        """Początek rozdania: zapis poprzedniego i stan stołu przed blindami."""
+        if self.file is None:
+            self.part += 1
+            self._open()
+        else:
+            self._finish_hand()
+            if self.size >= self.max_bytes:
+                self.file.close()
+                self.part += 1
+                self._open()
+        players = engine.players
+        if players is not self._players or self._names is None:
+            # Nowy stół (lub nowa część pliku): nazwy graczy są zapisywane tylko przy zmianie
+            self._players = players
+            self._seats = {id(p): seat for seat, p in enumerate(players)}
+            names = tuple(p.name for p in players)
+            if names != self._names:
+                body = bytearray((RECORD_PLAYERS, len(names)))
+                for name in names:
+                    encoded = name.encode()
+                    _varint(body, len(encoded))
+                    body += encoded
+                self._write_record(body)
+                self._names = names
+        hand = self._hand = bytearray((RECORD_HAND,))
+        _varint(hand, self.hands)
+        hand.append(engine.dealer_position)
+        _varint(hand, engine.small_blind)
+        _varint(hand, engine.big_blind)
+        hand.append(len(players))
+        for player in players:
+            _varint(hand, player.stack)
+        self.hands += 1
+
+    def blind(self, seat: int, amount: int) -> None:
+        if amount < 0x80:
+            self._hand.extend((EVENT_BLIND, seat, amount))
+        else:
+            self._hand.extend((EVENT_BLIND, seat))
+            _varint(self._hand, amount)
+
+    def deal(self, players, cards) -> None:
+        """Rozdanie: `cards` w kolejności zdejmowania z talii, po jednej dla kolejnych aktywnych graczy."""
+        mask = 0
+        for seat, player in enumerate(players):
+            if player.is_active:
+                mask |= 1 << seat
+        hand = self._hand
+        hand.append(EVENT_DEAL)
+        _varint(hand, mask)
+        hand.append(len(cards))
+        hand.extend([card.index for card in cards])
+
+    def fold(self, seat: int) -> None:
+        self._hand.extend((EVENT_FOLD, seat))
+
+    def call(self, seat: int, amount: int) -> None:
+        if amount < 0x80:
+            self._hand.extend((EVENT_CALL, seat, amount))
+        else:
+            self._hand.extend((EVENT_CALL, seat))
+            _varint(self._hand, amount)
+
+    def raise_by(self, seat: int, amount: int) -> None:
+        if amount < 0x80:
+            self._hand.extend((EVENT_RAISE, seat, amount))
+        else:
+            self._hand.extend((EVENT_RAISE, seat))
+            _varint(self._hand, amount)
+
+    def exchange(self, seat: int, indices, hand) -> None:
+        record = self._hand
+        record.extend((EVENT_EXCHANGE, seat, len(indices)))
+        record.extend(indices)
+        record.extend([hand[i].index for i in indices])
+
+    def award(self, player, amount: int) -> None:
+        if self._hand is not None:
+            self._hand.extend((EVENT_AWARD, self._seats[id(player)]))
+            _varint(self._hand, amount)
+
+
+def dealt_hands(mask: int, cards) -> dict:
+    """Ręce z zdarzenia rozdania: miejsce -> karty (po jednej karcie kolejno dla aktywnych miejsc)."""
+    seats = [seat for seat in range(mask.bit_length()) if mask >> seat & 1]
+    return {seat: cards[i::len(seats)] for i, seat in enumerate(seats)}
+
+
+def _read_varint(data, pos: int):
+    value = data[pos]
+    pos += 1
+    if value < 0x80:
+        return value, pos
+    value &= 0x7f
+    shift = 7
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def parse_hand(body, names) -> dict:
+    """Dekodowanie rekordu rozdania: stan przed blindami i lista zdarzeń (kod, miejsce, dane...)."""
+    hand_id, pos = _read_varint(body, 1)
+    dealer = body[pos]
+    small_blind, pos = _read_varint(body, pos + 1)
+    big_blind, pos = _read_varint(body, pos)
+    count = body[pos]
+    pos += 1
+    stacks = []
+    for _ in range(count):
+        stack, pos = _read_varint(body, pos)
+        stacks.append(stack)
+    events = []
+    end = len(body)
+    while pos < end:
+        kind = body[pos]
+        if kind == EVENT_DEAL:
+            mask, pos = _read_varint(body, pos + 1)
+            size = body[pos]
+            events.append((kind, mask, list(body[pos + 1:pos + 1 + size])))
+            pos += 1 + size
+            continue
+        seat = body[pos + 1]
+        pos += 2
+        if kind == EVENT_EXCHANGE:
+            size = body[pos]
+            events.append((kind, seat, list(body[pos + 1:pos + 1 + size]),
+                           list(body[pos + 1 + size:pos + 1 + 2 * size])))
+            pos += 1 + 2 * size
+        elif kind == EVENT_FOLD:
+            events.append((kind, seat))
+        elif kind in EVENT_NAMES:
+            amount, pos = _read_varint(body, pos)
+            events.append((kind, seat, amount))
+        else:
+            raise HistoryFormatError(f"Unknown event {kind} in hand {hand_id}")
+    return {'hand': hand_id, 'names': names, 'dealer': dealer, 'small_blind': small_blind,
+            'big_blind': big_blind, 'stacks': stacks, 'events': events}
+
+
+def read_hands(path: str) -> Iterator[dict]:
+    """Kolejne rozdania z jednego pliku historii (część jest wczytywana w całości)."""
+    for hand, _ in read_hand_records(path):
+        yield hand
+
+
+def read_hand_records(path: str, start: int = 0, names=None, partial: bool = False):
+    """Rozdania z pliku historii od bajtu `start` razem z pozycją końca każdego rekordu.
+
+    Odczyt od środka pliku wymaga nazw graczy obowiązujących w tym miejscu
+    (`names`). Przy `partial` niepełny ostatni rekord (plik wciąż zapisywany)
+    kończy odczyt zamiast zgłaszać błąd.
+    """
+    for body, names, end in read_hand_bodies(path, start, names, partial):
+        try:
+            hand = parse_hand(body, names)
+        except IndexError:
+            if partial:
+                return
+            raise HistoryFormatError(f"Truncated record in {path}")
+        yield hand, end
+
+
+def read_hand_bodies(path: str, start: int = 0, names=None, partial: bool = False):
+    """Niezdekodowane rekordy rozdań: (treść rekordu, nazwy graczy, pozycja końca rekordu).
+
+    Plik jest czytany blokami po READ_BLOCK bajtów, więc pamięć czytającego nie
+    rośnie z wielkością części.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(max(READ_BLOCK, len(MAGIC)))
+        offset = start  # pozycja data[0] w pliku
+        pos = 0
+        if start == 0:
+            if not data.startswith(MAGIC):
+                raise HistoryFormatError(f"Not a hand history file: {path}")
+            pos = len(MAGIC)
+        try:
+            while True:
+                try:
+                    length, body_pos = _read_varint(data, pos)
+                    end = body_pos + length
+                except IndexError:
+                    end = len(data) + 1
+                if end > len(data):
+                    # Rekord niemieszczący się w buforze: dołożenie kolejnego bloku
+                    more = f.read(READ_BLOCK)
+                    if not more:
+                        if pos == len(data) or partial:
+                            return
+                        raise HistoryFormatError(f"Truncated record at byte {offset + pos} of {path}")
+                    data = data[pos:] + more
+                    offset += pos
+                    pos = 0
+                    continue
+                body = data[body_pos:end]
+                pos = end
+                if body[0] == RECORD_PLAYERS:
+                    names = []
+                    at = 2
+                    for _ in range(body[1]):
+                        size, at = _read_varint(body, at)
+                        names.append(body[at:at + size].decode())
+                        at += size
+                    names = tuple(names)
+                elif body[0] == RECORD_HAND:
+                    if names is None:
+                        raise HistoryFormatError(f"Hand record before player names in {path}")
+                    yield body, names, offset + end
+                else:
+                    raise HistoryFormatError(f"Unknown record type {body[0]} in {path}")
+        except IndexError:
+            if partial:
+                return
+            raise HistoryFormatError(f"Truncated record in {path}")
+
+
+def iter_history(paths) -> Iterator[dict]:
+    for path in paths:
+        yield from read_hands(path)
+
+
+def format_hand(hand: dict) -> str:
+    """Czytelny zapis rozdania, np. do przeglądania historii z linii poleceń."""
+    names = hand['names']
+    lines = [f"Hand {hand['hand']}: dealer {names[hand['dealer']]}, "
+             f"blinds {hand['small_blind']}/{hand['big_blind']}, "
+             f"stacks {', '.join(f'{n} {s}' for n, s in zip(names, hand['stacks']))}"]
+    for event in hand['events']:
+        kind, seat = event[0], event[1]
+        if kind == EVENT_DEAL:
+            for seat, cards in dealt_hands(event[1], event[2]).items():
+                lines.append(f"  {names[seat]} dealt {' '.join(str(FULL_DECK[c]) for c in cards)}")
+            continue
+        name = names[seat]
+        if kind == EVENT_EXCHANGE:
+            cards = ' '.join(str(FULL_DECK[c]) for c in event[3])
+            lines.append(f"  {name} exchanges {event[2]}" + (f" for {cards}" if cards else ""))
+        elif kind == EVENT_FOLD:
+            lines.append(f"  {name} folds")
+        elif kind == EVENT_CALL:
+            lines.append(f"  {name} calls {event[2]}" if event[2] else f"  {name} checks")
+        else:
+            verb = {EVENT_BLIND: 'posts blind', EVENT_RAISE: 'raises by', EVENT_AWARD: 'collects'}[kind]
+            lines.append(f"  {name} {verb} {event[2]}")
+    return "\n".join(lines)
+
+
+def run(prefix: str, limit: Optional[int] = 10) -> int:
+    """Wypisanie rozdań z plików historii z linii poleceń."""
+    paths = history_paths(prefix)
+    if not paths:
+        print(f"No hand history files match {prefix}")
+        return 1
+    for count, hand in enumerate(iter_history(paths)):
+        if limit is not None and count >= limit:
+            break
+        print(format_hand(hand))
+    return 0
@@ -0,0 +1,139 @@
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from itertools import combinations
+from math import comb
+
+from hand_evaluator import HandEvaluator, TABLES_CHECKSUM
+
+try:
+    import numpy as np
+except ImportError:  # Bez NumPy działa odczyt pojedynczych rąk i wolniejsze generowanie
+    np = None
+
+
+# Katalog danych obok modułów - niezależny od bieżącego katalogu roboczego
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+DEFAULT_TABLE_PATH = os.path.join(DATA_DIR, 'hand_ranks.bin')
+TABLE_VERSION = 1
+HAND_COUNT = comb(52, 5)
+
+# Nagłówek: magia, wersja, liczba rąk, suma kontrolna tablic oceny, CRC32 danych
+_HEADER = struct.Struct('<8sIIII')
+_MAGIC = b'FCDRANKS'
+HEADER_SIZE = 32
+_KEY = struct.Struct('<I')
+
+# Współczynniki indeksu koleksykograficznego: C(c_i, i + 1) dla karty c_i na pozycji i
+COLEX = [[comb(card, i + 1) for card in range(52)] for i in range(5)]
+
+
+class StaleTableError(Exception):
+    """Błąd nieaktualnego lub uszkodzonego pliku tablicy"""
+    pass
+
+
+def colex_index(indices) -> int:
+    """Zwracanie indeksu koleksykograficznego zbioru pięciu indeksów kart."""
+    c0, c1, c2, c3, c4 = sorted(indices)
+    return COLEX[0][c0] + COLEX[1][c1] + COLEX[2][c2] + COLEX[3][c3] + COLEX[4][c4]
+
+
+def _colex_batch(cards):
+    """Indeksy koleksykograficzne dla tablicy (N, 5) indeksów kart."""
+    cards = np.sort(np.asarray(cards, dtype=np.intp), axis=1)
+    index = np.zeros(len(cards), dtype=np.intp)
+    for i in range(5):
+        index += np.array(COLEX[i], dtype=np.intp)[cards[:, i]]
+    return index
+
+
+def _compute_keys():
+    """Ocena wszystkich rąk w kolejności indeksów koleksykograficznych."""
+    if np is not None:
+        cards = np.fromiter((card for hand in combinations(range(52), 5) for card in hand),
+                            dtype=np.int8, count=HAND_COUNT * 5).reshape(-1, 5)
+        keys = np.zeros(HAND_COUNT, dtype='<u4')
+        keys[_colex_batch(cards)] = HandEvaluator.rank_batch(cards)[0]
+        return keys.tobytes()
+    keys = array('I', bytes(4 * HAND_COUNT))
+    for hand in combinations(range(52), 5):
+        keys[colex_index(hand)] = HandEvaluator.evaluate_indices(hand)
+    if sys.byteorder == 'big':
+        keys.byteswap()
+    return keys.tobytes()
+
+
+def generate_table(path=DEFAULT_TABLE_PATH):
+    """Jednorazowe wygenerowanie pliku z kluczami wszystkich 2 598 960 rąk."""
+    payload = _compute_keys()
+    header = _HEADER.pack(_MAGIC, TABLE_VERSION, HAND_COUNT, TABLES_CHECKSUM, zlib.crc32(payload))
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    # Zapis do pliku tymczasowego i podmiana - inne procesy nigdy nie widzą połowy pliku
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return path
+
+
+class HandRankTable:
+    """Tablica kluczy wszystkich rąk mapowana z pliku - współdzielona przez procesy przez cache stron."""
+
+    def __init__(self, path=DEFAULT_TABLE_PATH, verify=True):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Pusty plik (np. po przerwanym generowaniu) nie daje się zmapować
+                raise StaleTableError(f"Empty table file: {path}")
+        try:
+            self._check_header(verify)
+        except StaleTableError:
+            self._mmap.close()
+            raise
+        self._array = None
+
+    def _check_header(self, verify):
+        if len(self._mmap) != HEADER_SIZE + 4 * HAND_COUNT:
+            raise StaleTableError(f"Unexpected table size: {self.path}")
+        magic, version, count, tables_checksum, crc = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != TABLE_VERSION or count != HAND_COUNT:
+            raise StaleTableError(f"Unsupported table version: {self.path}")
+        if tables_checksum != TABLES_CHECKSUM:
+            raise StaleTableError(f"Table built for a different evaluator: {self.path}")
+        if verify and zlib.crc32(memoryview(self._mmap)[HEADER_SIZE:]) != crc:
+            raise StaleTableError(f"Table checksum mismatch: {self.path}")
+
+    def lookup(self, indices) -> int:
+        """Zwracanie klucza ręki podanej jako pięć indeksów kart."""
+        return _KEY.unpack_from(self._mmap, HEADER_SIZE + 4 * colex_index(indices))[0]
+
+    def lookup_batch(self, cards):
+        """Zwracanie kluczy dla tablicy (N, 5) indeksów kart."""
+        if np is None:
+            raise ImportError("NumPy is required for batch lookups")
+        if self._array is None:
+            self._array = np.memmap(self.path, dtype='<u4', mode='r',
+                                    offset=HEADER_SIZE, shape=(HAND_COUNT,))
+        return self._array[_colex_batch(cards)].astype(np.int32)
+
+    def close(self):
+        self._array = None
+        self._mmap.close()
+
+
+def load_table(path=DEFAULT_TABLE_PATH, verify=True) -> HandRankTable:
+    """Wczytanie tablicy z pliku; brakujący lub nieaktualny plik jest generowany ponownie."""
+    try:
+        return HandRankTable(path, verify)
+    except (FileNotFoundError, StaleTableError):
+        generate_table(path)
+        return HandRankTable(path, verify)
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import random
+import time
+from typing import Optional
+
+from server import DEFAULT_HOST, DEFAULT_PORT, LINE_LIMIT, TableServer, encode
+
+
+def percentile(samples, fraction: float) -> float:
+    """Percentyl z posortowanej listy próbek (najbliższy rząd)."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def bot_answer(message: dict, rng: random.Random) -> dict:
+    """Prosta losowa odpowiedź agenta na decyzję serwera."""
+    answer = {'type': 'answer', 'id': message['id']}
+    if message['kind'] == 'bet':
+        roll = rng.random()
+        if message['call_amount'] == 0:
+            answer['action'] = "check" if roll < 0.8 else "raise 50"
+        elif message['call_amount'] >= message['stack'] or roll < 0.7:
+            answer['action'] = "call"
+        else:
+            answer['action'] = "fold"
+    else:
+        answer['discard'] = sorted(rng.sample(range(5), rng.randint(0, 3)))
+    return answer
+
+
+async def play_connection(host: str, port: int, rounds: int, num_players: int,
+                          seed: int, latencies: list, totals: dict) -> None:
+    """Jeden agent: dołączenie do stołu i odpowiadanie na decyzje aż do końca stołu.
+
+    Opóźnienie akcji to czas od wysłania odpowiedzi do otrzymania następnego komunikatu.
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+    try:
+        writer.write(encode({'type': 'join', 'players': num_players, 'rounds': rounds, 'seed': seed}))
+        await writer.drain()
+        sent_at = None
+        while True:
+            line = await reader.readline()
+            if not line:
+                totals['disconnects'] += 1
+                return
+            if sent_at is not None:
+                latencies.append(time.perf_counter() - sent_at)
+                sent_at = None
+            message = json.loads(line)
+            kind = message['type']
+            if kind == 'decision':
+                writer.write(encode(bot_answer(message, rng)))
+                await writer.drain()
+                sent_at = time.perf_counter()
+                totals['decisions'] += 1
+            elif kind == 'result':
+                totals['rounds'] += 1
+            elif kind == 'timeout':
+                totals['timeouts'] += 1
+            elif kind == 'error':
+                totals['errors'] += 1
+            elif kind == 'end':
+                totals['tables'] += 1
+                return
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def generate_load(host: str, port: int, connections: int, rounds: int = 20,
+                        num_players: int = 6, concurrency: int = 1000, seed: int = 0) -> dict:
+    """Uruchomienie `connections` agentów, najwyżej `concurrency` połączeń naraz."""
+    latencies = []
+    totals = {'tables': 0, 'rounds': 0, 'decisions': 0, 'timeouts': 0, 'errors': 0,
+              'disconnects': 0, 'failed': 0}
+    slots = asyncio.Semaphore(concurrency)
+
+    async def agent(index):
+        async with slots:
+            try:
+                await play_connection(host, port, rounds, num_players, seed + index, latencies, totals)
+            except (ConnectionError, OSError, ValueError):
+                totals['failed'] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(agent(i) for i in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    totals.update({
+        'elapsed': elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'tables_per_sec': totals['tables'] / elapsed if elapsed else 0.0,
+        'rounds_per_sec': totals['rounds'] / elapsed if elapsed else 0.0,
+    })
+    return totals
+
+
+def format_report(report: dict) -> str:
+    return "\n".join([
+        f"Tables: {report['tables']}  Rounds: {report['rounds']}  Decisions: {report['decisions']}  "
+        f"Time: {report['elapsed']:.2f}s",
+        f"Tables/sec: {report['tables_per_sec']:.1f}  Rounds/sec: {report['rounds_per_sec']:.0f}",
+        f"Action latency p50: {report['p50_ms']:.2f} ms  p99: {report['p99_ms']:.2f} ms",
+        f"Timeouts: {report['timeouts']}  Errors: {report['errors']}  "
+        f"Disconnects: {report['disconnects']}  Failed connections: {report['failed']}",
+    ])
+
+
+async def _run(host: Optional[str], port: int, connections: int, rounds: int, num_players: int,
+               concurrency: int, seed: int) -> dict:
+    server = None
+    if host is None:
+        # Bez adresu serwera uruchamiany jest serwer w tym samym procesie
+        server = await TableServer(DEFAULT_HOST, 0, max_tables=concurrency).start()
+        host, port = server.host, server.port
+    try:
+        return await generate_load(host, port, connections, rounds, num_players, concurrency, seed)
+    finally:
+        if server is not None:
+            await server.shutdown()
+
+
+def run(connections: int = 1000, rounds: int = 20, num_players: int = 6, concurrency: int = 1000,
+        host: Optional[str] = None, port: int = DEFAULT_PORT, seed: int = 0) -> int:
+    """Uruchomienie generatora obciążenia z linii poleceń; kod 1, gdy któreś połączenie się nie powiodło."""
+    report = asyncio.run(_run(host, port, connections, rounds, num_players, concurrency, seed))
+    print(format_report(report))
+    return 1 if report['failed'] or report['disconnects'] else 0
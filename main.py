@@ -1,10 +1,223 @@
+import argparse
 import sys
-from gui import PokerGUI
 
 
-def main():
-    """Funkcja główna uruchamiająca GUI."""
+def parse_args(argv=None):
+    """Parsowanie argumentów linii poleceń."""
+    parser = argparse.ArgumentParser(description="Five Card Draw Poker")
+    subparsers = parser.add_subparsers(dest='command')
+
+    simulate = subparsers.add_parser('simulate', help="Run games without the GUI")
+    simulate.add_argument('--hands', type=int, default=10000, help="Number of rounds to play")
+    simulate.add_argument('--players', type=int, default=6, choices=range(2, 7), metavar='2-6',
+                          help="Players per table")
+    simulate.add_argument('--seed', type=int, default=None, help="Random seed")
+    simulate.add_argument('--policy', default='random', help="Policy for the 'You' seat (random, bot, passive, cfr)")
+    simulate.add_argument('--bot-policy', default=None,
+                          help="Policy for all bot seats instead of the built-in bot logic (e.g. cfr)")
+    simulate.add_argument('--workers', type=int, default=1,
+                          help="Worker processes (0 = all cores)")
+    simulate.add_argument('--shard-size', type=int, default=1000,
+                          help="Rounds per shard; each shard gets its own derived seed")
+    simulate.add_argument('--rng', default='python', choices=['python', 'numpy'],
+                          help="Random stream backend for each table")
+    simulate.add_argument('--decks', default=None,
+                          help="Pre-shuffled deck file (.npy) to deal from instead of shuffling")
+    simulate.add_argument('--tables', type=int, default=0,
+                          help="Play this many shards per process as lockstep tables with batched bot bets")
+    simulate.add_argument('--batch-policy', default='reference', help="Batch policy for bot bets (reference)")
+    simulate.add_argument('--history', default=None, metavar='PREFIX',
+                          help="Record every hand to binary hand-history files PREFIX-<shard>.<part>.hh")
+    simulate.add_argument('--profile', action='store_true', help="Report per-phase timings of each round")
+    simulate.add_argument('--profile-window', default=None, metavar='START:END',
+                          help="Also dump cProfile and speedscope output for rounds START..END-1")
+    simulate.add_argument('--profile-output', default='profile',
+                          help="Path prefix for the .prof and .speedscope.json files")
+
+    history = subparsers.add_parser('history', help="Print recorded hands")
+    history.add_argument('prefix', help="Hand-history file prefix (all matching .hh files are read)")
+    history.add_argument('--limit', type=int, default=10, help="Number of hands to print (0 = all)")
+
+    replay = subparsers.add_parser('replay', help="Verify recorded hands (chip flow and cards, engine on mismatch)")
+    replay.add_argument('prefix', help="Hand-history file prefix (all matching .hh files are replayed)")
+    replay.add_argument('--limit', type=int, default=None, help="Replay at most this many hands")
+    replay.add_argument('--fail-fast', action='store_true', help="Stop at the first divergent hand")
+    replay.add_argument('--verify', action='store_true',
+                        help="Re-execute every hand in the engine (also checks turn order and winners)")
+
+    analytics = subparsers.add_parser('analytics', help="Columnar store of recorded hands with aggregate queries")
+    analytics_commands = analytics.add_subparsers(dest='analytics_command', required=True)
+    ingest = analytics_commands.add_parser('ingest', help="Add new hands from hand-history files to the store")
+    ingest.add_argument('prefix', help="Hand-history file prefix (all matching .hh files are read)")
+    ingest.add_argument('--store', default='analytics', help="Store directory")
+    ingest.add_argument('--partition', default=None,
+                        help="Partition (run or date) to add the hands to (default: prefix file name)")
+    query = analytics_commands.add_parser('query', help="Print an aggregate over the stored hands")
+    query.add_argument('query', choices=['categories', 'pots', 'folds'],
+                       help="categories: win rate by seat and hand category, pots: average pot by players, "
+                            "folds: fold frequency per player")
+    query.add_argument('--store', default='analytics', help="Store directory")
+    query.add_argument('--partition', action='append', default=None,
+                       help="Only this partition (repeatable; default: all)")
+
+    vector = subparsers.add_parser('vector', help="Play many bot-only tables at once as NumPy arrays")
+    vector.add_argument('--tables', type=int, default=1000, help="Number of tables")
+    vector.add_argument('--rounds', type=int, default=100, help="Rounds played on every table")
+    vector.add_argument('--players', type=int, default=6, choices=range(2, 7), metavar='2-6',
+                        help="Players per table")
+    vector.add_argument('--seed', type=int, default=None, help="Random seed")
+    vector.add_argument('--exchange', default='solver', choices=['solver', 'none'],
+                        help="Bot card exchange: exact discard solver or no exchange")
+    vector.add_argument('--check', type=int, default=0,
+                        help="Replay this many tables in GameEngine and compare the results")
+
+    train = subparsers.add_parser('train', help="Train a bot betting strategy with Monte Carlo CFR")
+    train.add_argument('--output', default=None, help="Strategy file (default: data/cfr_strategy.bin)")
+    train.add_argument('--iterations', type=int, default=2000, help="Sampled CFR iterations in total")
+    train.add_argument('--workers', type=int, default=1, help="Worker processes (0 = all cores)")
+    train.add_argument('--batch', type=int, default=20000, help="Deals sampled per iteration")
+    train.add_argument('--buckets', type=int, default=10, help="Hand-strength buckets before and after the draw")
+    train.add_argument('--cap', type=int, default=3, help="Raises allowed per betting round")
+    train.add_argument('--epoch', type=int, default=100,
+                       help="Iterations per worker between averaging and checkpoints")
+    train.add_argument('--checkpoint', default=None, help="Checkpoint file (default: <output>.ckpt.npz)")
+    train.add_argument('--resume', action='store_true', help="Continue from the checkpoint if it exists")
+    train.add_argument('--seed', type=int, default=None, help="Random seed")
+
+    decks = subparsers.add_parser('decks', help="Generate a file of pre-shuffled decks")
+    decks.add_argument('output', help="Output .npy file")
+    decks.add_argument('--count', type=int, default=100000, help="Number of decks")
+    decks.add_argument('--seed', type=int, default=None, help="Random seed")
+
+    serve = subparsers.add_parser('serve', help="Host many tables for agents over TCP (line-delimited JSON)")
+    serve.add_argument('--host', default='127.0.0.1', help="Address to listen on")
+    serve.add_argument('--port', type=int, default=8765, help="Port to listen on")
+    serve.add_argument('--max-tables', type=int, default=1000,
+                       help="Concurrent tables; further connections wait for a free slot")
+    serve.add_argument('--timeout', type=float, default=10.0,
+                       help="Seconds to wait for a decision before check/fold is applied")
+    serve.add_argument('--players', type=int, default=6, choices=range(2, 7), metavar='2-6',
+                       help="Default players per table")
+    serve.add_argument('--seed', type=int, default=None, help="Master seed for table RNG streams")
+
+    loadgen = subparsers.add_parser('loadgen', help="Open many bot connections against the table server")
+    loadgen.add_argument('--connections', type=int, default=1000, help="Number of agents (one table each)")
+    loadgen.add_argument('--rounds', type=int, default=20, help="Rounds per table")
+    loadgen.add_argument('--players', type=int, default=6, choices=range(2, 7), metavar='2-6',
+                         help="Players per table")
+    loadgen.add_argument('--concurrency', type=int, default=1000, help="Connections open at the same time")
+    loadgen.add_argument('--host', default=None,
+                         help="Server address (default: start a server in this process)")
+    loadgen.add_argument('--port', type=int, default=8765, help="Server port")
+    loadgen.add_argument('--seed', type=int, default=0, help="Seed of the first agent")
+
+    bench = subparsers.add_parser('bench', help="Run the benchmark suite")
+    bench.add_argument('names', nargs='*', help="Run only benchmarks whose name contains one of these")
+    bench.add_argument('--output', default=None, help="Write results as JSON to this file")
+    bench.add_argument('--baseline', default=None, help="JSON results to compare against")
+    bench.add_argument('--threshold', type=float, default=0.10,
+                       help="Relative slowdown reported as a regression")
+    bench.add_argument('--seed', type=int, default=2025, help="Seed for the workloads")
+    bench.add_argument('--quick', action='store_true', help="Fewer iterations (smoke run)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Funkcja główna uruchamiająca GUI lub symulację bez interfejsu."""
+    args = parse_args(argv)
+    if args.command == 'simulate':
+        # Symulacja nie importuje tkinter
+        from simulate import run
+        from cfr import StrategyFormatError
+        try:
+            window = None
+            if args.profile_window:
+                window = tuple(int(part) for part in args.profile_window.split(':'))
+                if len(window) != 2:
+                    raise ValueError("Profile window must be START:END")
+            return run(args.hands, args.players, args.seed, args.policy,
+                       args.workers or None, args.shard_size, args.rng, args.decks,
+                       args.profile, window, args.profile_output, args.tables, args.batch_policy,
+                       args.history, args.bot_policy)
+        except (ValueError, ImportError, OSError, StrategyFormatError) as e:
+            print(f"Error: {e}")
+            return 2
+    if args.command == 'history':
+        from hand_history import HistoryFormatError, run as run_history
+        try:
+            return run_history(args.prefix, args.limit or None)
+        except (HistoryFormatError, OSError) as e:
+            print(f"Error: {e}")
+            return 2
+    if args.command == 'replay':
+        from hand_history import HistoryFormatError
+        from replay import run as run_replay
+        try:
+            return run_replay(args.prefix, args.limit, args.fail_fast, args.verify)
+        except (HistoryFormatError, OSError) as e:
+            print(f"Error: {e}")
+            return 2
+    if args.command == 'analytics':
+        from hand_history import HistoryFormatError
+        from analytics import StoreError, run_ingest, run_query
+        try:
+            if args.analytics_command == 'ingest':
+                return run_ingest(args.store, args.prefix, args.partition)
+            return run_query(args.store, args.query, args.partition)
+        except (HistoryFormatError, StoreError, ImportError, OSError) as e:
+            print(f"Error: {e}")
+            return 2
+    if args.command == 'vector':
+        from vector_engine import run as run_vector
+        try:
+            return run_vector(args.tables, args.rounds, args.players, args.seed, args.exchange, args.check)
+        except (ValueError, ImportError) as e:
+            print(f"Error: {e}")
+            return 2
+    if args.command == 'serve':
+        from server import run as run_server
+        try:
+            return run_server(args.host, args.port, args.max_tables, args.timeout, args.players, args.seed)
+        except OSError as e:
+            print(f"Error: {e}")
+            return 2
+    if args.command == 'loadgen':
+        from loadgen import run as run_loadgen
+        try:
+            return run_loadgen(args.connections, args.rounds, args.players, args.concurrency,
+                               args.host, args.port, args.seed)
+        except OSError as e:
+            print(f"Error: {e}")
+            return 2
+    if args.command == 'bench':
+        from benchmarks import run as run_benchmarks
+        try:
+            return run_benchmarks(args.names, args.output, args.baseline, args.threshold,
+                                  args.seed, args.quick)
+        except (ValueError, OSError, KeyError) as e:
+            print(f"Error: {e}")
+            return 2
+    if args.command == 'train':
+        from cfr import DEFAULT_STRATEGY_PATH, StrategyFormatError, run as run_train
+        try:
+            return run_train(args.output or DEFAULT_STRATEGY_PATH, args.iterations, args.workers or None,
+                             args.batch, args.seed, args.buckets, args.cap, args.epoch, args.checkpoint,
+                             args.resume)
+        except (ValueError, ImportError, OSError, StrategyFormatError) as e:
+            print(f"Error: {e}")
+            return 2
+    if args.command == 'decks':
+        from deck_sources import write_permutation_file
+        try:
+            path = write_permutation_file(args.output, args.count, args.seed)
+        except (ImportError, OSError) as e:
+            print(f"Error: {e}")
+            return 2
+        print(f"Wrote {args.count} decks to {path}")
+        return 0
+
     try:
+        from gui import PokerGUI
         # Utworzenie i uruchomienie aplikacji GUI
         app = PokerGUI()
         app.run()
@@ -18,4 +231,4 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
@@ -1,13 +1,37 @@
 import random
 
+from hand_evaluator import RANKS, SUITS, RANK_VALUES, card_code, HandEvaluator
+
 
 class Card:
+    """Karta jako niezmienny singleton - każda z 52 kart istnieje tylko raz."""
+    __slots__ = ('rank', 'suit', 'value', 'index', 'code')
+
     # Słownik symboli unicode dla kolorów kart
     unicode_dict = {'s': '\u2660', 'h': '\u2665', 'd': '\u2666', 'c': '\u2663'}
-
-    def __init__(self, rank, suit):
-        self.rank = rank
-        self.suit = suit
+    _interned = {}
+
+    def __new__(cls, rank, suit):
+        card = cls._interned.get((rank, suit))
+        if card is None:
+            if rank not in RANK_VALUES or suit not in SUITS:
+                raise ValueError(f"Invalid card: {rank}{suit}")
+            card = super().__new__(cls)
+            card.rank = rank
+            card.suit = suit
+            card.value = RANK_VALUES[rank]
+            card.index = SUITS.index(suit) * 13 + card.value - 2
+            card.code = card_code(rank, suit)
+            cls._interned[(rank, suit)] = card
+        return card
+
+    def __reduce__(self):
+        return (Card, (self.rank, self.suit))
+
+    @staticmethod
+    def from_index(index):
+        """Zwracanie karty o podanym indeksie (0-51)."""
+        return FULL_DECK[index]
 
     def get_value(self):
         return (self.rank, self.suit)
@@ -16,35 +40,83 @@ class Card:
         return f"{self.rank}{self.unicode_dict[self.suit]}"
 
 
+FULL_DECK = tuple(Card(rank, suit) for suit in SUITS for rank in RANKS)
+
+
 class Deck:
+    """Talia w stałej tablicy 52 miejsc używanej jako bufor cykliczny.
+
+    Karty leżą na pozycjach od spodu (`_bottom`) w górę; dobieranie zdejmuje
+    kartę z wierzchu, a odrzucone karty trafiają pod spód - obie operacje O(1).
+    """
+    SIZE = 52
+
     def __init__(self):
-        self.cards = []
-        ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        suits = ['s', 'h', 'd', 'c']
+        self._slots = list(FULL_DECK)
+        self._bottom = 0
+        self._count = self.SIZE
 
-        for suit in suits:
-            for rank in ranks:
-                self.cards.append(Card(rank, suit))
+    @property
+    def cards(self):
+        """Karty w talii od spodu do wierzchu (kopia)."""
+        end = self._bottom + self._count
+        if end <= self.SIZE:
+            return self._slots[self._bottom:end]
+        return self._slots[self._bottom:] + self._slots[:end - self.SIZE]
+
+    @cards.setter
+    def cards(self, cards):
+        if len(cards) > self.SIZE:
+            raise ValueError("Too many cards for a deck")
+        self._slots[:len(cards)] = cards
+        self._bottom = 0
+        self._count = len(cards)
+
+    def __len__(self):
+        return self._count
 
     def __str__(self):
         return ', '.join(str(card) for card in self.cards)
 
-    def shuffle(self):
-        random.shuffle(self.cards)
+    def reset(self, rng=None, order=None):
+        """Przywrócenie pełnej talii: w podanym ułożeniu (indeksy kart od spodu) lub przetasowanej w miejscu."""
+        self._bottom = 0
+        self._count = self.SIZE
+        if order is not None:
+            if len(order) != self.SIZE:
+                raise ValueError("Deck order must contain 52 cards")
+            self._slots[:] = [card if isinstance(card, Card) else FULL_DECK[card] for card in order]
+            return
+        self._slots[:] = FULL_DECK
+        (rng or random).shuffle(self._slots)
+
+    def shuffle(self, rng=None):
+        rng = rng or random
+        if self._count == self.SIZE and self._bottom == 0:
+            rng.shuffle(self._slots)
+        else:
+            cards = self.cards
+            rng.shuffle(cards)
+            self.cards = cards
 
     def deal(self, players, cards_per_player=5):
         for _ in range(cards_per_player):
             for player in players:
-                if self.cards:
-                    player.take_card(self.cards.pop())
+                if self._count:
+                    player.take_card(self.draw())
 
     def draw(self):
-        if self.cards:
-            return self.cards.pop()
+        if self._count:
+            self._count -= 1
+            return self._slots[(self._bottom + self._count) % self.SIZE]
         return None
 
     def discard_to_bottom(self, card):
-        self.cards.insert(0, card)
+        if self._count == self.SIZE:
+            raise ValueError("Deck is full")
+        self._bottom = (self._bottom - 1) % self.SIZE
+        self._slots[self._bottom] = card
+        self._count += 1
 
 
 class Player:
@@ -52,11 +124,14 @@ class Player:
         self.__stack = money
         self.__name = name
         self.__hand = []
+        # Klucz siły ręki liczony przy pierwszym odczycie, kasowany przy każdej zmianie ręki
+        self.__strength = None
         self.is_active = True
         self.current_bet = 0
 
     def take_card(self, card):
         self.__hand.append(card)
+        self.__strength = None
 
     @property
     def stack(self):
@@ -77,6 +152,18 @@ class Player:
     @hand.setter
     def hand(self, new_hand):
         self.__hand = new_hand[:]
+        self.__strength = None
+
+    @property
+    def hand_size(self):
+        return len(self.__hand)
+
+    @property
+    def strength(self):
+        """Klucz siły ręki (HandEvaluator.evaluate), obliczany najwyżej raz na zmianę ręki."""
+        if self.__strength is None:
+            self.__strength = HandEvaluator.evaluate(self.__hand)
+        return self.__strength
 
     def get_stack_amount(self):
         return self.__stack
@@ -85,6 +172,7 @@ class Player:
         if 0 <= idx < len(self.__hand):
             old_card = self.__hand[idx]
             self.__hand[idx] = card
+            self.__strength = None
             return old_card
         raise IndexError("Invalid card index")
 
@@ -103,6 +191,7 @@ class Player:
 
     def clear_hand(self):
         self.__hand = []
+        self.__strength = None
         self.current_bet = 0
 
     @classmethod
@@ -0,0 +1,192 @@
+from typing import List
+
+from poker import Player
+
+try:
+    import numpy as np
+except ImportError:  # Strategie wsadowe wymagają NumPy
+    np = None
+
+
+# Kody akcji zwracane przez BatchPolicy.decide_batch
+ACTION_FOLD = 0
+ACTION_CALL = 1  # check, gdy nie ma czego sprawdzać
+ACTION_RAISE = 2
+
+
+class Policy:
+    """Strategia sterująca miejscem gracza - decyzje o zakładach i wymianie kart."""
+
+    def act(self, engine, player: Player, current_bet: int) -> str:
+        """Zwracanie akcji: check/call/fold lub 'raise <kwota>'."""
+        raise NotImplementedError
+
+    def exchange(self, engine, player: Player) -> List[int]:
+        """Zwracanie indeksów kart do wymiany."""
+        raise NotImplementedError
+
+
+class RandomPolicy(Policy):
+    """Prosta losowa logika (dotychczasowe zachowanie gracza bez GUI)."""
+
+    def act(self, engine, player: Player, current_bet: int) -> str:
+        call_amount = max(0, current_bet - player.current_bet)
+        if call_amount == 0:
+            return "check"
+        elif call_amount >= player.stack:
+            return "call"
+        else:
+            if engine.rng.random() < 0.7:
+                return "call"
+            else:
+                return "fold"
+
+    def exchange(self, engine, player: Player) -> List[int]:
+        num_cards = engine.rng.randint(0, 3)
+        if num_cards == 0:
+            return []
+        return engine.rng.sample(range(5), num_cards)
+
+
+class BotPolicy(Policy):
+    """Ta sama logika, której domyślnie używają boty silnika."""
+
+    def act(self, engine, player: Player, current_bet: int) -> str:
+        return engine._default_bot_action(player, current_bet)
+
+    def exchange(self, engine, player: Player) -> List[int]:
+        return engine._default_bot_exchange(player)
+
+
+class PassivePolicy(Policy):
+    """Zawsze check/call, bez wymiany kart."""
+
+    def act(self, engine, player: Player, current_bet: int) -> str:
+        return "check" if current_bet <= player.current_bet else "call"
+
+    def exchange(self, engine, player: Player) -> List[int]:
+        return []
+
+
+class StrategyPolicy(Policy):
+    """Zakłady według strategii wytrenowanej przez cfr.py (plik z cfr.write_strategy), wymiana jak u botów.
+
+    Stan gry jest sprowadzany do węzła abstrakcyjnej gry dwóch graczy: runda
+    zakładów, liczba podbić o big blinda w rundzie i - po wymianie - liczba
+    podbić z rundy przed wymianą, szacowana z puli przypadającej na gracza.
+    Akcja to odczyt progów z płaskiej tablicy dla koszyka siły ręki (O(1)).
+    Wczytane pliki są współdzielone przez wszystkie instancje w procesie.
+    """
+    _strategies = {}
+
+    def __init__(self, path: str = None):
+        from cfr import DEFAULT_STRATEGY_PATH, load_strategy
+        path = path or DEFAULT_STRATEGY_PATH
+        if path not in self._strategies:
+            self._strategies[path] = load_strategy(path)
+        self.strategy = self._strategies[path]
+
+    def act(self, engine, player: Player, current_bet: int) -> str:
+        from cfr import lookup_action
+        big_blind = engine.big_blind
+        call_amount = max(0, current_bet - player.current_bet)
+        if engine.betting_round == 0:
+            prior_raises = 0
+            raises = max(0, current_bet - big_blind) // big_blind
+        else:
+            # Pula sprzed tej rundy na gracza, któremu rozdano karty: (1 + podbicia) big blindów
+            players = engine.players
+            carried = engine.pot - sum(p.current_bet for p in players)
+            dealt = sum(1 for p in players if p.hand_size) or 1
+            prior_raises = max(0, round(carried / dealt / big_blind) - 1)
+            raises = current_bet // big_blind
+        action = lookup_action(self.strategy, engine.betting_round, prior_raises, raises,
+                               player.strength, engine.rng.random())
+        if action == ACTION_RAISE and call_amount + big_blind > player.stack:
+            action = ACTION_CALL
+        elif action == ACTION_FOLD and call_amount == 0:
+            action = ACTION_CALL
+        return action_text(action, big_blind, call_amount)
+
+    def exchange(self, engine, player: Player) -> List[int]:
+        return engine._default_bot_exchange(player)
+
+
+POLICIES = {
+    'random': RandomPolicy,
+    'bot': BotPolicy,
+    'passive': PassivePolicy,
+    'cfr': StrategyPolicy,
+}
+
+
+class BatchPolicy:
+    """Strategia odpowiadająca jednym wywołaniem na decyzje zakładów botów z wielu stołów.
+
+    Wejście to tablice jednakowej długości: klucze siły rąk (HandEvaluator.evaluate),
+    kwoty do sprawdzenia, stawki graczy, wielkości puli oraz liczby losowe z [0, 1)
+    pobrane ze strumieni stołów. Wynik to para tablic: kody akcji (ACTION_*)
+    i kwoty podbicia (istotne tylko dla ACTION_RAISE).
+    """
+
+    def decide_batch(self, keys, call_amounts, stacks, pots, uniforms):
+        raise NotImplementedError
+
+
+class ReferenceBatchPolicy(BatchPolicy):
+    """Wektorowa wersja logiki bota z GameEngine._default_bot_action.
+
+    Dla tych samych liczb losowych daje dokładnie te same decyzje, więc wyniki
+    symulacji wsadowej i zwykłej są identyczne.
+    """
+
+    def __init__(self, big_blind: int = 50, small_blind: int = 25):
+        if np is None:
+            raise ImportError("NumPy is required for batch policies")
+        self.big_blind = big_blind
+        self.small_blind = small_blind
+
+    def decide_batch(self, keys, call_amounts, stacks, pots, uniforms):
+        call_amounts = np.asarray(call_amounts)
+        stacks = np.asarray(stacks)
+        uniforms = np.asarray(uniforms)
+        free = call_amounts == 0
+        all_in = ~free & (call_amounts >= stacks)
+        other = ~free & ~all_in
+        actions = np.full(len(uniforms), ACTION_FOLD, dtype=np.int8)
+        actions[free] = np.where(uniforms[free] < 0.8, ACTION_CALL, ACTION_RAISE)
+        actions[all_in] = np.where(uniforms[all_in] < 0.3, ACTION_CALL, ACTION_FOLD)
+        actions[other] = np.select([uniforms[other] < 0.5, uniforms[other] < 0.8],
+                                   [ACTION_CALL, ACTION_FOLD], ACTION_RAISE)
+        amounts = np.where(actions == ACTION_RAISE, self.big_blind, 0)
+        return actions, amounts
+
+
+BATCH_POLICIES = {
+    'reference': ReferenceBatchPolicy,
+}
+
+
+def action_text(action: int, amount: int, call_amount: int) -> str:
+    """Zamiana kodu akcji na akcję silnika (check/call/fold/'raise <kwota>')."""
+    if action == ACTION_RAISE:
+        return f"raise {amount}"
+    if action == ACTION_CALL:
+        return "check" if call_amount == 0 else "call"
+    return "fold"
+
+
+def get_batch_policy(name: str, small_blind: int = 25, big_blind: int = 50) -> BatchPolicy:
+    """Tworzenie strategii wsadowej na podstawie nazwy, dla blindów stołów, przy których gra."""
+    try:
+        return BATCH_POLICIES[name](big_blind=big_blind, small_blind=small_blind)
+    except KeyError:
+        raise ValueError(f"Unknown batch policy: {name}")
+
+
+def get_policy(name: str) -> Policy:
+    """Tworzenie strategii na podstawie nazwy."""
+    try:
+        return POLICIES[name]()
+    except KeyError:
+        raise ValueError(f"Unknown policy: {name}")
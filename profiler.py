@@ -0,0 +1,171 @@
+import cProfile
+import json
+import math
+from collections import Counter
+from time import perf_counter_ns
+from typing import Dict, Optional, Tuple
+
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+# Liczba kubełków histogramu na każde podwojenie czasu (rozdzielczość ok. 9%)
+BUCKETS_PER_OCTAVE = 8
+
+
+def new_histogram() -> dict:
+    """Pusty histogram czasów fazy w kubełkach logarytmicznych (BUCKETS_PER_OCTAVE na podwojenie)."""
+    return {'count': 0, 'total_ns': 0, 'min_ns': None, 'max_ns': 0, 'buckets': Counter()}
+
+
+def merge_histograms(total: Dict[str, dict], part: Dict[str, dict]) -> Dict[str, dict]:
+    """Dodanie histogramów faz (np. z innego procesu) do sumy."""
+    for phase, hist in part.items():
+        target = total.setdefault(phase, new_histogram())
+        target['count'] += hist['count']
+        target['total_ns'] += hist['total_ns']
+        if hist['min_ns'] is not None:
+            target['min_ns'] = hist['min_ns'] if target['min_ns'] is None else min(target['min_ns'], hist['min_ns'])
+        target['max_ns'] = max(target['max_ns'], hist['max_ns'])
+        target['buckets'].update(hist['buckets'])
+    return total
+
+
+def percentile(hist: dict, fraction: float) -> int:
+    """Przybliżony percentyl (górna granica kubełka) w nanosekundach."""
+    if not hist['count']:
+        return 0
+    needed = fraction * hist['count']
+    seen = 0
+    for bucket in sorted(hist['buckets']):
+        seen += hist['buckets'][bucket]
+        if seen >= needed:
+            return min(int(2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE)), hist['max_ns'])
+    return hist['max_ns']
+
+
+def format_histograms(histograms: Dict[str, dict]) -> str:
+    """Tabela czasów faz: liczba, średnia, p50, p99 i maksimum w mikrosekundach oraz udział w czasie rund."""
+    grand_total = histograms.get('round', {}).get('total_ns') or 1
+    lines = [f"{'phase':<14}{'count':>9}{'mean us':>11}{'p50 us':>10}{'p99 us':>10}{'max us':>11}{'share':>8}"]
+    phases = [phase for phase in histograms if phase != 'round'] + (['round'] if 'round' in histograms else [])
+    for phase in phases:
+        hist = histograms[phase]
+        mean = hist['total_ns'] / hist['count'] if hist['count'] else 0
+        lines.append(f"{phase:<14}{hist['count']:>9}{mean / 1000:>11.1f}"
+                     f"{percentile(hist, 0.5) / 1000:>10.1f}{percentile(hist, 0.99) / 1000:>10.1f}"
+                     f"{hist['max_ns'] / 1000:>11.1f}{hist['total_ns'] / grand_total:>8.1%}")
+    return "\n".join(lines)
+
+
+class PhaseProfiler:
+    """Pomiar czasu faz `GameEngine.play_round`.
+
+    Silnik wywołuje `start_round()`, po każdej fazie `lap(nazwa)` i na końcu
+    `end_round()`; czas od poprzedniego znacznika trafia do fazy o podanej nazwie.
+    Dla rund z okna `window` (numery rund, koniec wyłącznie) zbierany jest
+    dodatkowo cProfile i oś czasu faz w formacie speedscope.
+    """
+
+    def __init__(self, window: Optional[Tuple[int, int]] = None, first_round: int = 0):
+        self.histograms = {}
+        self.window = window
+        self.round_index = first_round
+        self.cprofile = None
+        self._last = None
+        self._round_start = None
+        self._round_times = {}
+        self._events = []
+
+    def _in_window(self) -> bool:
+        return self.window is not None and self.window[0] <= self.round_index < self.window[1]
+
+    def start_round(self) -> None:
+        self._round_times = {}
+        if self._in_window():
+            if self.cprofile is None:
+                self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self._round_start = self._last = perf_counter_ns()
+
+    def lap(self, phase: str) -> None:
+        """Zamknięcie bieżącej fazy; poza rundą nic nie robi."""
+        if self._last is None:
+            return
+        now = perf_counter_ns()
+        self._round_times[phase] = self._round_times.get(phase, 0) + now - self._last
+        if self._in_window():
+            self._events.append((phase, self._last, now))
+        self._last = now
+
+    def end_round(self) -> None:
+        if self._last is None:
+            return
+        now = perf_counter_ns()
+        self._round_times['round'] = now - self._round_start
+        for phase, elapsed in self._round_times.items():
+            hist = self.histograms.get(phase)
+            if hist is None:
+                hist = self.histograms[phase] = new_histogram()
+            hist['count'] += 1
+            hist['total_ns'] += elapsed
+            hist['min_ns'] = elapsed if hist['min_ns'] is None else min(hist['min_ns'], elapsed)
+            hist['max_ns'] = max(hist['max_ns'], elapsed)
+            hist['buckets'][int(math.log2(elapsed or 1) * BUCKETS_PER_OCTAVE)] += 1
+        if self._in_window():
+            self.cprofile.disable()
+            self._events.append((f"round {self.round_index}", self._round_start, now))
+        self._last = self._round_start = None
+        self.round_index += 1
+
+    def dump_pstats(self, path: str) -> bool:
+        """Zapis danych cProfile z okna (do odczytu przez pstats/snakeviz); False, gdy okno było puste."""
+        if self.cprofile is None:
+            return False
+        self.cprofile.dump_stats(path)
+        return True
+
+    def speedscope(self) -> dict:
+        """Oś czasu rund i faz z okna w formacie 'evented' programu speedscope."""
+        frames = []
+        frame_ids = {}
+        opens = []
+        for name, start, end in self._events:
+            if name not in frame_ids:
+                frame_ids[name] = len(frames)
+                frames.append({'name': name})
+            # Runda zaczyna się razem ze swoją pierwszą fazą, ale ma ją zawierać
+            is_round = name.startswith("round ")
+            opens.append((start, 0 if is_round else 1, -end, frame_ids[name], end))
+        events = []
+        stack = []
+        origin = opens and min(item[0] for item in opens) or 0
+        for start, _, _, frame, end in sorted(opens):
+            while stack and stack[-1][1] <= start:
+                closed_frame, closed_end = stack.pop()
+                events.append({'type': 'C', 'frame': closed_frame, 'at': (closed_end - origin) / 1000})
+            events.append({'type': 'O', 'frame': frame, 'at': (start - origin) / 1000})
+            stack.append((frame, end))
+        while stack:
+            closed_frame, closed_end = stack.pop()
+            events.append({'type': 'C', 'frame': closed_frame, 'at': (closed_end - origin) / 1000})
+        return {
+            '$schema': SPEEDSCOPE_SCHEMA,
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'evented',
+                'name': 'play_round phases',
+                'unit': 'microseconds',
+                'startValue': 0,
+                'endValue': events[-1]['at'] if events else 0,
+                'events': events,
+            }],
+            'name': 'play_round phases',
+            'exporter': 'poker profiler',
+        }
+
+    def dump_speedscope(self, path: str) -> bool:
+        """Zapis osi czasu faz z okna do pliku JSON dla speedscope; False, gdy okno było puste."""
+        if not self._events:
+            return False
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.speedscope(), f)
+        return True
@@ -0,0 +1,454 @@
+import time
+from itertools import permutations
+from typing import List, Optional
+
+from poker import Player, Deck
+from game_engine import GameEngine
+from hand_evaluator import HandEvaluator
+from deck_sources import DeckSource
+from hand_history import (EVENT_DEAL, EVENT_FOLD, EVENT_CALL, EVENT_RAISE, EVENT_EXCHANGE, EVENT_AWARD,
+                          EVENT_BLIND, EVENT_NAMES, format_hand, history_paths, parse_hand,
+                          read_hand_bodies, _read_varint)
+
+
+class ReplayDivergence(Exception):
+    """Błąd rozbieżności odtwarzanego rozdania z zapisem"""
+    pass
+
+
+class ReplayEngine(GameEngine):
+    """GameEngine, którego decyzje, talia i losowania pochodzą z zapisanego rozdania."""
+
+    def __init__(self, players: List[Player], replayer: 'HandReplayer'):
+        super().__init__(players, Deck(), deck_source=replayer, rng=replayer, recorder=replayer)
+        self.replayer = replayer
+
+    def _get_human_action(self, player: Player, current_bet: int) -> str:
+        return self.replayer.action(player)
+
+    def _get_bot_action(self, player: Player, current_bet: int) -> str:
+        return self.replayer.action(player)
+
+    def _get_human_exchange(self) -> List[int]:
+        return self.replayer.exchange_indices(next(p for p in self.players if p.name == "You"))
+
+    def _get_bot_exchange(self, player: Player) -> List[int]:
+        return self.replayer.exchange_indices(player)
+
+
+class HandReplayer(DeckSource):
+    """Ponowne wykonanie zapisanych rozdań przez silnik gry.
+
+    Silnik dostaje stan stołu z zapisu, talię ułożoną tak, by rozdał zapisane
+    karty, a decyzje graczy i wybór gracza przy reszcie z podziału puli są
+    odczytywane z zapisu - bez generatora losowego, strategii i solvera wymiany.
+    Replayer jest jednocześnie rejestratorem silnika: każde zdarzenie, które
+    silnik zgłasza (blind, rozdanie, akcja, wymiana, wypłata), musi być równe
+    kolejnemu zdarzeniu z zapisu, a suma żetonów (`verify_total_chips`) jest
+    sprawdzana po każdym zdarzeniu licytacji i na końcu rozdania. Pierwsza
+    różnica przerywa rozdanie wyjątkiem ReplayDivergence.
+    """
+
+    def __init__(self):
+        self.hand = None
+        self.events = []
+        self.position = 0
+        self.expected_total = 0
+        self.engine = None
+        self._engines = {}
+        self._seats = {}
+
+    def replay_hand(self, hand: dict):
+        """Odtworzenie jednego rozdania (słownik z hand_history.read_hands); zwraca wynik play_round."""
+        self.hand = hand
+        self.events = hand['events']
+        self.position = 0
+        engine = self._engines.get(hand['names'])
+        if engine is None:
+            players = [Player(0, name) for name in hand['names']]
+            engine = self._engines[hand['names']] = ReplayEngine(players, self)
+        self.engine = engine
+        self._seats = {id(p): seat for seat, p in enumerate(engine.players)}
+        for player, stack in zip(engine.players, hand['stacks']):
+            player.stack = stack
+        engine.dealer_position = hand['dealer']
+        engine.small_blind = hand['small_blind']
+        engine.big_blind = hand['big_blind']
+        engine.pot = 0
+        engine.game_over = False
+        self.expected_total = sum(hand['stacks'])
+        winners = engine.play_round()
+        if not winners or winners[0][0] == "final_winner":
+            raise ReplayDivergence(self._where("engine ended the game instead of playing the hand"))
+        if winners[0][5] and self.position < len(self.events):
+            # Remis: wypłaty w zapisie oznaczają podział, akcje - dodatkową licytację
+            choice = "split" if self.events[self.position][0] == EVENT_AWARD else "continue"
+            engine.handle_draw_resolution(choice)
+        if self.position != len(self.events):
+            raise ReplayDivergence(self._where(f"{len(self.events) - self.position} recorded events "
+                                               f"were not replayed, next: {self._describe(self._peek())}"))
+        self._check_total()
+        return winners
+
+    # Źródło talii: zapisane karty na wierzchu w kolejności dobierania
+    def next_order(self):
+        drawn = []
+        for event in self.events:
+            if event[0] == EVENT_DEAL:
+                drawn += event[2]
+            elif event[0] == EVENT_EXCHANGE:
+                drawn += event[3]
+        used = set(drawn)
+        return [card for card in range(52) if card not in used] + drawn[::-1]
+
+    # Decyzje graczy z zapisu
+    def action(self, player: Player) -> str:
+        event = self._peek()
+        seat = self._seats[id(player)]
+        if event is None or event[0] not in (EVENT_FOLD, EVENT_CALL, EVENT_RAISE) or event[1] != seat:
+            raise ReplayDivergence(self._where(f"engine asked {player.name} to act, "
+                                               f"record has {self._describe(event)}"))
+        if event[0] == EVENT_FOLD:
+            return "fold"
+        if event[0] == EVENT_RAISE:
+            return f"raise {event[2]}"
+        return "call" if event[2] else "check"
+
+    def exchange_indices(self, player: Player) -> List[int]:
+        event = self._peek()
+        if event is None or event[0] != EVENT_EXCHANGE or event[1] != self._seats[id(player)]:
+            raise ReplayDivergence(self._where(f"engine asked {player.name} to exchange, "
+                                               f"record has {self._describe(event)}"))
+        return list(event[2])
+
+    # Zamiast generatora losowego: reszta z podziału puli trafia do gracza z zapisu
+    def choice(self, seq):
+        event = self._peek()
+        if event is not None and event[0] == EVENT_AWARD:
+            for player in seq:
+                if self._seats[id(player)] == event[1]:
+                    return player
+        raise ReplayDivergence(self._where(f"engine chose a player at random, record has {self._describe(event)}"))
+
+    def random(self):
+        raise ReplayDivergence(self._where("engine drew a random number during replay"))
+
+    # Zdarzenia zgłaszane przez silnik (interfejs HandHistoryWriter)
+    def begin_hand(self, engine) -> None:
+        pass
+
+    def blind(self, seat: int, amount: int) -> None:
+        self._match((EVENT_BLIND, seat, amount))
+
+    def deal(self, players, cards) -> None:
+        mask = 0
+        for seat, player in enumerate(players):
+            if player.is_active:
+                mask |= 1 << seat
+        self._match((EVENT_DEAL, mask, [card.index for card in cards]))
+
+    def fold(self, seat: int) -> None:
+        self._match((EVENT_FOLD, seat))
+
+    def call(self, seat: int, amount: int) -> None:
+        self._match((EVENT_CALL, seat, amount))
+
+    def raise_by(self, seat: int, amount: int) -> None:
+        self._match((EVENT_RAISE, seat, amount))
+
+    def exchange(self, seat: int, indices, hand) -> None:
+        self._match((EVENT_EXCHANGE, seat, list(indices), [hand[i].index for i in indices]), check_total=False)
+
+    def award(self, player: Player, amount: int) -> None:
+        # Pula jest zerowana dopiero po wypłatach - suma żetonów sprawdzana jest na końcu rozdania
+        self._match((EVENT_AWARD, self._seats[id(player)], amount), check_total=False)
+
+    def _peek(self):
+        return self.events[self.position] if self.position < len(self.events) else None
+
+    def _match(self, event, check_total: bool = True) -> None:
+        if self._peek() != event:
+            raise ReplayDivergence(self._where(f"engine did {self._describe(event)}, "
+                                               f"record has {self._describe(self._peek())}"))
+        self.position += 1
+        if check_total:
+            self._check_total()
+
+    def _check_total(self) -> None:
+        total = self.engine.verify_total_chips()
+        if total != self.expected_total:
+            raise ReplayDivergence(self._where(f"chip total is {total}, expected {self.expected_total}"))
+
+    def _describe(self, event) -> str:
+        if event is None:
+            return "no more events"
+        if event[0] == EVENT_DEAL:
+            return f"deal to seats {event[1]:b} {event[2]}"
+        return f"{EVENT_NAMES[event[0]]} by {self.hand['names'][event[1]]} {list(event[2:])}"
+
+    def _where(self, message: str) -> str:
+        return f"hand {self.hand['hand']}, event {self.position}: {message}"
+
+
+# Poprawne indeksy wymiany: różne pozycje 0-4 w dowolnej kolejności
+_EXCHANGE_INDICES = frozenset(bytes(indices) for size in range(6) for indices in permutations(range(5), size))
+
+
+def _expected_awards(live: int, dealt: int, cards, exchanges: list, pot: int) -> list:
+    """Wypłaty, które silnik powinien zapisać: (miejsce, kwota); miejsce None to reszta dla dowolnego gracza."""
+    if live & (live - 1) == 0:
+        return [(live.bit_length() - 1, pot)]
+    # Ręce po wymianie: rozdanie po jednej karcie kolejno dla aktywnych miejsc, potem wymienione karty
+    players = bin(dealt).count('1')
+    hands = {}
+    for seat in range(live.bit_length()):
+        if live >> seat & 1:
+            hands[seat] = list(cards[bin(dealt & ((1 << seat) - 1)).count('1')::players])
+    for seat, indices, drawn in exchanges:
+        hand = hands.get(seat)
+        if hand is not None:
+            for index, card in zip(indices, drawn):
+                hand[index] = card
+    best = -1
+    winners = []
+    for seat, hand in hands.items():
+        key = HandEvaluator.evaluate_indices(hand)
+        if key > best:
+            best = key
+            winners = [seat]
+        elif key == best:
+            winners.append(seat)
+    if len(winners) == 1:
+        return [(winners[0], pot)]
+    # Remis: silnik dzieli pulę między wszystkich graczy, którzy nie spasowali, resztę dostaje losowy z nich
+    share, remainder = divmod(pot, len(hands))
+    awards = [(seat, share) for seat in hands]
+    if remainder:
+        awards.append((None, remainder))
+    return awards
+
+
+def check_hand(body) -> Optional[str]:
+    """Szybkie sprawdzenie rekordu rozdania bez silnika; None albo opis pierwszej niezgodności.
+
+    Zdarzenia są stosowane wprost do małego stanu stołu (żetony graczy, stawki
+    w bieżącej licytacji, pula, użyte karty) prosto z bajtów rekordu: blind
+    i dopłata nie mogą przekroczyć żetonów gracza, sprawdzenie dopłaca dokładnie
+    brakującą kwotę (lub wszystkie żetony), podbicie jest dodatnie, karty się nie
+    powtarzają, a działa zawsze następny po ostatnim działającym (na początku
+    rundy - po rozdającym) gracz z kartami i żetonami, który nie spasował i nie
+    działał od ostatniego podbicia. Wypłaty muszą trafić do zwycięzcy (ręce po
+    wymianie ocenia HandEvaluator) lub przy remisie dzielić pulę jak silnik,
+    a pula musi się opróżnić. Decyzje graczy i moment końca licytacji sprawdza
+    dopiero silnik (HandReplayer).
+    """
+    hand_id, pos = _read_varint(body, 1)
+    try:
+        dealer = body[pos]
+        _, pos = _read_varint(body, pos + 1)
+        _, pos = _read_varint(body, pos)
+        count = body[pos]
+        pos += 1
+        stacks = []
+        chips_mask = 0
+        for seat in range(count):
+            stack = body[pos]
+            if stack < 0x80:
+                pos += 1
+            elif body[pos + 1] < 0x80:
+                stack = stack & 0x7f | body[pos + 1] << 7
+                pos += 2
+            else:
+                stack, pos = _read_varint(body, pos)
+            stacks.append(stack)
+            if stack:
+                chips_mask |= 1 << seat
+        bets = [0] * count
+        pot = current_bet = 0
+        chips = chips_mask  # maska miejsc, które mają jeszcze żetony
+        dealt = live = 0    # maski miejsc z kartami i tych z nich, które nie spasowały
+        pending = 0         # maska graczy, którzy muszą jeszcze działać w tej licytacji
+        turn = dealer
+        cards = b''
+        used = set()
+        exchanges = []
+        awards = None
+        awarded = 0
+        end = len(body)
+        while pos < end:
+            kind = body[pos]
+            seat = body[pos + 1]
+            pos += 2
+            if kind == EVENT_CALL or kind == EVENT_RAISE or kind == EVENT_FOLD:
+                if awards is not None:
+                    return f"hand {hand_id}: seat {seat} acted after the pot was awarded"
+                # next_seat(pending, turn) bez wywołania funkcji
+                higher = pending >> (turn + 1)
+                expected = turn + (higher & -higher).bit_length() if higher else (pending & -pending).bit_length() - 1
+                if seat != expected:
+                    return f"hand {hand_id}: seat {seat} acted in turn of seat {expected}"
+                turn = seat
+                bit = 1 << seat
+                if kind == EVENT_FOLD:
+                    live &= ~bit
+                    pending &= ~bit
+                    continue
+                amount = body[pos]
+                if amount < 0x80:
+                    pos += 1
+                else:
+                    amount, pos = _read_varint(body, pos)
+                stack = stacks[seat]
+                if kind == EVENT_CALL:
+                    owed = current_bet - bets[seat]
+                    if amount != (owed if owed < stack else stack):
+                        return f"hand {hand_id}: seat {seat} paid {amount} to call"
+                    pending &= ~bit
+                else:
+                    if amount <= 0:
+                        return f"hand {hand_id}: raise of {amount}"
+                    current_bet += amount
+                    amount = current_bet - bets[seat]
+                    if amount > stack:
+                        return f"hand {hand_id}: seat {seat} raised past its stack"
+                    pending = live & chips & ~bit
+                if amount == stack:
+                    chips &= ~bit
+                    pending &= ~bit
+                stacks[seat] = stack - amount
+                bets[seat] += amount
+                pot += amount
+            elif kind == EVENT_AWARD:
+                amount = body[pos]
+                if amount < 0x80:
+                    pos += 1
+                else:
+                    amount, pos = _read_varint(body, pos)
+                if awards is None:
+                    awards = _expected_awards(live, dealt, cards, exchanges, pot)
+                if awarded == len(awards):
+                    return f"hand {hand_id}: extra award of {amount} to seat {seat}"
+                winner, share = awards[awarded]
+                if winner is None:
+                    valid = any(player_seat == seat for player_seat, _ in awards[:-1])
+                else:
+                    valid = winner == seat
+                if share != amount or not valid:
+                    return f"hand {hand_id}: award of {amount} to seat {seat}, expected {share} to seat {winner}"
+                awarded += 1
+                stacks[seat] += amount
+                pot -= amount
+            elif awards is not None:
+                return f"hand {hand_id}: event {kind} after the pot was awarded"
+            elif kind == EVENT_EXCHANGE:
+                size = body[pos]
+                indices = body[pos + 1:pos + 1 + size]
+                if not live >> seat & 1 or indices not in _EXCHANGE_INDICES:
+                    return f"hand {hand_id}: invalid exchange by seat {seat}"
+                if size:
+                    drawn = body[pos + 1 + size:pos + 1 + 2 * size]
+                    held = len(used)
+                    used.update(drawn)
+                    if len(used) != held + size:
+                        return f"hand {hand_id}: repeated cards drawn"
+                    exchanges.append((seat, indices, drawn))
+                pos += 1 + 2 * size
+                # Po wymianie zaczyna się druga licytacja, znowu od gracza po rozdającym
+                bets = [0] * count
+                current_bet = 0
+                pending = live & chips
+                turn = dealer
+            elif kind == EVENT_DEAL:
+                # Zamiast miejsca maska aktywnych miejsc (varint)
+                dealt, pos = _read_varint(body, pos - 1)
+                size = body[pos]
+                if dealt != chips_mask or size != 5 * bin(dealt).count('1'):
+                    return f"hand {hand_id}: deal to seats {dealt:b} does not match the stacks"
+                cards = body[pos + 1:pos + 1 + size]
+                used = set(cards)
+                if len(used) != size:
+                    return f"hand {hand_id}: repeated cards dealt"
+                live = dealt
+                pending = live & chips
+                pos += 1 + size
+            elif kind == EVENT_BLIND:
+                amount = body[pos]
+                if amount < 0x80:
+                    pos += 1
+                else:
+                    amount, pos = _read_varint(body, pos)
+                stack = stacks[seat]
+                if not 0 < amount <= stack:
+                    return f"hand {hand_id}: blind of {amount} from a stack of {stack}"
+                if amount == stack:
+                    chips &= ~(1 << seat)
+                stacks[seat] = stack - amount
+                bets[seat] += amount
+                pot += amount
+                if bets[seat] > current_bet:
+                    current_bet = bets[seat]
+            else:
+                return f"hand {hand_id}: unknown event {kind}"
+    except IndexError:
+        return f"hand {hand_id}: truncated record or seat out of range"
+    if used and max(used) > 51:
+        return f"hand {hand_id}: invalid card {max(used)}"
+    if awards is None or awarded != len(awards):
+        return f"hand {hand_id}: pot of {pot} was not awarded as expected"
+    if pot:
+        return f"hand {hand_id}: {pot} chips left in the pot"
+    return None
+
+
+def replay_files(paths, limit: Optional[int] = None, fail_fast: bool = False, verify: bool = False) -> dict:
+    """Sprawdzenie rozdań z plików historii; raport z liczbą rozdań i listą rozbieżności (plik, rozdanie, opis).
+
+    Rozdania są sprawdzane szybko (`check_hand`), a w silniku odtwarzane są tylko te,
+    w których szybkie sprawdzenie znalazło niezgodność - albo wszystkie przy `verify`.
+    """
+    replayer = HandReplayer()
+    hands = 0
+    engine_hands = 0
+    divergences = []
+    start = time.perf_counter()
+    for path in paths:
+        for body, names, _ in read_hand_bodies(path):
+            if limit is not None and hands >= limit:
+                break
+            hands += 1
+            if not verify and check_hand(body) is None:
+                continue
+            engine_hands += 1
+            hand = parse_hand(body, names)
+            try:
+                replayer.replay_hand(hand)
+            except ReplayDivergence as e:
+                divergences.append((path, hand, str(e)))
+                if fail_fast:
+                    break
+        if fail_fast and divergences or limit is not None and hands >= limit:
+            break
+    return {'hands': hands, 'engine_hands': engine_hands, 'divergences': divergences,
+            'elapsed': time.perf_counter() - start}
+
+
+def run(prefix: str, limit: Optional[int] = None, fail_fast: bool = False, verify: bool = False) -> int:
+    """Sprawdzenie historii z linii poleceń; kod 1, gdy którekolwiek rozdanie się rozjechało."""
+    paths = history_paths(prefix)
+    if not paths:
+        print(f"No hand history files match {prefix}")
+        return 1
+    report = replay_files(paths, limit, fail_fast, verify)
+    elapsed = report['elapsed']
+    print(f"Replayed {report['hands']} hands from {len(paths)} files in {elapsed:.2f}s "
+          f"({report['hands'] / elapsed if elapsed else 0:.0f} hands/sec, "
+          f"{report['engine_hands']} re-executed in the engine)")
+    divergences = report['divergences']
+    print(f"Divergent hands: {len(divergences)}")
+    for path, hand, message in divergences[:10]:
+        print(f"  {path}: {message}")
+    if divergences:
+        path, hand, _ = divergences[0]
+        print(f"First divergent hand ({path}):")
+        print(format_hand(hand))
+    return 1 if divergences else 0
@@ -0,0 +1,78 @@
+import random
+import secrets
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # Bez NumPy dostępny jest tylko generator random.Random
+    np = None
+
+
+def draw_master_seed(seed: Optional[int] = None) -> int:
+    """Ziarno główne przebiegu: podane albo losowe (do wypisania, by przebieg dało się powtórzyć)."""
+    return seed if seed is not None else secrets.randbits(64)
+
+
+def derive_seed(master_seed: Optional[int], stream: int) -> int:
+    """Deterministyczne ziarno strumienia wyprowadzone z ziarna głównego i numeru strumienia.
+
+    Bez ziarna głównego (None) każde wywołanie daje nowe losowe ziarno.
+    """
+    if master_seed is None:
+        return secrets.randbits(64)
+    return random.Random(f"{master_seed}:{stream}").getrandbits(64)
+
+
+class NumpyRandom:
+    """Strumień losowy oparty na numpy.random.Generator z interfejsem random.Random.
+
+    Liczby i permutacje talii są generowane paczkami, więc pojedyncze wywołanie
+    kosztuje tyle co odczyt z bufora.
+    """
+
+    def __init__(self, seed: Optional[int] = None, buffer_size: int = 4096):
+        self.generator = np.random.Generator(np.random.PCG64(seed))
+        self.buffer_size = buffer_size
+        self._floats = []
+        self._permutations = []
+
+    def random(self) -> float:
+        if not self._floats:
+            self._floats = self.generator.random(self.buffer_size).tolist()
+            self._floats.reverse()
+        return self._floats.pop()
+
+    def randint(self, a: int, b: int) -> int:
+        return a + int(self.random() * (b - a + 1))
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+    def sample(self, population, k: int):
+        population = list(population)
+        return [population[i] for i in self.generator.permutation(len(population))[:k]]
+
+    def permutations(self, n: int, count: int):
+        """Tablica (count, n) niezależnych permutacji liczb 0..n-1."""
+        return self.generator.permuted(np.tile(np.arange(n, dtype=np.int8), (count, 1)), axis=1)
+
+    def shuffle(self, x) -> None:
+        """Tasowanie listy w miejscu; permutacje 52 kart pobierane są z bufora."""
+        if len(x) == 52:
+            if not self._permutations:
+                self._permutations = self.permutations(52, self.buffer_size // 16).tolist()
+            order = self._permutations.pop()
+        else:
+            order = self.generator.permutation(len(x)).tolist()
+        x[:] = [x[i] for i in order]
+
+
+def make_rng(seed: Optional[int] = None, backend: str = 'python'):
+    """Tworzenie strumienia losowego: 'python' (random.Random) lub 'numpy' (NumpyRandom)."""
+    if backend == 'python':
+        return random.Random(seed)
+    if backend == 'numpy':
+        if np is None:
+            raise ImportError("NumPy is required for the numpy RNG backend")
+        return NumpyRandom(seed)
+    raise ValueError(f"Unknown RNG backend: {backend}")
@@ -0,0 +1,330 @@
+import asyncio
+import itertools
+import json
+import signal
+from typing import Optional
+
+from poker import Player, Deck
+from game_engine import GameEngine, Stepper
+from rng import derive_seed
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Maksymalna długość jednej linii protokołu
+LINE_LIMIT = 64 * 1024
+# Liczba odebranych, nieprzetworzonych linii na połączenie; pełna kolejka wstrzymuje odczyt z gniazda
+INBOX_SIZE = 16
+
+
+class ProtocolError(Exception):
+    """Błąd komunikatu od klienta"""
+    pass
+
+
+def card_text(card) -> str:
+    """Zapis karty w protokole, np. '10h' lub 'As'."""
+    return f"{card.rank}{card.suit}"
+
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(',', ':')).encode() + b"\n"
+
+
+def decode(line: bytes) -> dict:
+    try:
+        message = json.loads(line)
+    except ValueError:
+        raise ProtocolError("Invalid JSON")
+    if not isinstance(message, dict) or 'type' not in message:
+        raise ProtocolError("Message must be an object with a 'type'")
+    return message
+
+
+def positive_int(message: dict, key: str, default=None):
+    """Dodatnia liczba całkowita z pola komunikatu (lub `default`, gdy pola brak)."""
+    value = message.get(key)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ProtocolError(f"'{key}' must be a positive integer")
+    try:
+        value = int(value)
+    except ValueError:
+        raise ProtocolError(f"'{key}' must be a positive integer")
+    if value <= 0:
+        raise ProtocolError(f"'{key}' must be a positive integer")
+    return value
+
+
+def default_answer(decision):
+    """Odpowiedź stosowana po przekroczeniu czasu na decyzję: check/fold, bez wymiany."""
+    if decision.kind == 'bet':
+        return "check" if decision.call_amount == 0 else "fold"
+    return []
+
+
+def decision_message(engine: GameEngine, decision, decision_id: int) -> dict:
+    player = decision.player
+    message = {
+        'type': 'decision',
+        'id': decision_id,
+        'kind': decision.kind,
+        'hand': [card_text(card) for card in player.hand],
+        'stack': player.stack,
+        'pot': engine.pot,
+    }
+    if decision.kind == 'bet':
+        message['current_bet'] = decision.current_bet
+        message['call_amount'] = decision.call_amount
+    return message
+
+
+def result_message(engine: GameEngine, round_number: int, winners) -> dict:
+    message = {'type': 'result', 'round': round_number, 'winners': [], 'draw': False,
+               'stacks': {p.name: p.stack for p in engine.players}}
+    if winners and winners[0][0] != "final_winner":
+        message['draw'] = winners[0][5]
+        message['winners'] = [{'name': w[0].name, 'hand': w[1], 'pot': w[3]} for w in winners]
+    return message
+
+
+class TableServer:
+    """Serwer wielu stołów: każde połączenie TCP prowadzi własny stół w osobnym zadaniu asyncio.
+
+    Klient steruje miejscem "You", pozostałe miejsca zajmują boty silnika.
+    Komunikaty to obiekty JSON, po jednym w linii (opis protokołu w README).
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 max_tables: int = 1000, decision_timeout: float = 10.0,
+                 num_players: int = 6, seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.decision_timeout = decision_timeout
+        self.num_players = num_players
+        self.seed = seed
+        # Ograniczenie liczby stołów: kolejne połączenia czekają na wolne miejsce
+        self.table_slots = asyncio.Semaphore(max_tables)
+        self.server = None
+        self.tables = set()
+        self.closing = False
+        self._table_ids = itertools.count()
+        self.stats = {'tables': 0, 'finished': 0, 'rounds': 0, 'decisions': 0,
+                      'timeouts': 0, 'disconnects': 0, 'errors': 0}
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                 limit=LINE_LIMIT, backlog=4096)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def _send(self, writer: asyncio.StreamWriter, message: dict) -> None:
+        writer.write(encode(message))
+        # Wolny klient wstrzymuje tylko swój stół
+        await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self.tables.add(task)
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            join = decode(line)
+            if join['type'] != 'join':
+                raise ProtocolError("Expected 'join'")
+            async with self.table_slots:
+                if self.closing:
+                    await self._send(writer, {'type': 'end', 'reason': 'shutdown'})
+                    return
+                await self._run_table(reader, writer, join)
+        except ProtocolError as e:
+            self.stats['errors'] += 1
+            writer.write(encode({'type': 'error', 'message': str(e)}))
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            self.stats['disconnects'] += 1
+        except asyncio.CancelledError:
+            # Przerwanie przy zamykaniu serwera - klient dostaje jeszcze informację o końcu
+            if self.closing:
+                writer.write(encode({'type': 'end', 'reason': 'shutdown'}))
+        finally:
+            self.tables.discard(task)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    async def _run_table(self, reader, writer, join: dict) -> None:
+        """Rozgrywanie rund stołu aż do końca gry, limitu rund lub zamykania serwera."""
+        table_id = next(self._table_ids)
+        num_players = positive_int(join, 'players', self.num_players)
+        if not 2 <= num_players <= 6:
+            raise ProtocolError("Players must be between 2 and 6")
+        stack = positive_int(join, 'stack', 1000)
+        max_rounds = positive_int(join, 'rounds')
+        seed = join.get('seed')
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+            raise ProtocolError("'seed' must be an integer")
+        if seed is None and self.seed is not None:
+            seed = derive_seed(self.seed, table_id)
+        engine = GameEngine(Player.create_players(num_players, stack), Deck(), seed=seed)
+        self.stats['tables'] += 1
+        await self._send(writer, {'type': 'joined', 'table': table_id,
+                                  'players': [p.name for p in engine.players]})
+        inbox = asyncio.Queue(INBOX_SIZE)
+        reader_task = asyncio.create_task(self._read_lines(reader, inbox))
+        try:
+            await self._play_table(writer, engine, inbox, max_rounds)
+        finally:
+            reader_task.cancel()
+
+    @staticmethod
+    async def _read_lines(reader: asyncio.StreamReader, inbox: asyncio.Queue) -> None:
+        """Odczyt linii od klienta do kolejki; pusta linia (b'') oznacza rozłączenie."""
+        try:
+            while True:
+                line = await reader.readline()
+                await inbox.put(line)
+                if not line:
+                    return
+        except (ConnectionError, ValueError):
+            await inbox.put(b'')
+
+    async def _play_table(self, writer, engine: GameEngine, inbox: asyncio.Queue,
+                          max_rounds: Optional[int]) -> None:
+        decision_ids = itertools.count()
+        round_number = 0
+        reason = 'game_over'
+        while not engine.game_over and not engine.check_game_over():
+            if self.closing:
+                reason = 'shutdown'
+                break
+            if max_rounds is not None and round_number >= max_rounds:
+                reason = 'rounds'
+                break
+            # Kroki silnika (ruchy botów, wymiana, showdown) w wątku, poza pętlą zdarzeń
+            stepper = await self._in_executor(Stepper, engine.round_steps())
+            try:
+                while not stepper.done:
+                    decision_id = next(decision_ids)
+                    answer = await self._ask(inbox, writer, engine, stepper.decision, decision_id)
+                    await self._in_executor(stepper.resume, answer)
+            finally:
+                stepper.close()
+            winners = stepper.result
+            if winners and winners[0][0] != "final_winner" and winners[0][5]:
+                await self._in_executor(engine.handle_draw_resolution, "split")
+            round_number += 1
+            self.stats['rounds'] += 1
+            await self._send(writer, result_message(engine, round_number, winners))
+            # Oddanie pętli innym stołom między rundami
+            await asyncio.sleep(0)
+        self.stats['finished'] += 1
+        await self._send(writer, {'type': 'end', 'reason': reason,
+                                  'stacks': {p.name: p.stack for p in engine.players}})
+
+    @staticmethod
+    async def _in_executor(func, *args):
+        """Wywołanie w domyślnej puli wątków pętli.
+
+        Przy anulowaniu zadania czeka na zakończenie rozpoczętego kroku, żeby silnik
+        stołu nie był zamykany ani wznawiany w trakcie pracy wątku.
+        """
+        future = asyncio.get_running_loop().run_in_executor(None, func, *args)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await asyncio.wait({future})
+            raise
+
+    async def _ask(self, inbox: asyncio.Queue, writer, engine: GameEngine, decision, decision_id: int):
+        """Wysłanie decyzji i oczekiwanie na odpowiedź; po przekroczeniu czasu stosowana jest odpowiedź domyślna."""
+        self.stats['decisions'] += 1
+        await self._send(writer, decision_message(engine, decision, decision_id))
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.decision_timeout
+        while True:
+            remaining = deadline - loop.time()
+            try:
+                line = await asyncio.wait_for(inbox.get(), max(remaining, 0))
+            except asyncio.TimeoutError:
+                line = None
+            # Odpowiedź odebrana w tej samej iteracji pętli co upływ czasu nie jest odrzucana
+            if line is None and not inbox.empty():
+                line = inbox.get_nowait()
+            if line is None:
+                self.stats['timeouts'] += 1
+                answer = default_answer(decision)
+                await self._send(writer, {'type': 'timeout', 'id': decision_id, 'applied': answer})
+                return answer
+            if not line:
+                raise ConnectionError("Client disconnected")
+            try:
+                message = decode(line)
+                if message['type'] != 'answer' or message.get('id') != decision_id:
+                    raise ProtocolError(f"Expected answer to decision {decision_id}")
+                return self._parse_answer(decision, message)
+            except ProtocolError as e:
+                self.stats['errors'] += 1
+                await self._send(writer, {'type': 'error', 'message': str(e)})
+
+    @staticmethod
+    def _parse_answer(decision, message: dict):
+        if decision.kind == 'bet':
+            action = message.get('action')
+            if not isinstance(action, str):
+                raise ProtocolError("Bet answer needs an 'action' string")
+            return action
+        discard = message.get('discard', [])
+        if not isinstance(discard, list) or not all(isinstance(i, int) and 0 <= i <= 4 for i in discard) \
+                or len(set(discard)) != len(discard):
+            raise ProtocolError("Exchange answer needs a 'discard' list of distinct card indices 0-4")
+        return discard
+
+    async def shutdown(self, grace: float = 5.0) -> None:
+        """Łagodne zamknięcie: bez nowych połączeń, stoły kończą bieżącą rundę, po czasie `grace` są przerywane."""
+        self.closing = True
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.tables:
+            _, pending = await asyncio.wait(set(self.tables), timeout=grace)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+    async def serve_forever(self) -> None:
+        """Obsługa połączeń do otrzymania SIGINT/SIGTERM."""
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:  # Windows
+                pass
+        try:
+            await stop.wait()
+        finally:
+            await self.shutdown()
+
+
+def format_stats(stats: dict) -> str:
+    return "  ".join(f"{name}: {value}" for name, value in stats.items())
+
+
+async def _serve(host, port, max_tables, decision_timeout, num_players, seed) -> dict:
+    server = await TableServer(host, port, max_tables, decision_timeout, num_players, seed).start()
+    print(f"Serving tables on {server.host}:{server.port} (Ctrl+C to stop)")
+    await server.serve_forever()
+    return server.stats
+
+
+def run(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_tables: int = 1000,
+        decision_timeout: float = 10.0, num_players: int = 6, seed: Optional[int] = None) -> int:
+    """Uruchomienie serwera z linii poleceń."""
+    stats = asyncio.run(_serve(host, port, max_tables, decision_timeout, num_players, seed))
+    print(format_stats(stats))
+    return 0
@@ -0,0 +1,325 @@
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from poker import Player, Deck
+from game_engine import GameEngine, Stepper
+from hand_evaluator import HandEvaluator
+from policies import Policy, BatchPolicy, get_policy, get_batch_policy, action_text
+from rng import derive_seed, draw_master_seed, make_rng
+from deck_sources import PermutationFileSource
+from profiler import PhaseProfiler, merge_histograms, format_histograms
+from hand_history import HandHistoryWriter
+
+
+def new_stats() -> dict:
+    """Pusty zestaw statystyk symulacji."""
+    return {
+        'hands': 0,
+        'games': 0,
+        'showdowns': 0,
+        'folds': 0,
+        'draws': 0,
+        'chip_errors': 0,
+        'wins': Counter(),
+        'chips_won': Counter(),
+        'categories': Counter(),
+        'phases': {},
+    }
+
+
+def record_round(stats: dict, winners) -> None:
+    """Dopisanie wyniku jednej rundy do statystyk."""
+    stats['hands'] += 1
+    if not winners or winners[0][0] == "final_winner":
+        return
+    _, hand_name, _, pot, _, is_draw = winners[0]
+    if is_draw:
+        stats['draws'] += 1
+    elif hand_name is None or hand_name == "Win by fold":
+        stats['folds'] += 1
+    else:
+        stats['showdowns'] += 1
+    for winner in winners:
+        stats['wins'][winner[0].name] += 1
+        if winner[1] and winner[1] != "Win by fold":
+            stats['categories'][winner[1]] += 1
+    if not is_draw:
+        stats['chips_won'][winners[0][0].name] += pot
+
+
+def play_hands(hands: int, num_players: int = 6, seed: Optional[int] = None,
+               policy: Optional[Policy] = None, starting_money: int = 1000,
+               stats: Optional[dict] = None, rng_backend: str = 'python',
+               deck_source=None, profiler: Optional[PhaseProfiler] = None,
+               recorder: Optional[HandHistoryWriter] = None,
+               bot_policy: Optional[Policy] = None) -> dict:
+    """Rozgrywanie zadanej liczby rund bez GUI; po końcu gry zaczyna się nowa gra.
+
+    Każdy stół dostaje własny strumień losowy wyprowadzony z `seed` i numeru gry;
+    talie pochodzą z `deck_source`, jeśli je podano. Z profilerem zbierane są
+    histogramy czasów faz rundy, a z `recorder` zapisywana jest historia rozdań.
+    `bot_policy` zastępuje wbudowaną logikę botów (np. strategią z cfr.py).
+    """
+    stats = stats if stats is not None else new_stats()
+    engine = None
+    expected_total = 0
+    for _ in range(hands):
+        if engine is None or engine.game_over or engine.check_game_over():
+            players = Player.create_players(num_players, starting_money)
+            rng = make_rng(derive_seed(seed, stats['games']), rng_backend)
+            engine = GameEngine(players, Deck(), human_policy=policy, rng=rng, deck_source=deck_source,
+                                profiler=profiler, recorder=recorder, bot_policy=bot_policy)
+            expected_total = engine.verify_total_chips()
+            stats['games'] += 1
+        winners = engine.play_round()
+        if winners and winners[0][0] != "final_winner" and winners[0][5]:
+            engine.handle_draw_resolution("split")
+        record_round(stats, winners)
+        if engine.verify_total_chips() != expected_total:
+            stats['chip_errors'] += 1
+            expected_total = engine.verify_total_chips()
+    if profiler is not None:
+        merge_histograms(stats['phases'], profiler.histograms)
+    return stats
+
+
+def play_lockstep(tables, num_players: int = 6, policy: Optional[Policy] = None,
+                  batch_policy: Optional[BatchPolicy] = None, starting_money: int = 1000,
+                  stats: Optional[dict] = None, rng_backend: str = 'python',
+                  small_blind: int = 25, big_blind: int = 50) -> dict:
+    """Rozgrywanie wielu stołów naprzemiennie w jednym procesie z wsadowymi decyzjami botów.
+
+    `tables` to lista par (liczba rund, ziarno); każdy stół gra jak play_hands
+    z tym ziarnem. Stoły są prowadzone krokami do najbliższego zakładu bota,
+    po czym wszystkie oczekujące zakłady rozstrzyga jedno wywołanie
+    `batch_policy.decide_batch`.
+    """
+    stats = stats if stats is not None else new_stats()
+    policy = policy or get_policy('random')
+    batch_policy = batch_policy or get_batch_policy('reference', small_blind, big_blind)
+    blinds = (small_blind, big_blind)
+    states = [{'hands': hands, 'seed': seed, 'games': 0, 'engine': None, 'stepper': None,
+               'expected_total': 0, 'blinds': blinds} for hands, seed in tables if hands > 0]
+    while states:
+        pending = []
+        for state in states:
+            decision = _advance_table(state, num_players, policy, starting_money, stats, rng_backend)
+            if decision is not None:
+                pending.append((state, decision))
+        states = [state for state in states if state['hands'] > 0 or state['stepper'] is not None]
+        if not pending:
+            continue
+        keys, call_amounts, stacks, pots, uniforms = [], [], [], [], []
+        for state, decision in pending:
+            engine = state['engine']
+            player = decision.player
+            keys.append(player.strength)
+            call_amounts.append(decision.call_amount)
+            stacks.append(player.stack)
+            pots.append(engine.pot)
+            uniforms.append(engine.rng.random())
+        actions, amounts = batch_policy.decide_batch(keys, call_amounts, stacks, pots, uniforms)
+        for (state, _), action, amount, call_amount in zip(pending, actions.tolist(), amounts.tolist(),
+                                                          call_amounts):
+            state['stepper'].resume(action_text(action, amount, call_amount))
+    return stats
+
+
+def _advance_table(state: dict, num_players: int, policy: Policy, starting_money: int,
+                   stats: dict, rng_backend: str):
+    """Prowadzenie stołu do najbliższego zakładu bota (zwracana decyzja) lub do końca jego rund (None)."""
+    while True:
+        stepper = state['stepper']
+        if stepper is None:
+            if state['hands'] == 0:
+                return None
+            engine = state['engine']
+            if engine is None or engine.game_over or engine.check_game_over():
+                players = Player.create_players(num_players, starting_money)
+                rng = make_rng(derive_seed(state['seed'], state['games']), rng_backend)
+                small_blind, big_blind = state['blinds']
+                engine = state['engine'] = GameEngine(players, Deck(), small_blind=small_blind,
+                                                      big_blind=big_blind, human_policy=policy, rng=rng,
+                                                      batch_bots=True)
+                state['expected_total'] = engine.verify_total_chips()
+                state['games'] += 1
+                stats['games'] += 1
+            stepper = state['stepper'] = Stepper(engine.round_steps())
+        engine = state['engine']
+        if stepper.done:
+            winners = stepper.result
+            state['stepper'] = None
+            state['hands'] -= 1
+            if winners and winners[0][0] != "final_winner" and winners[0][5]:
+                engine.handle_draw_resolution("split")
+            record_round(stats, winners)
+            if engine.verify_total_chips() != state['expected_total']:
+                stats['chip_errors'] += 1
+                state['expected_total'] = engine.verify_total_chips()
+            continue
+        decision = stepper.decision
+        if decision.kind == 'bot_bet':
+            return decision
+        if decision.kind == 'bet':
+            stepper.resume(policy.act(engine, decision.player, decision.current_bet))
+        else:
+            stepper.resume(policy.exchange(engine, decision.player))
+
+
+def merge_stats(total: dict, part: dict) -> dict:
+    """Dodanie statystyk jednej części symulacji do sumy."""
+    for name, value in part.items():
+        if isinstance(value, Counter):
+            total[name].update(value)
+        elif name == 'phases':
+            merge_histograms(total[name], value)
+        else:
+            total[name] += value
+    return total
+
+
+def _play_shard(hands: int, num_players: int, seed: int, policy_name: str,
+                rng_backend: str = 'python', decks_path: Optional[str] = None,
+                first_deck: int = 0, profile: bool = False,
+                profile_window: Optional[tuple] = None, profile_output: Optional[str] = None,
+                history_prefix: Optional[str] = None, bot_policy_name: Optional[str] = None) -> dict:
+    """Rozegranie jednej części w procesie roboczym - zwracane są tylko zagregowane statystyki."""
+    deck_source = PermutationFileSource(decks_path, first_deck) if decks_path else None
+    profiler = PhaseProfiler(profile_window, first_deck) if profile else None
+    recorder = HandHistoryWriter(history_prefix) if history_prefix else None
+    try:
+        bot_policy = get_policy(bot_policy_name) if bot_policy_name else None
+        stats = play_hands(hands, num_players, seed, get_policy(policy_name),
+                           rng_backend=rng_backend, deck_source=deck_source, profiler=profiler,
+                           recorder=recorder, bot_policy=bot_policy)
+    finally:
+        if recorder is not None:
+            recorder.close()
+    if profiler is not None and profile_output:
+        profiler.dump_pstats(f"{profile_output}.prof")
+        profiler.dump_speedscope(f"{profile_output}.speedscope.json")
+    return stats
+
+
+def _play_lockstep_group(tables, num_players: int, policy_name: str, batch_policy_name: str,
+                         rng_backend: str = 'python') -> dict:
+    """Rozegranie grupy części jako stołów prowadzonych naprzemiennie w jednym procesie."""
+    return play_lockstep(tables, num_players, get_policy(policy_name), get_batch_policy(batch_policy_name),
+                         rng_backend=rng_backend)
+
+
+def play_sharded(hands: int, num_players: int = 6, seed: Optional[int] = None,
+                 policy_name: str = 'random', workers: Optional[int] = None,
+                 shard_size: int = 1000, rng_backend: str = 'python',
+                 decks_path: Optional[str] = None, profile: bool = False,
+                 profile_window: Optional[tuple] = None, profile_output: Optional[str] = None,
+                 lockstep_tables: int = 0, batch_policy_name: str = 'reference',
+                 history: Optional[str] = None, bot_policy_name: Optional[str] = None) -> dict:
+    """Rozgrywanie rund podzielonych na części o stałym rozmiarze na wielu procesach.
+
+    Podział na części i ich ziarna zależą tylko od ziarna głównego i rozmiaru
+    części, więc sumy są identyczne niezależnie od liczby procesów. Z plikiem
+    talii część zaczyna od talii o numerze swojej pierwszej rundy. Okno profilowania
+    (numery rund) musi mieścić się w jednej części - tylko ona zapisuje pliki profilu.
+    Przy `lockstep_tables` każde zadanie prowadzi naraz tyle części jako osobne stoły
+    z wsadowymi decyzjami botów. Z `history` każda część zapisuje historię rozdań
+    do własnych plików `<history>-NNNNN.*.hh`.
+    """
+    shards = []
+    for i, start in enumerate(range(0, hands, shard_size)):
+        end = min(start + shard_size, hands)
+        window = profile_window if profile_window and start <= profile_window[0] < end else None
+        shards.append((end - start, num_players, derive_seed(seed, i), policy_name,
+                       rng_backend, decks_path, start, profile, window,
+                       profile_output if window else None, f"{history}-{i:05d}" if history else None,
+                       bot_policy_name))
+    workers = workers or os.cpu_count() or 1
+    stats = new_stats()
+    if lockstep_tables:
+        groups = [[(shard[0], shard[2]) for shard in shards[i:i + lockstep_tables]]
+                  for i in range(0, len(shards), lockstep_tables)]
+        jobs = [(group, num_players, policy_name, batch_policy_name, rng_backend) for group in groups]
+        if workers == 1:
+            for args in jobs:
+                merge_stats(stats, _play_lockstep_group(*args))
+            return stats
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for part in executor.map(_play_lockstep_group, *zip(*jobs)):
+                merge_stats(stats, part)
+        return stats
+    if workers == 1:
+        for args in shards:
+            merge_stats(stats, _play_shard(*args))
+        return stats
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for part in executor.map(_play_shard, *zip(*shards)):
+            merge_stats(stats, part)
+    return stats
+
+
+def format_report(stats: dict, elapsed: float) -> str:
+    """Tekstowe podsumowanie symulacji."""
+    hands = stats['hands']
+    lines = [
+        f"Hands: {hands}  Games: {stats['games']}  Time: {elapsed:.2f}s  "
+        f"Hands/sec: {hands / elapsed if elapsed else 0:.0f}",
+        f"Showdowns: {stats['showdowns']}  Won by fold: {stats['folds']}  Draws: {stats['draws']}",
+        f"Chip conservation errors: {stats['chip_errors']}",
+        "Wins by player:",
+    ]
+    for name, count in sorted(stats['wins'].items()):
+        lines.append(f"  {name}: {count} ({count / max(hands, 1):.1%}), "
+                     f"chips won {stats['chips_won'][name]}")
+    lines.append("Winning hands:")
+    for rank in range(10):
+        name = HandEvaluator.hand_name(rank)
+        if stats['categories'][name]:
+            lines.append(f"  {name}: {stats['categories'][name]}")
+    return "\n".join(lines)
+
+
+def run(hands: int, num_players: int, seed: Optional[int], policy_name: str,
+        workers: Optional[int] = 1, shard_size: int = 1000, rng_backend: str = 'python',
+        decks_path: Optional[str] = None, profile: bool = False,
+        profile_window: Optional[tuple] = None, profile_output: str = 'profile',
+        lockstep_tables: int = 0, batch_policy_name: str = 'reference',
+        history: Optional[str] = None, bot_policy_name: Optional[str] = None) -> int:
+    """Uruchomienie symulacji z linii poleceń i wypisanie raportu."""
+    get_policy(policy_name)
+    if bot_policy_name:
+        get_policy(bot_policy_name)
+    make_rng(0, rng_backend)
+    if lockstep_tables:
+        get_batch_policy(batch_policy_name)
+        if decks_path or profile or profile_window or history:
+            raise ValueError("Lockstep tables cannot be combined with deck files, profiling or hand histories")
+        if bot_policy_name:
+            raise ValueError("Lockstep tables decide bot bets with the batch policy, not --bot-policy")
+    if decks_path:
+        PermutationFileSource(decks_path)
+    if profile_window:
+        window_start, window_end = profile_window
+        if not 0 <= window_start < window_end <= hands:
+            raise ValueError("Profile window must lie within the simulated rounds")
+        if window_start // shard_size != (window_end - 1) // shard_size:
+            raise ValueError("Profile window must fit in one shard")
+        profile = True
+    if seed is None:
+        # Losowa gra, ale z ziarnem części wyprowadzonym z jednego wypisanego ziarna głównego
+        seed = draw_master_seed()
+        print(f"Seed: {seed} (pass --seed {seed} to repeat this run)")
+    start = time.perf_counter()
+    stats = play_sharded(hands, num_players, seed, policy_name, workers, shard_size,
+                         rng_backend, decks_path, profile, profile_window, profile_output,
+                         lockstep_tables, batch_policy_name, history, bot_policy_name)
+    print(format_report(stats, time.perf_counter() - start))
+    if profile:
+        print("Round phases:")
+        print(format_histograms(stats['phases']))
+    if profile_window:
+        print(f"Profile of rounds {window_start}-{window_end - 1}: "
+              f"{profile_output}.prof, {profile_output}.speedscope.json")
+    return 1 if stats['chip_errors'] else 0
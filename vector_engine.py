@@ -0,0 +1,415 @@
+import time
+from typing import List, Optional
+
+from poker import Player, Deck, FULL_DECK
+from game_engine import GameEngine
+from hand_evaluator import HandEvaluator, CATEGORY_SHIFT
+from discard_solver import best_discard
+from policies import BatchPolicy, BotPolicy, ReferenceBatchPolicy, ACTION_FOLD, ACTION_CALL, ACTION_RAISE
+from deck_sources import ScriptedSource
+
+try:
+    import numpy as np
+except ImportError:  # Silnik wektorowy wymaga NumPy
+    np = None
+
+
+# Wynik rundy stołu w tablicy 'result' zwracanej przez VectorEngine.play_round
+RESULT_FOLD = 1
+RESULT_SHOWDOWN = 2
+RESULT_DRAW = 3
+
+EXCHANGE_MODES = ('solver', 'none')
+
+
+def next_seats(mask, pos):
+    """Wektorowe next_seat: pierwsze miejsce po `pos` (cyklicznie, z `pos` na końcu) z True w wierszu maski; -1 dla pustego wiersza."""
+    size = mask.shape[1]
+    steps = (np.arange(size) - pos[:, None] - 1) % size
+    step = np.where(mask, steps, size).min(axis=1)
+    return np.where(step < size, (pos + 1 + step) % size, -1)
+
+
+class VectorEngine:
+    """Wiele stołów naraz w tablicach NumPy (struktura tablic).
+
+    Stan N stołów to tablice o pierwszym wymiarze N: żetony, stawki i aktywność
+    miejsc (N, P), karty rąk (N, P, 5) i klucze ich siły, pule, bieżąca stawka
+    i pozycja rozdającego. Każda faza rundy wykonywana jest dla wszystkich stołów
+    jednocześnie; krok licytacji to ruch jednego miejsca na każdym stole, a zakłady
+    wszystkich stołów rozstrzyga jedno wywołanie `batch_policy.decide_batch`.
+
+    Zasady są te same co w GameEngine (_collect_blinds, _betting_steps,
+    _exchange_steps, _showdown, remis dzielony jak handle_draw_resolution("split")),
+    przy czym wszystkie miejsca, także "You", grają jak boty. Stół, na którym
+    żetony ma mniej niż dwóch graczy, zaczyna nową grę. Talie i liczby losowe
+    pochodzą z jednego generatora; przy `record=True` są zapisywane dla każdego
+    stołu, więc rundy można odtworzyć w GameEngine (`cross_check`).
+    """
+
+    def __init__(self, num_tables: int, num_players: int = 6, starting_money: int = 1000,
+                 small_blind: int = 25, big_blind: int = 50, seed: Optional[int] = None,
+                 batch_policy: Optional[BatchPolicy] = None, exchange: str = 'solver',
+                 record: bool = False):
+        if np is None:
+            raise ImportError("NumPy is required for the vector engine")
+        # 5 kart rozdania i najwyżej 3 wymienione na gracza mieszczą się w talii bez odrzuconych kart
+        if not 2 <= num_players <= 6:
+            raise ValueError("Players must be between 2 and 6")
+        if exchange not in EXCHANGE_MODES:
+            raise ValueError(f"Unknown exchange mode: {exchange}")
+        self.num_tables = num_tables
+        self.num_players = num_players
+        self.starting_money = starting_money
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.batch_policy = batch_policy or ReferenceBatchPolicy(big_blind, small_blind)
+        self.exchange = exchange
+        self.generator = np.random.Generator(np.random.PCG64(seed))
+        self.names = [p.name for p in Player.create_players(num_players)]
+        shape = (num_tables, num_players)
+        self.stacks = np.zeros(shape, dtype=np.int64)
+        self.bets = np.zeros(shape, dtype=np.int64)
+        self.active = np.zeros(shape, dtype=bool)
+        self.hands = np.zeros(shape + (5,), dtype=np.int8)
+        self.keys = np.zeros(shape, dtype=np.int64)
+        self.pot = np.zeros(num_tables, dtype=np.int64)
+        self.current_bet = np.zeros(num_tables, dtype=np.int64)
+        self.dealer = np.zeros(num_tables, dtype=np.intp)
+        self.games = np.zeros(num_tables, dtype=np.int64)
+        self._orders = None
+        self._drawn = np.zeros(num_tables, dtype=np.intp)
+        self._uniforms = np.empty((num_tables, 0))
+        self._cursor = np.zeros(num_tables, dtype=np.intp)
+        # Dla każdego stołu lista rund: (numer gry, talia, zużyte liczby losowe, żetony po rundzie, rozdający)
+        self.log = [[] for _ in range(num_tables)] if record else None
+        self._new_game(np.ones(num_tables, dtype=bool))
+
+    def _new_game(self, tables) -> None:
+        self.stacks[tables] = self.starting_money
+        self.dealer[tables] = 0
+        self.games[tables] += 1
+
+    def total_chips(self):
+        """Suma żetonów na każdym stole (odpowiednik verify_total_chips)."""
+        return self.stacks.sum(axis=1) + self.pot
+
+    def play_round(self) -> dict:
+        """Jedna runda na wszystkich stołach.
+
+        Zwraca tablice: 'result' (RESULT_FOLD/SHOWDOWN/DRAW), 'winners' (N, P) -
+        miejsca wygrywające pulę lub remisujące, 'pots' - pula przed wypłatą,
+        'categories' - kategoria zwycięskiego układu (-1 przy wygranej przez pas),
+        oraz 'new_games' - stoły, na których przed rundą zaczęła się nowa gra.
+        """
+        num_tables = self.num_tables
+        new_games = (self.stacks > 0).sum(axis=1) < 2
+        if new_games.any():
+            self._new_game(new_games)
+        self.pot[:] = 0
+        self.current_bet[:] = 0
+        self.bets[:] = 0
+        self.active = self.stacks > 0
+        self._orders = self.generator.permuted(np.tile(np.arange(52, dtype=np.int8), (num_tables, 1)), axis=1)
+        self._uniforms = self.generator.random((num_tables, 8 * self.num_players))
+        self._cursor[:] = 0
+        self._collect_blinds()
+        self._deal_cards()
+        everyone = np.ones(num_tables, dtype=bool)
+        self._betting(everyone)
+
+        result = np.full(num_tables, RESULT_FOLD, dtype=np.int8)
+        winners = np.zeros((num_tables, self.num_players), dtype=bool)
+        pots = self.pot.copy()
+        categories = np.full(num_tables, -1, dtype=np.int64)
+        # Wygrana przez pas po pierwszej licytacji - bez wymiany i bez przesunięcia przycisku
+        by_fold = self.active.sum(axis=1) <= 1
+        rows = np.flatnonzero(by_fold)
+        seats = self.active[rows].argmax(axis=1)
+        self.stacks[rows, seats] += self.pot[rows]
+        self.pot[rows] = 0
+        winners[rows, seats] = True
+        playing = ~by_fold
+        if playing.any():
+            self._exchange_cards(playing)
+            self.current_bet[playing] = 0
+            self.bets[playing] = 0
+            self._betting(playing)
+            self._showdown(playing, result, winners, categories)
+            self._move_dealer_button(playing)
+        if self.log is not None:
+            self._record()
+        return {'result': result, 'winners': winners, 'pots': pots, 'categories': categories,
+                'new_games': new_games}
+
+    def _record(self) -> None:
+        for table, log in enumerate(self.log):
+            log.append((int(self.games[table]), self._orders[table].tolist(),
+                        self._uniforms[table, :self._cursor[table]].tolist(),
+                        self.stacks[table].tolist(), int(self.dealer[table])))
+
+    def _next_uniforms(self, rows):
+        """Kolejne liczby losowe stołów `rows`; każdy stół zużywa własny wiersz bufora."""
+        cursor = self._cursor[rows]
+        if cursor.max() >= self._uniforms.shape[1]:
+            self._uniforms = np.hstack([self._uniforms, self.generator.random(self._uniforms.shape)])
+        self._cursor[rows] += 1
+        return self._uniforms[rows, cursor]
+
+    def _draw_cards(self, draws):
+        """Karty zdejmowane z wierzchu talii: `draws` to numery kolejnych dobrań na każdym stole."""
+        flat = draws.reshape(self.num_tables, -1)
+        return np.take_along_axis(self._orders, 51 - flat, axis=1).reshape(draws.shape)
+
+    def _update_keys(self) -> None:
+        self.keys[self.active] = HandEvaluator.rank_batch(self.hands[self.active])[0]
+
+    def _collect_blinds(self) -> None:
+        rows = np.arange(self.num_tables)
+        chips = self.stacks > 0
+        sb_pos = next_seats(chips, self.dealer)
+        sb_amount = np.minimum(self.small_blind, self.stacks[rows, sb_pos])
+        self.stacks[rows, sb_pos] -= sb_amount
+        self.bets[rows, sb_pos] += sb_amount
+        self.pot += sb_amount
+        chips[rows, sb_pos] = self.stacks[rows, sb_pos] > 0
+        bb_pos = next_seats(chips, sb_pos)
+        bb_amount = np.minimum(self.big_blind, self.stacks[rows, bb_pos])
+        self.stacks[rows, bb_pos] -= bb_amount
+        self.bets[rows, bb_pos] += bb_amount
+        self.pot += bb_amount
+        self.current_bet[:] = bb_amount
+
+    def _deal_cards(self) -> None:
+        """Rozdanie po jednej karcie kolejnym aktywnym graczom, pięć razy (jak Deck.deal)."""
+        counts = self.active.sum(axis=1)
+        order = np.cumsum(self.active, axis=1) - 1
+        draws = np.arange(5)[None, None, :] * counts[:, None, None] + np.maximum(order, 0)[:, :, None]
+        self.hands = np.where(self.active[:, :, None], self._draw_cards(draws), self.hands)
+        self._drawn = counts * 5
+        self._update_keys()
+
+    def _betting(self, tables) -> None:
+        """Runda zakładów na stołach `tables` - te same zasady i warunki końca co GameEngine._betting_steps."""
+        seats = np.arange(self.num_players)
+        live = self.active & (self.stacks > 0)
+        running = tables & (live.sum(axis=1) > 1)
+        # Gracze licytujący od początku rundy, także po all-in (in_round w silniku)
+        in_round = live
+        acted = np.full(live.shape, -1, dtype=np.int64)
+        raise_count = np.zeros(self.num_tables, dtype=np.int64)
+        pos = next_seats(self.stacks > 0, self.dealer)
+        round_count = np.zeros(self.num_tables, dtype=np.intp)
+        max_rounds = self.num_players * 4
+        rows = np.flatnonzero(running)
+        while rows.size:
+            seat = pos[rows]
+            prompted = np.flatnonzero(self.active[rows, seat] & (self.stacks[rows, seat] > 0) &
+                                      (acted[rows, seat] < raise_count[rows]))
+            advance = np.ones(rows.size, dtype=bool)
+            finished = np.zeros(rows.size, dtype=bool)
+            if prompted.size:
+                r, s = rows[prompted], seat[prompted]
+                call_amounts = np.maximum(0, self.current_bet[r] - self.bets[r, s])
+                actions, amounts = self.batch_policy.decide_batch(
+                    self.keys[r, s], call_amounts, self.stacks[r, s], self.pot[r], self._next_uniforms(r))
+                actions = np.asarray(actions)
+                amounts = np.asarray(amounts, dtype=np.int64)
+
+                fold = actions == ACTION_FOLD
+                fr, fs = r[fold], s[fold]
+                self.active[fr, fs] = False
+                alone = (in_round[fr] & self.active[fr]).sum(axis=1) <= 1
+                # Jeden gracz w licytacji kończy rundę bez przejścia do następnego miejsca
+                finished[prompted[fold][alone]] = True
+                advance[prompted[fold][alone]] = False
+
+                call = actions == ACTION_CALL
+                cr, cs = r[call], s[call]
+                bet = np.minimum(call_amounts[call], self.stacks[cr, cs])
+                self.stacks[cr, cs] -= bet
+                self.bets[cr, cs] += bet
+                self.pot[cr] += bet
+                acted[cr, cs] = raise_count[cr]
+
+                raised = actions == ACTION_RAISE
+                rr, rs = r[raised], s[raised]
+                total = self.current_bet[rr] + amounts[raised]
+                needed = total - self.bets[rr, rs]
+                ok = needed <= self.stacks[rr, rs]
+                # Podbicie ponad stan żetonów jest odrzucane, a ten sam gracz decyduje jeszcze raz
+                advance[prompted[raised][~ok]] = False
+                rr, rs, total, needed = rr[ok], rs[ok], total[ok], needed[ok]
+                self.stacks[rr, rs] -= needed
+                self.bets[rr, rs] += needed
+                self.pot[rr] += needed
+                self.current_bet[rr] = total
+                raise_count[rr] += 1
+                acted[rr, rs] = raise_count[rr]
+
+            moved = rows[advance]
+            pos[moved] = next_seats((self.stacks[moved] > 0) | (seats == self.dealer[moved, None]), pos[moved])
+            round_count[moved] += 1
+            active = self.active[moved]
+            live = active & (self.stacks[moved] > 0)
+            to_act = (live & (acted[moved] < raise_count[moved, None])).any(axis=1)
+            unmatched = (live & (self.bets[moved] != self.current_bet[moved, None])).any(axis=1)
+            done = (round_count[moved] >= max_rounds) | ~to_act | (active.sum(axis=1) <= 1) | ~unmatched
+            running[rows[finished]] = False
+            running[moved[done]] = False
+            rows = np.flatnonzero(running)
+
+    def _exchange_cards(self, tables) -> None:
+        """Wymiana kart aktywnych graczy w kolejności miejsc; nowe karty trafiają na miejsca wymienianych."""
+        if self.exchange == 'none':
+            return
+        discard = np.zeros(self.hands.shape, dtype=bool)
+        for table, seat in zip(*np.nonzero(self.active & tables[:, None])):
+            hand = [FULL_DECK[card] for card in self.hands[table, seat].tolist()]
+            discard[table, seat, best_discard(hand, max_discard=3)] = True
+        counts = discard.sum(axis=2)
+        earlier = np.cumsum(counts, axis=1) - counts
+        draws = self._drawn[:, None, None] + earlier[:, :, None] + np.cumsum(discard, axis=2) - 1
+        draws = np.where(discard, draws, 0)
+        self.hands = np.where(discard, self._draw_cards(draws), self.hands)
+        self._drawn = self._drawn + counts.sum(axis=1)
+        self._update_keys()
+
+    def _showdown(self, tables, result, winners, categories) -> None:
+        """Przyznanie puli najsilniejszej ręce; remis dzieli pulę między wszystkich aktywnych graczy."""
+        rows = np.flatnonzero(tables)
+        active = self.active[rows]
+        counts = active.sum(axis=1)
+        keys = np.where(active, self.keys[rows], -1)
+        best = keys.max(axis=1)
+        best_hands = active & (keys == best[:, None])
+        winners[rows] = best_hands
+        pots = self.pot[rows]
+        single = best_hands.sum(axis=1) == 1
+        self.stacks[rows[single]] += np.where(best_hands[single], pots[single, None], 0)
+        result[rows[single]] = np.where(counts[single] <= 1, RESULT_FOLD, RESULT_SHOWDOWN)
+        categories[rows] = np.where(counts <= 1, -1, best >> CATEGORY_SHIFT)
+
+        draw = ~single
+        if draw.any():
+            dr, active, counts, pots = rows[draw], active[draw], counts[draw], pots[draw]
+            result[dr] = RESULT_DRAW
+            self.stacks[dr] += np.where(active, (pots // counts)[:, None], 0)
+            remainder = pots % counts
+            extra = np.flatnonzero(remainder)
+            if extra.size:
+                # Reszta dla losowego aktywnego gracza - jak rng.choice(active_players)
+                picks = (self._next_uniforms(dr[extra]) * counts[extra]).astype(np.intp)
+                seats = (np.cumsum(active[extra], axis=1) > picks[:, None]).argmax(axis=1)
+                self.stacks[dr[extra], seats] += remainder[extra]
+        self.pot[rows] = 0
+
+    def _move_dealer_button(self, tables) -> None:
+        rows = np.flatnonzero(tables)
+        seats = next_seats(self.stacks[rows] > 0, self.dealer[rows])
+        self.dealer[rows] = np.where(seats >= 0, seats, self.dealer[rows])
+
+
+def play_vector(num_tables: int, rounds: int, num_players: int = 6, seed: Optional[int] = None,
+                starting_money: int = 1000, exchange: str = 'solver', stats: Optional[dict] = None) -> dict:
+    """Rozgrywanie `rounds` rund na `num_tables` stołach naraz; statystyki w formacie simulate.new_stats."""
+    from simulate import new_stats
+    stats = stats if stats is not None else new_stats()
+    engine = VectorEngine(num_tables, num_players, starting_money, seed=seed, exchange=exchange)
+    expected_total = starting_money * num_players
+    stats['games'] += num_tables
+    names = engine.names
+    hand_names = [HandEvaluator.hand_name(rank) for rank in range(10)]
+    for _ in range(rounds):
+        outcome = engine.play_round()
+        result = outcome['result']
+        winners = outcome['winners']
+        stats['hands'] += num_tables
+        stats['games'] += int(outcome['new_games'].sum())
+        stats['folds'] += int((result == RESULT_FOLD).sum())
+        stats['showdowns'] += int((result == RESULT_SHOWDOWN).sum())
+        stats['draws'] += int((result == RESULT_DRAW).sum())
+        stats['chip_errors'] += int((engine.total_chips() != expected_total).sum())
+        won = np.where((result != RESULT_DRAW)[:, None] & winners, outcome['pots'][:, None], 0)
+        for seat, name in enumerate(names):
+            stats['wins'][name] += int(winners[:, seat].sum())
+            stats['chips_won'][name] += int(won[:, seat].sum())
+        shown = outcome['categories'] >= 0
+        per_category = np.bincount(outcome['categories'][shown], weights=winners[shown].sum(axis=1), minlength=10)
+        for rank, count in enumerate(per_category.tolist()):
+            if count:
+                stats['categories'][hand_names[rank]] += int(count)
+    return stats
+
+
+class _ScriptedRandom:
+    """Strumień liczb losowych z listy - GameEngine zużywa te same liczby co VectorEngine."""
+
+    def __init__(self):
+        self.values = []
+        self.position = 0
+
+    def random(self) -> float:
+        if self.position >= len(self.values):
+            raise IndexError("Scripted random stream exhausted")
+        value = self.values[self.position]
+        self.position += 1
+        return value
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+
+def cross_check(num_tables: int = 20, rounds: int = 50, num_players: int = 6,
+                seed: Optional[int] = None) -> List[tuple]:
+    """Porównanie VectorEngine z GameEngine na tych samych taliach i liczbach losowych.
+
+    Każdy stół jest odtwarzany w GameEngine (wszystkie miejsca grają jak boty);
+    po każdej rundzie porównywane są żetony, pozycja rozdającego i liczba zużytych
+    liczb losowych. Zwraca listę (stół, runda) pierwszych rozbieżności.
+    """
+    engine = VectorEngine(num_tables, num_players, seed=seed, record=True)
+    for _ in range(rounds):
+        engine.play_round()
+    mismatches = []
+    for table, log in enumerate(engine.log):
+        game = None
+        for round_index, (game_index, order, uniforms, stacks, dealer) in enumerate(log):
+            if game_index != game:
+                game = game_index
+                rng = _ScriptedRandom()
+                source = ScriptedSource([])
+                reference = GameEngine(Player.create_players(num_players, engine.starting_money), Deck(),
+                                       engine.small_blind, engine.big_blind, human_policy=BotPolicy(),
+                                       rng=rng, deck_source=source)
+            source.orders.append(order)
+            rng.values.extend(uniforms)
+            try:
+                winners = reference.play_round()
+                if winners and winners[0][0] != "final_winner" and winners[0][5]:
+                    reference.handle_draw_resolution("split")
+            except IndexError:
+                mismatches.append((table, round_index))
+                break
+            if ([p.stack for p in reference.players] != stacks or reference.dealer_position != dealer
+                    or rng.position != len(rng.values)):
+                mismatches.append((table, round_index))
+                break
+    return mismatches
+
+
+def run(num_tables: int = 1000, rounds: int = 100, num_players: int = 6, seed: Optional[int] = None,
+        exchange: str = 'solver', check: int = 0) -> int:
+    """Uruchomienie silnika wektorowego z linii poleceń; `check` stołów jest sprawdzanych względem GameEngine."""
+    from simulate import format_report
+    start = time.perf_counter()
+    stats = play_vector(num_tables, rounds, num_players, seed, exchange=exchange)
+    print(format_report(stats, time.perf_counter() - start))
+    mismatches = []
+    if check:
+        mismatches = cross_check(check, rounds, num_players, seed)
+        print(f"Cross-check against GameEngine: {check} tables x {rounds} rounds, "
+              f"{len(mismatches)} mismatched tables")
+        for table, round_index in mismatches[:10]:
+            print(f"  table {table}: first mismatch in round {round_index}")
+    return 1 if stats['chip_errors'] or mismatches else 0